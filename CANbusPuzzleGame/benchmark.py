@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the CAN Bus Puzzle Game
+
+Runs the headless simulation core without pygame and reports throughput.
+Usage: python benchmark.py [--frames N] [--vehicles N] [--sessions N]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from simulation import CANSimulation
+from signal_db import load_default_database
+from mission import Condition, Mission
+from can_frame import encode_frames, decode_frames
+from can_bus import CANBus, PeriodicSource
+from traffic import LATENCY_PERCENTILES, percentile
+
+def generate_frames(count: int, seed: int = 0):
+    """Build a reproducible mix of valid, out-of-range and unknown-ID frames"""
+    rng = random.Random(seed)
+    can_ids = list(load_default_database().messages) + [0x000, 0x7FF]
+    return [(rng.choice(can_ids), rng.randrange(0, 10)) for _ in range(count)]
+
+def report(name: str, count: int, elapsed: float):
+    """Print a single benchmark result line"""
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"{name:<28} {count:>10} frames  {elapsed:8.3f} s  {rate / 1e6:8.2f} M frames/s")
+
+def bench_simulation(frames):
+    """Frames per second through CANSimulation.apply_frames"""
+    simulation = CANSimulation()
+    start = time.perf_counter()
+    simulation.apply_frames(frames)
+    report("simulation.apply_frames", len(frames), time.perf_counter() - start)
+
+def bench_frame_codec(frames):
+    """Encode a batch to packed SocketCAN frames, then decode it straight into the simulation"""
+    start = time.perf_counter()
+    buffer = encode_frames([can_id for can_id, _ in frames], [data for _, data in frames])
+    report("can_frame.encode_frames", len(frames), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    frame_buffer = decode_frames(bytes(buffer))
+    ids, values = frame_buffer.raw_ids, frame_buffer.values
+    checksum = sum(ids) + sum(values)
+    report("can_frame.decode_frames", len(frames), time.perf_counter() - start)
+
+    simulation = CANSimulation()
+    start = time.perf_counter()
+    simulation.apply_frames(frame_buffer.pairs())
+    report("decode + apply_frames", len(frames), time.perf_counter() - start)
+    return checksum
+
+def generate_mission_pack(count: int, seed: int = 0):
+    """Build a pack of independent missions spread over every CarState field"""
+    rng = random.Random(seed)
+    templates = [
+        lambda: f"headlights == {rng.choice(['ON', 'OFF'])}",
+        lambda: f"driver_window == {rng.choice(['OPEN', 'CLOSED'])}",
+        lambda: f"passenger_window == {rng.choice(['OPEN', 'CLOSED'])}",
+        lambda: f"doors == {rng.choice(['LOCKED', 'UNLOCKED'])}",
+        lambda: f"engine_rpm in {rng.randrange(0, 8) * 1000}..{rng.randrange(8, 9) * 1000}",
+        lambda: f"engine_rpm > {rng.randrange(1, 8) * 1000}",
+    ]
+    missions = []
+    for number in range(count):
+        conditions = [Condition.parse(rng.choice(templates)()) for _ in range(rng.randrange(1, 3))]
+        missions.append(Mission(f"Objective {number}", conditions=conditions, mission_id=f"objective-{number}"))
+    return missions
+
+def bench_mission_pack(frames, count: int):
+    """Frames per second with a large pack of parallel missions"""
+    simulation = CANSimulation(generate_mission_pack(count))
+    start = time.perf_counter()
+    simulation.apply_frames(frames)
+    report(f"apply_frames, {count} missions", len(frames), time.perf_counter() - start)
+
+def bench_fleet(frames, vehicles: int, seed: int = 0):
+    """Frames per second through the vectorized fleet simulation"""
+    from fleet import FleetSimulation  # NumPy is only needed for the fleet benchmark
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    vehicle_ids = rng.integers(0, vehicles, len(frames))
+    raw_ids = np.array([can_id for can_id, _ in frames], dtype=np.uint32)
+    values = np.array([data for _, data in frames], dtype=np.uint64)
+    fleet = FleetSimulation(vehicles)
+    start = time.perf_counter()
+    fleet.apply_frames(vehicle_ids, raw_ids, values)
+    report(f"fleet, {vehicles} vehicles", len(frames), time.perf_counter() - start)
+
+def bench_bus(nodes: int = 30, seconds: float = 60.0):
+    """Simulated bus seconds per wall-clock second with many periodic nodes"""
+    bus = CANBus(500_000)
+    for node in range(nodes):
+        bus.add_source(PeriodicSource(0x100 + node, 0.01, value=node, offset=node * 1e-4))
+    start = time.perf_counter()
+    bus.run_until(seconds)
+    elapsed = time.perf_counter() - start
+    report(f"can_bus, {nodes} nodes", bus.frames_sent, elapsed)
+    print(f"{'':<28} {seconds / elapsed:>10.0f} x real time at {bus.load:.0%} bus load")
+
+CLASSROOM_COMMANDS = ["send 0x201 01", "send 0x101 00", "send 0x401 03", "send 0x301 01", "send 0x201 00",
+                      "send 0x101 03", "send 0x401 00", "send 0x999 01"]
+
+async def classroom_load(path: str, sessions: int, rate: float, seconds: float):
+    """Connect `sessions` students that each send `rate` commands/s; returns (latencies, server cpu seconds)"""
+    clients = []
+    for number in range(sessions):
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(f"join student-{number}\n".encode())
+        await reader.readline()
+        clients.append((reader, writer))
+
+    async def server_cpu() -> float:
+        reader, writer = clients[0]
+        writer.write(b"server\n")
+        return json.loads(await reader.readline())["server"]["cpu_seconds"]
+
+    latencies = []
+    loop = asyncio.get_running_loop()
+    end = loop.time() + seconds
+
+    async def student(reader, writer, rng):
+        commands = itertools.cycle(rng.sample(CLASSROOM_COMMANDS, len(CLASSROOM_COMMANDS)))
+        due = loop.time() + rng.random() / rate
+        while True:
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            if due >= end:
+                return
+            start = time.perf_counter()
+            writer.write(next(commands).encode() + b"\n")
+            await reader.readline()
+            latencies.append(time.perf_counter() - start)
+            due += 1.0 / rate
+
+    cpu_before = await server_cpu()
+    await asyncio.gather(*(student(reader, writer, random.Random(number))
+                           for number, (reader, writer) in enumerate(clients)))
+    cpu = await server_cpu() - cpu_before
+    for _, writer in clients:
+        writer.close()
+    return latencies, cpu
+
+def bench_classroom(sessions: int, rate: float = 2.0, seconds: float = 5.0):
+    """Server CPU and round-trip latency with many students typing at once.
+
+    The server runs in its own process, so its CPU time (from the `server`
+    command) is not mixed up with the load generator's; latencies include
+    the load generator's own scheduling delay.
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "classroom.py")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "classroom.sock")
+        server = subprocess.Popen([sys.executable, script, "--unix", path, "--max-sessions", str(sessions)],
+                                  stdout=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(path):
+                if server.poll() is not None:
+                    raise RuntimeError("classroom server failed to start")
+                time.sleep(0.05)
+            latencies, cpu = asyncio.run(classroom_load(path, sessions, rate, seconds))
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    load = cpu / seconds
+    print(f"{f'classroom, {sessions} sessions':<28} {len(latencies):>10} commands {seconds:6.3f} s  "
+          f"{len(latencies) / seconds:8.0f} commands/s")
+    print(f"{'':<28} server CPU {load:.1%} at {rate:g} commands/s per session, "
+          f"{cpu / len(latencies) * 1e6:.0f} us per command")
+    print(f"{'':<28} ~{sessions / load:.0f} sessions per core at this rate")
+    print(f"{'':<28} latency " + ", ".join(f"p{p:g} {percentile(latencies, p) * 1000:.2f} ms"
+                                               for p in LATENCY_PERCENTILES))
+
+def main():
+    parser = argparse.ArgumentParser(description="CAN Bus Puzzle Game benchmarks")
+    parser.add_argument("--frames", type=int, default=1_000_000, help="frames per benchmark")
+    parser.add_argument("--missions", type=int, default=5000, help="missions in the large-pack benchmark")
+    parser.add_argument("--vehicles", type=int, default=100_000, help="cars in the fleet benchmark")
+    parser.add_argument("--sessions", type=int, default=500, help="students in the classroom server benchmark")
+    args = parser.parse_args()
+
+    frames = generate_frames(args.frames)
+    bench_simulation(frames)
+    bench_frame_codec(frames)
+    bench_mission_pack(frames, args.missions)
+    bench_fleet(frames, args.vehicles)
+    bench_bus()
+    bench_classroom(args.sessions)
+
+if __name__ == "__main__":
+    main()
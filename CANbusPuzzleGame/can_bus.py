@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+CAN bus arbitration and timing for the CAN Bus Puzzle Game
+
+CANBus is a discrete-event model of one classic CAN bus. Queued frames wait
+until the bus is idle, then the frame with the lowest arbitration field
+wins, exactly as dominant bits win on the wire. Each frame occupies the bus
+for its real length in bits, stuff bits included, at 125, 250 or 500 kbit/s,
+which gives realistic timestamps, per-ID latency and bus load.
+
+Simulated time jumps from event to event, so a saturated bus with many
+nodes runs far faster than real time. `response_times` gives the analytic
+worst-case latency of periodic traffic to compare against.
+
+Usage: python can_bus.py [--bitrate N] [--nodes N] [--seconds S]
+"""
+
+import argparse
+import heapq
+import math
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+from can_frame import CAN_EFF_FLAG, CAN_EFF_MASK, CAN_RTR_FLAG, CAN_SFF_MASK, CAN_MAX_DLC
+
+BIT_RATES = (125_000, 250_000, 500_000)
+DEFAULT_BIT_RATE = 500_000
+
+CRC15_POLYNOMIAL = 0x4599
+TRAILER_BITS = 13  # CRC delimiter, ACK slot and delimiter, 7-bit EOF, 3-bit intermission
+
+def is_extended(raw_id: int) -> bool:
+    """29-bit frame: flagged with CAN_EFF_FLAG, or an unflagged ID too big for 11 bits"""
+    return bool(raw_id & CAN_EFF_FLAG) or (raw_id & CAN_EFF_MASK) > CAN_SFF_MASK
+
+def arbitration_key(raw_id: int) -> int:
+    """The arbitration field as an integer; the lowest key wins the bus.
+
+    Standard frames send ID, RTR, IDE=0; extended frames send the 11-bit
+    base ID, SRR=1, IDE=1, the 18-bit ID extension and RTR. So a standard
+    frame beats an extended one with the same base ID, and data frames beat
+    remote frames.
+    """
+    rtr = 1 if raw_id & CAN_RTR_FLAG else 0
+    if is_extended(raw_id):
+        can_id = raw_id & CAN_EFF_MASK
+        return (can_id >> 18) << 21 | 0b11 << 19 | (can_id & 0x3FFFF) << 1 | rtr
+    return (raw_id & CAN_SFF_MASK) << 21 | rtr << 20
+
+def payload_length(value: int) -> int:
+    """DLC the game would use for a data value (as CANFrame.from_value), capped at 8"""
+    return min(CAN_MAX_DLC, max(1, (value.bit_length() + 7) // 8))
+
+@lru_cache(maxsize=65536)
+def frame_bits(raw_id: int, dlc: int, value: int) -> int:
+    """Exact length of a data or remote frame on the wire, stuff bits and intermission included"""
+    dlc = min(dlc, CAN_MAX_DLC)
+    remote = bool(raw_id & CAN_RTR_FLAG)
+    bits: List[int] = [0]  # SOF
+    if is_extended(raw_id):
+        can_id = raw_id & CAN_EFF_MASK
+        bits += [(can_id >> shift) & 1 for shift in range(28, 17, -1)]
+        bits += [1, 1]  # SRR, IDE
+        bits += [(can_id >> shift) & 1 for shift in range(17, -1, -1)]
+        bits += [int(remote), 0, 0]  # RTR, r1, r0
+    else:
+        can_id = raw_id & CAN_SFF_MASK
+        bits += [(can_id >> shift) & 1 for shift in range(10, -1, -1)]
+        bits += [int(remote), 0, 0]  # RTR, IDE, r0
+    bits += [(dlc >> shift) & 1 for shift in range(3, -1, -1)]
+    if not remote:
+        payload = (value & ((1 << (8 * dlc)) - 1)).to_bytes(dlc, "little")
+        bits += [(byte >> shift) & 1 for byte in payload for shift in range(7, -1, -1)]
+
+    crc = 0
+    for bit in bits:
+        feedback = bit ^ (crc >> 14)
+        crc = (crc << 1) & 0x7FFF
+        if feedback:
+            crc ^= CRC15_POLYNOMIAL
+    bits += [(crc >> shift) & 1 for shift in range(14, -1, -1)]
+
+    # A stuff bit follows every run of five equal bits and starts a new run itself
+    stuff_bits = 0
+    run_bit, run_length = None, 0
+    for bit in bits:
+        if bit == run_bit:
+            run_length += 1
+        else:
+            run_bit, run_length = bit, 1
+        if run_length == 5:
+            stuff_bits += 1
+            run_bit, run_length = 1 - bit, 1
+    return len(bits) + stuff_bits + TRAILER_BITS
+
+def worst_case_frame_bits(dlc: int, extended: bool = False) -> int:
+    """Upper bound on frame length with maximal stuffing (Davis et al., 2007)"""
+    header = 54 if extended else 34  # Stuffable bits besides the payload
+    payload = 8 * min(dlc, CAN_MAX_DLC)
+    return header + payload + TRAILER_BITS + (header + payload - 1) // 4
+
+class BusFrame:
+    """A frame's trip across the bus, timed in seconds of bus time"""
+
+    __slots__ = ("raw_id", "value", "dlc", "source", "queued_at", "started_at", "finished_at", "key")
+
+    def __init__(self, raw_id: int, value: int, dlc: int, queued_at: float, source: Optional[str] = None):
+        self.raw_id = raw_id
+        self.value = value
+        self.dlc = dlc
+        self.source = source
+        self.queued_at = queued_at
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.key = arbitration_key(raw_id)
+
+    @property
+    def latency(self) -> float:
+        """Queueing plus transmission time"""
+        return self.finished_at - self.queued_at
+
+class PeriodicSource:
+    """A node sending one message at a fixed period"""
+
+    def __init__(self, raw_id: int, period: float, value: int = 0, dlc: int = CAN_MAX_DLC,
+                 offset: float = 0.0, name: Optional[str] = None):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        self.raw_id = raw_id
+        self.period = period
+        self.value = value
+        self.dlc = dlc
+        self.offset = offset
+        self.name = name or f"0x{raw_id & CAN_EFF_MASK:X}"
+
+class LatencyStats:
+    """Latency summary for one CAN ID"""
+
+    __slots__ = ("count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+
+    def add(self, latency: float):
+        self.count += 1
+        self.total += latency
+        if latency < self.minimum:
+            self.minimum = latency
+        if latency > self.maximum:
+            self.maximum = latency
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+class CANBus:
+    """Discrete-event CAN bus: priority arbitration and bit-accurate frame timing.
+
+    Frames are queued with `queue` or released by periodic sources, and
+    `run_until(t)` returns every frame that finished by bus time t. With
+    `worst_case_stuffing` every frame takes its maximum stuffed length, as
+    assumed by `response_times`.
+    """
+
+    def __init__(self, bit_rate: int = DEFAULT_BIT_RATE, worst_case_stuffing: bool = False):
+        if bit_rate <= 0:
+            raise ValueError("bit rate must be positive")
+        self.bit_rate = bit_rate
+        self.bit_time = 1.0 / bit_rate
+        self.worst_case_stuffing = worst_case_stuffing
+        self.reset()
+
+    def reset(self):
+        self.now = 0.0  # Bus time reached by run_until
+        self.ready: List[tuple] = []  # (arbitration key, sequence, frame), waiting for the bus
+        self.releases: List[tuple] = []  # (release time, sequence, frame or source)
+        self.sequence = 0
+        self.current: Optional[BusFrame] = None  # Frame on the wire
+        self.busy_time = 0.0
+        self.frames_sent = 0
+        self.bits_sent = 0
+        self.latency: Dict[int, LatencyStats] = {}
+
+    def frame_time(self, frame: BusFrame) -> float:
+        if self.worst_case_stuffing:
+            bits = worst_case_frame_bits(frame.dlc, is_extended(frame.raw_id))
+        else:
+            bits = frame_bits(frame.raw_id, frame.dlc, frame.value)
+        self.bits_sent += bits
+        return bits * self.bit_time
+
+    def queue(self, raw_id: int, value: int, dlc: Optional[int] = None, at: Optional[float] = None,
+              source: Optional[str] = None) -> BusFrame:
+        """Queue a frame for transmission at bus time `at` (default: now)"""
+        if dlc is None:
+            dlc = payload_length(value)
+        frame = BusFrame(raw_id, value, dlc, self.now if at is None else at, source)
+        self.sequence += 1
+        heapq.heappush(self.releases, (frame.queued_at, self.sequence, frame))
+        return frame
+
+    def add_source(self, source: PeriodicSource):
+        self.sequence += 1
+        heapq.heappush(self.releases, (self.now + source.offset, self.sequence, source))
+
+    def release(self, until: float):
+        """Move frames released by time `until` into arbitration"""
+        releases = self.releases
+        while releases and releases[0][0] <= until:
+            release_time, _, item = heapq.heappop(releases)
+            self.sequence += 1
+            if isinstance(item, PeriodicSource):
+                frame = BusFrame(item.raw_id, item.value, item.dlc, release_time, item.name)
+                heapq.heappush(releases, (release_time + item.period, self.sequence, item))
+                self.sequence += 1
+            else:
+                frame = item
+            heapq.heappush(self.ready, (frame.key, self.sequence, frame))
+
+    def run_until(self, until: float) -> List[BusFrame]:
+        """Advance bus time to `until`; returns the frames that finished, in bus order"""
+        finished: List[BusFrame] = []
+        clock = self.current.finished_at if self.current is not None else self.now
+        while True:
+            frame = self.current
+            if frame is not None:
+                if frame.finished_at > until:
+                    break
+                self.complete(frame)
+                finished.append(frame)
+                self.current = None
+                clock = frame.finished_at
+
+            # Bus idle at `clock`: everything released by now joins arbitration
+            self.release(clock)
+            if not self.ready:
+                if not self.releases or self.releases[0][0] > until:
+                    break
+                clock = self.releases[0][0]
+                continue
+            frame = heapq.heappop(self.ready)[2]
+            frame.started_at = clock
+            frame.finished_at = clock + self.frame_time(frame)
+            self.current = frame
+        self.now = max(self.now, until)
+        return finished
+
+    def complete(self, frame: BusFrame):
+        self.frames_sent += 1
+        self.busy_time += frame.finished_at - frame.started_at
+        stats = self.latency.get(frame.raw_id)
+        if stats is None:
+            stats = self.latency[frame.raw_id] = LatencyStats()
+        stats.add(frame.finished_at - frame.queued_at)
+
+    def next_event_time(self) -> Optional[float]:
+        """Bus time of the next frame completion or release, None when nothing is pending"""
+        if self.current is not None:
+            return self.current.finished_at
+        if self.ready:
+            return self.now
+        return self.releases[0][0] if self.releases else None
+
+    @property
+    def pending(self) -> int:
+        """Frames queued or on the wire (periodic sources not counted)"""
+        frames = sum(1 for _, _, item in self.releases if isinstance(item, BusFrame))
+        return frames + len(self.ready) + (self.current is not None)
+
+    @property
+    def load(self) -> float:
+        """Fraction of elapsed bus time spent transmitting"""
+        return self.busy_time / self.now if self.now > 0 else 0.0
+
+def response_times(sources: Sequence[PeriodicSource], bit_rate: int = DEFAULT_BIT_RATE) -> Dict[int, float]:
+    """Worst-case response time per CAN ID, in seconds (Davis et al., 2007).
+
+    Assumes each ID belongs to one source, zero release jitter and
+    worst-case bit stuffing. IDs that can miss their next release (the
+    bus is overloaded) get math.inf.
+    """
+    bit_time = 1.0 / bit_rate
+    by_priority = sorted(sources, key=lambda source: arbitration_key(source.raw_id))
+    costs = [worst_case_frame_bits(source.dlc, is_extended(source.raw_id)) * bit_time for source in by_priority]
+    if sum(cost / source.period for cost, source in zip(costs, by_priority)) >= 1:
+        return {source.raw_id: math.inf for source in by_priority}
+
+    results: Dict[int, float] = {}
+    for index, source in enumerate(by_priority):
+        cost = costs[index]
+        blocking = max(costs[index + 1:], default=0.0)
+        higher = list(zip(by_priority[:index], costs[:index]))
+
+        # Length of the priority level-m busy period
+        busy = cost
+        while True:
+            next_busy = blocking + sum(math.ceil(busy / other.period) * other_cost
+                                       for other, other_cost in higher + [(source, cost)])
+            if math.isclose(next_busy, busy):
+                break
+            busy = next_busy
+
+        worst = 0.0
+        for instance in range(math.ceil(busy / source.period)):
+            queueing = blocking + instance * cost
+            while True:
+                next_queueing = blocking + instance * cost + sum(
+                    math.ceil((queueing + bit_time) / other.period) * other_cost for other, other_cost in higher)
+                if math.isclose(next_queueing, queueing):
+                    break
+                queueing = next_queueing
+            worst = max(worst, queueing - instance * source.period + cost)
+        results[source.raw_id] = worst
+    return results
+
+def main():
+    """Simulate a bus of periodic nodes and compare latency with the analytic bound"""
+    parser = argparse.ArgumentParser(description="Simulate CAN arbitration, latency and bus load")
+    parser.add_argument("--bitrate", type=int, default=DEFAULT_BIT_RATE, help="bits per second")
+    parser.add_argument("--nodes", type=int, default=30, help="periodic senders, IDs 0x100 upwards")
+    parser.add_argument("--period", type=float, default=0.01, help="period of each sender in seconds")
+    parser.add_argument("--seconds", type=float, default=60.0, help="bus time to simulate")
+    args = parser.parse_args()
+
+    sources = [PeriodicSource(0x100 + node, args.period, value=node, offset=node * 1e-4)
+               for node in range(args.nodes)]
+    bus = CANBus(args.bitrate, worst_case_stuffing=True)
+    for source in sources:
+        bus.add_source(source)
+    start = time.perf_counter()
+    bus.run_until(args.seconds)
+    elapsed = time.perf_counter() - start
+
+    print(f"{bus.frames_sent} frames, {args.seconds:g} s of bus time in {elapsed:.2f} s "
+          f"({args.seconds / elapsed:.0f}x real time), bus load {bus.load:.1%}")
+    bounds = response_times(sources, args.bitrate)
+    print(f"{'ID':>6} {'mean ms':>9} {'max ms':>9} {'bound ms':>9}")
+    for source in sources:
+        stats = bus.latency.get(source.raw_id)
+        if stats is None:
+            print(f"0x{source.raw_id:03X} {'starved':>9}")
+            continue
+        print(f"0x{source.raw_id:03X} {stats.mean * 1e3:9.3f} {stats.maximum * 1e3:9.3f} "
+              f"{bounds[source.raw_id] * 1e3:9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Virtual CAN bus endpoint for the CAN Bus Puzzle Game
+
+Lets external scripts and test rigs put frames on the game's bus. An asyncio
+event loop on a background thread listens on a UDP port and/or a Unix stream
+socket for packed 16-byte SocketCAN frames (see can_frame.py); any number of
+frames may share one datagram or write. The game loop drains the queue once
+per tick, so the render loop never blocks on the network.
+
+The queue is bounded: once it holds `capacity` frames the endpoint stops
+reading its sockets (overshooting by at most one socket read) until the game
+has drained it below half. Unix stream senders then block in send(), UDP
+senders see datagrams dropped by the kernel, like a SocketCAN receive queue
+overflowing.
+
+Usage: python can_endpoint.py [--udp [HOST:]PORT] [--unix PATH]
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+from can_frame import FRAME_SIZE, decode_frames
+from can_log import LogFrame
+from simulation import CANSimulation
+
+DEFAULT_UDP_HOST = "127.0.0.1"
+DEFAULT_UDP_PORT = 29536
+DEFAULT_QUEUE_CAPACITY = 4096  # Frames
+
+def parse_udp_address(text: str) -> Tuple[str, int]:
+    """Parse "PORT" or "HOST:PORT" """
+    host, _, port = text.rpartition(":")
+    return host or DEFAULT_UDP_HOST, int(port)
+
+class FrameQueue:
+    """Bounded queue of packed frames shared by the endpoint thread and the game loop.
+
+    Frames are stored as the raw byte chunks they arrived in, each tagged
+    with its arrival time, and are only decoded when the game polls.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_QUEUE_CAPACITY):
+        self.capacity = capacity
+        self.resume_level = capacity // 2
+        self.chunks: Deque[Tuple[float, bytes]] = deque()
+        self.count = 0  # Frames queued
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def put(self, chunk: bytes, timestamp: float) -> Tuple[bool, bool]:
+        """Queue a chunk of whole frames. Returns (was_empty, now_full)."""
+        with self.lock:
+            was_empty = self.count == 0
+            self.chunks.append((timestamp, chunk))
+            self.count += len(chunk) // FRAME_SIZE
+            return was_empty, self.count >= self.capacity
+
+    def take(self, max_frames: int) -> Tuple[List[Tuple[float, bytes]], bool]:
+        """Remove up to max_frames frames. Returns (chunks, below_resume_level)."""
+        taken: List[Tuple[float, bytes]] = []
+        with self.lock:
+            budget = max_frames
+            while self.chunks and budget > 0:
+                timestamp, chunk = self.chunks[0]
+                frames = len(chunk) // FRAME_SIZE
+                if frames > budget:
+                    split = budget * FRAME_SIZE
+                    self.chunks[0] = (timestamp, chunk[split:])
+                    chunk, frames = chunk[:split], budget
+                else:
+                    self.chunks.popleft()
+                taken.append((timestamp, chunk))
+                budget -= frames
+            self.count -= max_frames - budget
+            return taken, self.count <= self.resume_level
+
+class FrameReceiver:
+    """Protocol base: cuts incoming bytes into whole frames and queues them"""
+
+    def __init__(self, endpoint: "CANEndpoint"):
+        self.endpoint = endpoint
+        self.transport: Optional[asyncio.BaseTransport] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        self.transport = transport
+        self.endpoint.transports.add(transport)
+        if self.endpoint.paused:
+            transport.pause_reading()
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.endpoint.transports.discard(self.transport)
+
+class StreamReceiver(FrameReceiver, asyncio.Protocol):
+    """Unix stream connection; frames may be split across reads"""
+
+    def __init__(self, endpoint: "CANEndpoint"):
+        super().__init__(endpoint)
+        self.partial = b""
+
+    def data_received(self, data: bytes):
+        if self.partial:
+            data = self.partial + data
+        whole = len(data) - len(data) % FRAME_SIZE
+        self.partial = data[whole:]
+        if whole:
+            self.endpoint.receive(data[:whole])
+
+class DatagramReceiver(FrameReceiver, asyncio.DatagramProtocol):
+    """UDP socket; each datagram must hold whole frames"""
+
+    def datagram_received(self, data: bytes, addr):
+        if len(data) % FRAME_SIZE:
+            self.endpoint.malformed += 1
+            return
+        if data:
+            self.endpoint.receive(data)
+
+    def error_received(self, exc: Exception):
+        pass  # ICMP errors from senders that went away; keep listening
+
+class CANEndpoint:
+    """Local virtual bus endpoint feeding frames to the game.
+
+    `on_frames` is called from the endpoint thread whenever frames arrive
+    in an empty queue, so an idle game loop can be woken up.
+    """
+
+    def __init__(self, udp_address: Optional[Tuple[str, int]] = None, unix_path: Optional[str] = None,
+                 capacity: int = DEFAULT_QUEUE_CAPACITY,
+                 on_frames: Optional[Callable[[], None]] = None):
+        if udp_address is None and unix_path is None:
+            raise ValueError("endpoint needs a UDP address or a Unix socket path")
+        self.udp_address = udp_address
+        self.unix_path = unix_path
+        self.queue = FrameQueue(capacity)
+        self.on_frames = on_frames
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.transports = set()
+        self.servers = []
+        self.paused = False
+        self.frames_received = 0
+        self.malformed = 0  # UDP datagrams that were not whole frames
+
+    def start(self):
+        """Bind the sockets and start the endpoint thread; raises OSError if binding fails"""
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self.open_sockets())
+        except OSError:
+            self.loop.close()
+            raise
+        self.thread = threading.Thread(target=self.loop.run_forever, name="can-endpoint", daemon=True)
+        self.thread.start()
+
+    async def open_sockets(self):
+        if self.udp_address is not None:
+            transport, _ = await self.loop.create_datagram_endpoint(
+                lambda: DatagramReceiver(self), local_addr=self.udp_address)
+            self.udp_address = transport.get_extra_info("sockname")[:2]
+            self.servers.append(transport)
+        if self.unix_path is not None:
+            if os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)  # Stale socket from an earlier run
+            server = await self.loop.create_unix_server(lambda: StreamReceiver(self), self.unix_path)
+            self.servers.append(server)
+
+    def receive(self, chunk: bytes):
+        """Queue frames (endpoint thread); stop reading when the queue is full"""
+        self.frames_received += len(chunk) // FRAME_SIZE
+        was_empty, full = self.queue.put(chunk, time.time())
+        if full and not self.paused:
+            self.paused = True
+            for transport in self.transports:
+                transport.pause_reading()
+        if was_empty and self.on_frames is not None:
+            self.on_frames()
+
+    def resume(self):
+        if not self.paused:
+            return
+        self.paused = False
+        for transport in self.transports:
+            transport.resume_reading()
+
+    @property
+    def pending(self) -> int:
+        """Frames waiting to be polled"""
+        return len(self.queue)
+
+    def poll(self, max_frames: int = 1000) -> List[LogFrame]:
+        """Take up to max_frames (timestamp, raw_id, value) frames for this tick"""
+        chunks, drained = self.queue.take(max_frames)
+        if drained and self.paused and self.loop is not None:
+            self.loop.call_soon_threadsafe(self.resume)
+
+        frames: List[LogFrame] = []
+        for timestamp, chunk in chunks:
+            frames.extend((timestamp, raw_id, value) for raw_id, value in decode_frames(chunk).pairs())
+        return frames
+
+    def close(self):
+        """Stop the endpoint thread and release the sockets"""
+        if self.loop is None:
+            return
+        if self.thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+        for server in self.servers:
+            server.close()
+        for transport in list(self.transports):
+            transport.close()
+        self.loop.run_until_complete(asyncio.sleep(0))  # Let close callbacks run
+        self.loop.close()
+        self.loop = None
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+
+def main():
+    """Run the endpoint against a headless simulation and print progress"""
+    parser = argparse.ArgumentParser(description="Headless CAN bus endpoint for the CAN Bus Puzzle Game")
+    parser.add_argument("--udp", metavar="[HOST:]PORT", type=parse_udp_address,
+                        help=f"listen for UDP frames (e.g. {DEFAULT_UDP_PORT})")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix stream socket")
+    args = parser.parse_args()
+    if args.udp is None and args.unix is None:
+        args.udp = (DEFAULT_UDP_HOST, DEFAULT_UDP_PORT)
+
+    simulation = CANSimulation()
+    wakeup = threading.Event()
+    endpoint = CANEndpoint(args.udp, args.unix, on_frames=wakeup.set)
+    endpoint.start()
+    print(f"Listening on {' and '.join(str(a) for a in (endpoint.udp_address, args.unix) if a)}")
+    try:
+        while not simulation.all_missions_completed:
+            if not wakeup.wait(1.0):
+                continue
+            wakeup.clear()
+            while endpoint.pending:
+                simulation.apply_frames([(raw_id, value) for _, raw_id, value in endpoint.poll(65536)])
+            print(f"\r{simulation.frames_processed} frames, {simulation.frames_rejected} rejected, "
+                  f"missions {simulation.current_mission_index}/{len(simulation.missions)}", end="")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        endpoint.close()
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Acceptance filters for the CAN Bus Puzzle Game
+
+Works like a CAN controller's ID/mask filter bank (and SocketCAN's
+CAN_RAW_FILTER): a frame passes a filter when `raw_id & mask == can_id & mask`,
+or, for an inverted filter, when it does not. A frame is accepted if any
+filter in the bank passes it. Filters are written in candump syntax:
+`<id>:<mask>` matches and `<id>~<mask>` inverts, both in hex.
+"""
+
+from typing import Dict, Iterable, List, Set
+
+MAX_CACHED_IDS = 65536  # Decisions remembered per bank before the cache is reset
+
+class AcceptanceFilter:
+    """One ID/mask pair"""
+
+    def __init__(self, can_id: int, can_mask: int = 0xFFFFFFFF, inverted: bool = False):
+        self.can_id = can_id & can_mask
+        self.can_mask = can_mask
+        self.inverted = inverted
+
+    def matches(self, raw_id: int) -> bool:
+        return ((raw_id & self.can_mask) == self.can_id) != self.inverted
+
+    @classmethod
+    def parse(cls, text: str) -> "AcceptanceFilter":
+        """Parse `<id>:<mask>`, `<id>~<mask>` or a bare `<id>` (exact match), in hex"""
+        inverted = "~" in text
+        can_id, separator, can_mask = text.partition("~" if inverted else ":")
+        if separator and not can_mask:
+            raise ValueError(f"missing mask in filter {text!r}")
+        return cls(int(can_id, 16), int(can_mask, 16) if separator else 0xFFFFFFFF, inverted)
+
+    def __str__(self):
+        if self.can_mask == 0xFFFFFFFF and not self.inverted:
+            return f"{self.can_id:X}"
+        return f"{self.can_id:X}{'~' if self.inverted else ':'}{self.can_mask:X}"
+
+class FilterBank:
+    """A set of acceptance filters, evaluated as one decision per CAN ID.
+
+    Matching filters are grouped by mask, so a lookup costs one AND and set
+    probe per distinct mask rather than one test per filter. Decisions are
+    cached per raw ID, since real traffic repeats a small set of IDs; a
+    batch is then a single pass of dict lookups.
+    """
+
+    def __init__(self, filters: Iterable[AcceptanceFilter] = ()):
+        self.filters: List[AcceptanceFilter] = list(filters)
+        self.masks: Dict[int, Set[int]] = {}  # Mask -> accepted `raw_id & mask` values
+        self.inverted: List[AcceptanceFilter] = []
+        for acceptance_filter in self.filters:
+            if acceptance_filter.inverted:
+                self.inverted.append(acceptance_filter)
+            else:
+                self.masks.setdefault(acceptance_filter.can_mask, set()).add(acceptance_filter.can_id)
+        self.cache: Dict[int, bool] = {}
+
+    def __len__(self):
+        return len(self.filters)
+
+    @classmethod
+    def parse(cls, text: str) -> "FilterBank":
+        """Build a bank from whitespace- or comma-separated candump filter specs"""
+        return cls(AcceptanceFilter.parse(spec) for spec in text.replace(",", " ").split())
+
+    def evaluate(self, raw_id: int) -> bool:
+        for mask, can_ids in self.masks.items():
+            if (raw_id & mask) in can_ids:
+                return True
+        return any(acceptance_filter.matches(raw_id) for acceptance_filter in self.inverted)
+
+    def matches(self, raw_id: int) -> bool:
+        accepted = self.cache.get(raw_id)
+        if accepted is None:
+            if len(self.cache) >= MAX_CACHED_IDS:
+                self.cache.clear()  # Random IDs (fuzzing, noise) must not grow the cache forever
+            accepted = self.cache[raw_id] = self.evaluate(raw_id)
+        return accepted
+
+    def accept(self, raw_ids: Iterable[int]) -> bytearray:
+        """One accept flag per ID in a batch"""
+        return bytearray(map(self.matches, raw_ids))
+
+    def __str__(self):
+        return " ".join(str(acceptance_filter) for acceptance_filter in self.filters)
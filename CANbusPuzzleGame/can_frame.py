@@ -0,0 +1,195 @@
+"""
+Binary CAN frames and a batch codec for the CAN Bus Puzzle Game
+
+Frames use the 16-byte SocketCAN `struct can_frame` layout:
+
+    u32 can_id   (11/29-bit ID plus EFF/RTR/ERR flag bits, host byte order)
+    u8  dlc      (payload length, 0-8)
+    u8  pad[3]
+    u8  data[8]
+
+FrameBuffer exposes whole buffers of packed frames as strided memoryviews,
+so decoding hours of traffic never builds a Python object per frame.
+"""
+
+import struct
+import sys
+from array import array
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+CAN_EFF_FLAG = 0x80000000  # Extended (29-bit) frame
+CAN_RTR_FLAG = 0x40000000  # Remote transmission request
+CAN_ERR_FLAG = 0x20000000  # Error frame
+CAN_SFF_MASK = 0x000007FF
+CAN_EFF_MASK = 0x1FFFFFFF
+CAN_MAX_DLC = 8
+
+FRAME_STRUCT = struct.Struct("=IB3x8s")
+FRAME_SIZE = FRAME_STRUCT.size  # 16 bytes
+
+# Payloads are read as one little-endian u64, which matches the game's int
+# `data` convention (`send 0x401 02` puts 0x02 in byte 0). The strided u64
+# view is only valid when the host is little-endian as well.
+NATIVE_LITTLE_ENDIAN = sys.byteorder == "little"
+
+# Payload masks by DLC, so bytes past the DLC never reach the decoders
+DLC_MASKS = [(1 << (8 * dlc)) - 1 for dlc in range(CAN_MAX_DLC + 1)]
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+class CANFrame:
+    """A single classic CAN frame with an 11- or 29-bit ID and up to 8 data bytes"""
+
+    __slots__ = ("can_id", "data", "is_extended", "is_remote")
+
+    def __init__(self, can_id: int, data: bytes = b"", is_extended: Optional[bool] = None,
+                 is_remote: bool = False):
+        if is_extended is None:
+            is_extended = can_id > CAN_SFF_MASK
+        id_mask = CAN_EFF_MASK if is_extended else CAN_SFF_MASK
+        if not 0 <= can_id <= id_mask:
+            raise ValueError(f"CAN ID 0x{can_id:X} does not fit in {29 if is_extended else 11} bits")
+        if len(data) > CAN_MAX_DLC:
+            raise ValueError(f"CAN payload is {len(data)} bytes, maximum is {CAN_MAX_DLC}")
+        self.can_id = can_id
+        self.data = bytes(data)
+        self.is_extended = is_extended
+        self.is_remote = is_remote
+
+    @property
+    def dlc(self) -> int:
+        return len(self.data)
+
+    @property
+    def raw_id(self) -> int:
+        """The ID word with SocketCAN flag bits applied"""
+        raw = self.can_id
+        if self.is_extended:
+            raw |= CAN_EFF_FLAG
+        if self.is_remote:
+            raw |= CAN_RTR_FLAG
+        return raw
+
+    @property
+    def value(self) -> int:
+        """Payload as a little-endian integer, as used by CarState and the text commands"""
+        return int.from_bytes(self.data, "little")
+
+    @classmethod
+    def from_value(cls, can_id: int, value: int, dlc: Optional[int] = None) -> "CANFrame":
+        """Build a frame from the game's integer data value"""
+        if dlc is None:
+            dlc = max(1, (value.bit_length() + 7) // 8)
+        return cls(can_id, value.to_bytes(dlc, "little"))
+
+    @classmethod
+    def unpack(cls, buffer: BufferLike, offset: int = 0) -> "CANFrame":
+        """Decode one frame from a packed buffer"""
+        raw_id, dlc, payload = FRAME_STRUCT.unpack_from(buffer, offset)
+        is_extended = bool(raw_id & CAN_EFF_FLAG)
+        can_id = raw_id & (CAN_EFF_MASK if is_extended else CAN_SFF_MASK)
+        return cls(can_id, payload[:min(dlc, CAN_MAX_DLC)], is_extended, bool(raw_id & CAN_RTR_FLAG))
+
+    def pack(self) -> bytes:
+        return FRAME_STRUCT.pack(self.raw_id, self.dlc, self.data)
+
+    def __eq__(self, other):
+        if not isinstance(other, CANFrame):
+            return NotImplemented
+        return (self.can_id, self.data, self.is_extended, self.is_remote) == \
+            (other.can_id, other.data, other.is_extended, other.is_remote)
+
+    def __repr__(self):
+        width = 8 if self.is_extended else 3
+        return f"CANFrame(0x{self.can_id:0{width}X}, [{self.dlc}] {self.data.hex(' ').upper()})"
+
+class FrameBuffer:
+    """Zero-copy view over a buffer of packed SocketCAN frames.
+
+    `raw_ids` and `dlcs` are strided memoryviews into the original buffer;
+    writing to a bytearray-backed buffer through them updates the frames in
+    place. `values` is such a view too when every frame has a full 8-byte
+    DLC, and otherwise a copy with the bytes past each frame's DLC cleared.
+    """
+
+    def __init__(self, buffer: BufferLike):
+        view = memoryview(buffer).cast("B")
+        if len(view) % FRAME_SIZE:
+            raise ValueError(f"buffer length {len(view)} is not a multiple of {FRAME_SIZE}")
+        self.buffer = view
+        self.count = len(view) // FRAME_SIZE
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def raw_ids(self) -> memoryview:
+        """ID words including SocketCAN flag bits, one per frame"""
+        return self.buffer.cast("I")[0::4]
+
+    @property
+    def dlcs(self) -> memoryview:
+        return self.buffer[4::FRAME_SIZE]
+
+    @property
+    def values(self):
+        """Payloads as little-endian integers, one per frame, masked to each frame's DLC"""
+        masks = DLC_MASKS
+        if NATIVE_LITTLE_ENDIAN:
+            values = self.buffer.cast("Q")[1::2]
+            dlcs = bytes(self.dlcs)
+            if not dlcs or min(dlcs) >= CAN_MAX_DLC:
+                return values  # Nothing to mask: keep the zero-copy view
+            return array("Q", (value & masks[min(dlc, CAN_MAX_DLC)] for value, dlc in zip(values, dlcs)))
+        return array("Q", (int.from_bytes(payload, "little") & masks[min(dlc, CAN_MAX_DLC)]
+                           for _, dlc, payload in FRAME_STRUCT.iter_unpack(self.buffer)))
+
+    def pairs(self) -> Iterator[Tuple[int, int]]:
+        """(raw_id, value) pairs, ready for CANSimulation.apply_frames.
+
+        Extended and flagged frames keep their flag bits, so they never alias
+        an 11-bit ID in the signal mapping; values are masked to the DLC.
+        """
+        return zip(self.raw_ids, self.values)
+
+    def frame(self, index: int) -> CANFrame:
+        """Materialize a single frame as a CANFrame"""
+        if not -self.count <= index < self.count:
+            raise IndexError("frame index out of range")
+        return CANFrame.unpack(self.buffer, (index % self.count) * FRAME_SIZE)
+
+    def __iter__(self) -> Iterator[CANFrame]:
+        for index in range(self.count):
+            yield CANFrame.unpack(self.buffer, index * FRAME_SIZE)
+
+def encode_frames(raw_ids: Iterable[int], values: Iterable[int],
+                  dlcs: Optional[Iterable[int]] = None) -> bytearray:
+    """Pack parallel sequences of IDs, payload values and DLCs into one buffer.
+
+    The columns are written with strided slice assignment, so no per-frame
+    Python object is created. DLCs default to 8.
+    """
+    id_column = array("I", raw_ids)
+    value_column = array("Q", values)
+    count = len(id_column)
+    if len(value_column) != count:
+        raise ValueError("raw_ids and values must have the same length")
+
+    buffer = bytearray(count * FRAME_SIZE)
+    view = memoryview(buffer)
+    view.cast("I")[0::4] = memoryview(id_column)
+    if dlcs is None:
+        view[4::FRAME_SIZE] = bytes([CAN_MAX_DLC]) * count
+    else:
+        dlc_column = bytes(dlcs)
+        if len(dlc_column) != count:
+            raise ValueError("dlcs must have the same length as raw_ids")
+        view[4::FRAME_SIZE] = dlc_column
+    if not NATIVE_LITTLE_ENDIAN:
+        value_column.byteswap()
+    view.cast("Q")[1::2] = memoryview(value_column)
+    return buffer
+
+def decode_frames(buffer: BufferLike) -> FrameBuffer:
+    """Wrap a packed buffer for batch access"""
+    return FrameBuffer(buffer)
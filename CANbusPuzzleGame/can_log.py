@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+CAN log replay for the CAN Bus Puzzle Game
+
+Streams frames out of candump (`-l` log or `-ta` screen output) and Vector
+ASC text logs. Files are memory-mapped and scanned with a compiled regex, so
+multi-GB logs are never read into memory as a whole.
+
+Usage: python can_log.py <logfile> [--speed N]
+"""
+
+import argparse
+import mmap
+import re
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+from can_frame import CAN_EFF_FLAG, CAN_SFF_MASK
+from simulation import CANSimulation
+
+LogFrame = Tuple[float, int, int]  # (timestamp, raw_id, value)
+
+# (1436509052.249713) vcan0 123#DEADBEEF  (remote and CAN FD frames, and payloads
+# that are not whole bytes, are skipped)
+CANDUMP_LOG_PATTERN = re.compile(
+    rb"^[ \t]*\((\d+\.\d+)\)[ \t]+\S+[ \t]+([0-9A-Fa-f]{1,8})#((?:[0-9A-Fa-f]{2}){0,8})[ \t]*\r?$",
+    re.MULTILINE)
+# (1436509052.249713)  vcan0  123   [4]  DE AD BE EF
+CANDUMP_SCREEN_PATTERN = re.compile(
+    rb"^[ \t]*\((\d+\.\d+)\)[ \t]+\S+[ \t]+([0-9A-Fa-f]{1,8})[ \t]+\[\d\]((?:[ \t]+[0-9A-Fa-f]{2})*)",
+    re.MULTILINE)
+#    0.004000 1  201             Rx   d 1 01
+ASC_PATTERN = re.compile(
+    rb"^[ \t]*(\d+\.\d+)[ \t]+\d+[ \t]+([0-9A-Fa-f]{1,8}x?)[ \t]+(?:Rx|Tx)[ \t]+d[ \t]+\d((?:[ \t]+[0-9A-Fa-f]{2})*)",
+    re.MULTILINE)
+
+LOG_FORMATS = {
+    "candump": CANDUMP_LOG_PATTERN,
+    "candump-screen": CANDUMP_SCREEN_PATTERN,
+    "asc": ASC_PATTERN,
+}
+
+SNIFF_BYTES = 64 * 1024
+
+def detect_format(head: bytes) -> str:
+    """Guess the log format from the first bytes of the file"""
+    for name, pattern in LOG_FORMATS.items():
+        if pattern.search(head):
+            return name
+    raise ValueError("unrecognized CAN log format (expected candump or Vector ASC)")
+
+def parse_id(id_text: bytes) -> int:
+    """Convert a logged hex ID to a raw ID word, flagging 29-bit IDs as extended"""
+    if id_text.endswith(b"x"):
+        return int(id_text[:-1], 16) | CAN_EFF_FLAG
+    can_id = int(id_text, 16)
+    if len(id_text) > 3 or can_id > CAN_SFF_MASK:
+        can_id |= CAN_EFF_FLAG
+    return can_id
+
+def iter_log_frames(path: str, log_format: Optional[str] = None) -> Iterator[LogFrame]:
+    """Yield (timestamp, raw_id, value) for every data frame in a log file.
+
+    The payload is returned as a little-endian integer, the same convention
+    the text `send` command and CANFrame.value use.
+    """
+    with open(path, "rb") as log_file:
+        try:
+            mapped = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file, nothing to map
+            return
+        with mapped:
+            if log_format is None:
+                log_format = detect_format(mapped[:SNIFF_BYTES])
+            pattern = LOG_FORMATS[log_format]
+            from_hex = bytes.fromhex
+            from_bytes = int.from_bytes
+            for match in pattern.finditer(mapped):
+                timestamp, id_text, data_text = match.groups()
+                yield float(timestamp), parse_id(id_text), from_bytes(from_hex(data_text.decode()), "little")
+
+class LogReplay:
+    """Feeds logged frames out in real time, at N x speed, or as fast as possible.
+
+    A speed of None (or 0) means as fast as possible. The replay is pulled by
+    the caller: `poll()` returns the frames that are due at the current time.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0, log_format: Optional[str] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.speed = speed or None
+        self.clock = clock
+        self.frames = iter_log_frames(path, log_format)
+        self.pending: Optional[LogFrame] = None
+        self.log_start: Optional[float] = None
+        self.wall_start: Optional[float] = None
+        self.finished = False
+        self.frames_replayed = 0
+
+    def log_time_now(self, now: Optional[float] = None) -> float:
+        """Log timestamp that corresponds to the current wall clock"""
+        if now is None:
+            now = self.clock()
+        return self.log_start + (now - self.wall_start) * self.speed
+
+    def poll(self, max_frames: int = 10000, now: Optional[float] = None) -> List[LogFrame]:
+        """Return up to max_frames frames whose replay time has come"""
+        due: List[LogFrame] = []
+        if self.finished:
+            return due
+
+        if self.pending is None:
+            self.pending = next(self.frames, None)
+            if self.pending is None:
+                self.finished = True
+                return due
+        if self.log_start is None:
+            self.log_start = self.pending[0]
+            self.wall_start = self.clock() if now is None else now
+
+        limit = None if self.speed is None else self.log_time_now(now)
+        frame = self.pending
+        while len(due) < max_frames:
+            if limit is not None and frame[0] > limit:
+                break
+            due.append(frame)
+            frame = next(self.frames, None)
+            if frame is None:
+                self.finished = True
+                break
+        self.pending = frame
+        self.frames_replayed += len(due)
+        return due
+
+    def rebase(self, frames: List[LogFrame], now: float) -> List[LogFrame]:
+        """Move due frames' log timestamps onto another clock that reads `now`.
+
+        At limited speed each frame keeps its spacing (scaled by the speed)
+        before `now`; as-fast-as-possible frames are all stamped `now`.
+        """
+        if self.speed is None or not frames:
+            return [(now, raw_id, value) for _, raw_id, value in frames]
+        log_now, speed = self.log_time_now(), self.speed
+        return [(now - (log_now - timestamp) / speed, raw_id, value) for timestamp, raw_id, value in frames]
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """Wall-clock seconds until the next frame is due (0 when one is due now)"""
+        if self.finished or self.speed is None or self.pending is None or self.log_start is None:
+            return 0.0
+        return max(0.0, (self.pending[0] - self.log_time_now(now)) / self.speed)
+
+    def run(self, apply_frames: Callable[[List[Tuple[int, int]]], object], chunk_size: int = 65536):
+        """Replay the whole log, sleeping between chunks when speed is limited"""
+        while not self.finished:
+            frames = self.poll(chunk_size)
+            if frames:
+                apply_frames([(raw_id, value) for _, raw_id, value in frames])
+            else:
+                time.sleep(self.seconds_until_next())
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a CAN log into the headless simulation")
+    parser.add_argument("logfile", help="candump or Vector ASC log")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="replay speed multiplier (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--format", choices=sorted(LOG_FORMATS), help="log format (default: auto-detect)")
+    args = parser.parse_args()
+
+    simulation = CANSimulation()
+    replay = LogReplay(args.logfile, args.speed, args.format)
+    start = time.perf_counter()
+    replay.run(simulation.apply_frames)
+    elapsed = time.perf_counter() - start
+
+    car = simulation.car_state
+    print(f"Replayed {replay.frames_replayed} frames in {elapsed:.3f} s "
+          f"({simulation.frames_rejected} rejected)")
+    print(f"Headlights: {car.headlights.name}  Driver window: {car.driver_window.name}  "
+          f"Passenger window: {car.passenger_window.name}  Doors: {car.doors.name}  "
+          f"Engine RPM: {car.engine_rpm}")
+    print(f"Missions completed: {simulation.current_mission_index}/{len(simulation.missions)}")
+
+if __name__ == "__main__":
+    main()
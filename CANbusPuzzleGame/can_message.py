@@ -4,6 +4,17 @@ CAN message handling for the CAN Bus Puzzle Game
 
 import time
 from typing import Tuple, Optional
+from can_frame import CAN_EFF_FLAG, CAN_EFF_MASK
+
+_clock_cache = [None, ""]  # [whole second, formatted text]
+
+def format_clock(timestamp: float) -> str:
+    """Format a timestamp as HH:MM:SS, reusing the text while the second is unchanged"""
+    second = int(timestamp)
+    if _clock_cache[0] != second:
+        _clock_cache[0] = second
+        _clock_cache[1] = time.strftime('%H:%M:%S', time.localtime(second))
+    return _clock_cache[1]
 
 class CANBusMessage:
     """Represents a CAN bus message for display"""
@@ -12,9 +23,12 @@ class CANBusMessage:
         self.can_id = can_id
         self.data = data
         self.timestamp = timestamp
+        self.system_text: Optional[str] = None  # Set for system messages shown in the log
         
     def __str__(self):
-        return f"ID: 0x{self.can_id:03X} Data: {self.data:02X} [{time.strftime('%H:%M:%S', time.localtime(self.timestamp))}]"
+        if self.can_id & CAN_EFF_FLAG:
+            return f"ID: 0x{self.can_id & CAN_EFF_MASK:08X} Data: {self.data:02X} [{format_clock(self.timestamp)}]"
+        return f"ID: 0x{self.can_id:03X} Data: {self.data:02X} [{format_clock(self.timestamp)}]"
 
 class CANMessageParser:
     """Handles parsing of CAN bus commands"""
@@ -35,6 +49,9 @@ class CANMessageParser:
             
             data = int(parts[2], 16) if parts[2].startswith("0x") else int(parts[2])
             
+            if not 0 <= can_id <= CAN_EFF_MASK:
+                return False, None, None
+            
             return True, can_id, data
         except (ValueError, IndexError):
             return False, None, None
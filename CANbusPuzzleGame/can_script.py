@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Command scripts for the CAN Bus Puzzle Game
+
+Runs files of game commands headlessly for bulk auto-grading:
+
+    # Comments start with '#'
+    send 0x201 01
+    repeat 100
+        send 0x401 02
+        wait 10
+    end
+    expect headlights ON
+    expect engine_rpm > 1000
+    expect missions 5
+
+`wait <ms>` advances the script clock without sleeping. `expect` takes a
+field and a value (or any mission condition, see mission.py); the special
+field `missions` is the number of missions completed.
+
+The whole file is tokenized by one compiled regex in a single pass, and
+runs of `send` lines are applied as one batch.
+
+Usage: python can_script.py SCRIPT... [--missions PACK]
+"""
+
+import argparse
+import copy
+import itertools
+import re
+import sys
+import time
+from typing import Any, List, Optional, Set, Tuple
+from can_frame import CAN_EFF_MASK
+from car_state import CarState
+from mission import Condition, Mission, OPERATORS, create_default_missions, field_getter, load_missions
+from simulation import CANSimulation
+from signal_db import SignalDatabase, load_default_database
+
+# One alternative per statement; the last catches anything unrecognised
+SCRIPT_PATTERN = re.compile(r"""
+    ^[ \t]*
+    (?:
+        send [ \t]+ (?P<send_id>0x[0-9a-f]+|\d+) [ \t]+ (?P<send_data>0x[0-9a-f]+|-?\d+)
+      | wait [ \t]+ (?P<wait>\d+(?:\.\d*)?)
+      | repeat [ \t]+ (?P<repeat>\d+)
+      | (?P<end>end)
+      | expect [ \t]+ (?P<expect_field>\w+) [ \t]+ (?P<expect_test>[^\#\n]*?)
+      | (?P<invalid>[^\s\#][^\#\n]*?)
+    )?
+    [ \t]* (?:\#[^\n]*)? \r?$
+""", re.MULTILINE | re.IGNORECASE | re.VERBOSE)
+
+MISSIONS_FIELD = "missions"
+MAX_REPORTED_FAILURES = 20
+
+# Compiled statements: ("frames", line, [(can_id, data), ...]), ("wait", line, seconds),
+# ("repeat", line, (count, body)), ("expect", line, Expectation)
+Statement = Tuple[str, int, Any]
+
+class ScriptError(ValueError):
+    """A script that cannot be compiled"""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+def parse_number(text: str) -> int:
+    return int(text, 16) if text[:2].lower() == "0x" else int(text)
+
+class Expectation:
+    """An `expect` line: a condition on a car field or on mission progress"""
+
+    def __init__(self, field: str, test: str):
+        test = test.strip()
+        if not test:
+            raise ValueError("expect needs a value")
+        first = test.split(None, 1)[0]
+        if first not in OPERATORS and first != "in":
+            test = f"== {test}"  # Bare value means equality
+        self.condition = Condition.parse(f"{field} {test}")
+        self.field = field
+
+    def actual(self, simulation: CANSimulation):
+        if self.field == MISSIONS_FIELD:
+            return simulation.current_mission_index
+        return field_getter(self.field)(simulation.car_state)
+
+    def check(self, simulation: CANSimulation) -> Tuple[bool, Any]:
+        """(passed, actual value)"""
+        value = self.actual(simulation)
+        condition = self.condition
+        if condition.op == "in":
+            return condition.value <= value <= condition.upper, value
+        return OPERATORS[condition.op](value, condition.value), value
+
+    def __str__(self):
+        return str(self.condition)
+
+def expectation_fields(signal_db: SignalDatabase) -> Set[str]:
+    """Fields an `expect` line may test: CarState fields, unmodelled signals and `missions`"""
+    fields = set(CarState.FIELD_TYPES)
+    fields.add(MISSIONS_FIELD)
+    for message in signal_db.messages.values():
+        fields.update(signal.name for signal in message.signals if signal.name not in CarState.SIGNAL_FIELDS)
+    return fields
+
+def compile_script(text: str, signal_db: Optional[SignalDatabase] = None) -> List[Statement]:
+    """Tokenize and compile a script in one pass over the text
+
+    `expect` fields are checked against the signal database (the default
+    one when not given), so a misspelt field is a compile error.
+    """
+    fields = expectation_fields(signal_db if signal_db is not None else load_default_database())
+    program: List[Statement] = []
+    blocks: List[Tuple[int, int, List[Statement]]] = []  # Open repeats: (line, count, outer body)
+    body = program
+    line, position = 1, 0
+    for match in SCRIPT_PATTERN.finditer(text):
+        line += text.count("\n", position, match.start())
+        position = match.start()
+        kind = match.lastgroup
+        if kind is None:
+            continue  # Blank or comment line
+        if kind == "invalid":
+            raise ScriptError(line, f"unrecognised command {match.group('invalid')!r}")
+
+        if kind == "send_data":
+            can_id = parse_number(match.group("send_id"))
+            if can_id > CAN_EFF_MASK:
+                raise ScriptError(line, f"CAN ID 0x{can_id:X} is out of range")
+            frame = (can_id, parse_number(match.group("send_data")))
+            if body and body[-1][0] == "frames":
+                body[-1][2].append(frame)
+            else:
+                body.append(("frames", line, [frame]))
+        elif kind == "wait":
+            body.append(("wait", line, float(match.group("wait")) / 1000))
+        elif kind == "repeat":
+            blocks.append((line, int(match.group("repeat")), body))
+            body = []
+        elif kind == "end":
+            if not blocks:
+                raise ScriptError(line, "'end' without 'repeat'")
+            start_line, count, outer = blocks.pop()
+            outer.append(("repeat", start_line, (count, body)))
+            body = outer
+        elif kind == "expect_test":
+            field = match.group("expect_field")
+            if field not in fields:
+                raise ScriptError(line, f"unknown field {field!r} in expect")
+            try:
+                expectation = Expectation(field, match.group("expect_test"))
+            except ValueError as error:
+                raise ScriptError(line, str(error))
+            body.append(("expect", line, expectation))
+    if blocks:
+        raise ScriptError(blocks[-1][0], "'repeat' without 'end'")
+    return program
+
+class ScriptResult:
+    """Pass/fail report for one script run"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.error: Optional[str] = None  # Compile error; the script did not run
+        self.expects_passed = 0
+        self.failures: List[Tuple[int, float, str, Any]] = []  # (line, script time, expectation, actual)
+        self.frames_sent = 0
+        self.frames_rejected = 0
+        self.missions_completed = 0
+        self.script_time = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def passed(self) -> bool:
+        return self.error is None and not self.failures
+
+    def summary(self) -> str:
+        if self.error is not None:
+            return f"ERROR {self.name}: {self.error}"
+        status = "PASS" if self.passed else "FAIL"
+        lines = [f"{status} {self.name}: {self.expects_passed}/{self.expects_passed + len(self.failures)} "
+                 f"expects, {self.frames_sent} frames ({self.frames_rejected} rejected), "
+                 f"{self.missions_completed} missions, {self.elapsed * 1000:.1f} ms"]
+        for line, script_time, expectation, actual in self.failures[:MAX_REPORTED_FAILURES]:
+            actual = getattr(actual, "name", actual)
+            lines.append(f"  line {line} at {script_time:.3f} s: expected {expectation}, got {actual}")
+        if len(self.failures) > MAX_REPORTED_FAILURES:
+            lines.append(f"  ... {len(self.failures) - MAX_REPORTED_FAILURES} more failures")
+        return "\n".join(lines)
+
+class ScriptRunner:
+    """Runs compiled scripts against a fresh headless simulation"""
+
+    def __init__(self, missions: Optional[List[Mission]] = None):
+        # Loaded and compiled once; missions carry a `completed` flag, so every run gets copies
+        self.missions = missions if missions is not None else create_default_missions()
+        self.signal_db = load_default_database()  # Shared by every run
+
+    def run_text(self, text: str, name: str = "<script>") -> ScriptResult:
+        result = ScriptResult(name)
+        start = time.perf_counter()
+        try:
+            program = compile_script(text, self.signal_db)
+        except ScriptError as error:
+            result.error = str(error)
+            return result
+        simulation = CANSimulation([copy.copy(mission) for mission in self.missions], self.signal_db)
+        result.script_time = self.execute(program, simulation, result, 0.0)
+        result.frames_sent = simulation.frames_processed
+        result.frames_rejected = simulation.frames_rejected
+        result.missions_completed = simulation.current_mission_index
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def run_file(self, path: str) -> ScriptResult:
+        with open(path, "r", encoding="utf-8") as script_file:
+            return self.run_text(script_file.read(), path)
+
+    def execute(self, program: List[Statement], simulation: CANSimulation,
+                result: ScriptResult, clock: float) -> float:
+        """Run statements and return the script clock afterwards"""
+        for kind, line, argument in program:
+            if kind == "frames":
+                simulation.apply_frames(argument)
+            elif kind == "wait":
+                clock += argument
+            elif kind == "repeat":
+                count, body = argument
+                if len(body) == 1 and body[0][0] == "frames":
+                    frames = body[0][2]  # Only sends: one batch, without copying them `count` times
+                    simulation.apply_frames(itertools.chain.from_iterable(itertools.repeat(frames, count)))
+                else:
+                    for _ in range(count):
+                        clock = self.execute(body, simulation, result, clock)
+            else:
+                passed, actual = argument.check(simulation)
+                if passed:
+                    result.expects_passed += 1
+                else:
+                    result.failures.append((line, clock, str(argument), actual))
+        return clock
+
+def main():
+    parser = argparse.ArgumentParser(description="Run CAN Bus Puzzle Game command scripts headlessly")
+    parser.add_argument("scripts", nargs="+", metavar="SCRIPT", help="command script files")
+    parser.add_argument("--missions", metavar="PACK", help="mission pack JSON file (default: missions.json)")
+    args = parser.parse_args()
+
+    runner = ScriptRunner(load_missions(args.missions) if args.missions else None)
+    results = [runner.run_file(path) for path in args.scripts]
+    for result in results:
+        print(result.summary())
+    passed = sum(result.passed for result in results)
+    print(f"{passed}/{len(results)} scripts passed")
+    sys.exit(0 if passed == len(results) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -2,44 +2,119 @@
 Car state management for the CAN Bus Puzzle Game
 """
 
+from typing import Callable, Dict, Tuple
 from enums import SubsystemState, WindowState, DoorState
 
+# Lookup tables so data values map to enum members without calling Enum(value)
+HEADLIGHT_STATES = {state.value: state for state in SubsystemState}
+DOOR_STATES = {state.value: state for state in DoorState}
+
 class CarState:
     """Manages the state of all car subsystems"""
-    
+
+    # Modelled fields and their value types, for missions loaded from data files
+    FIELD_TYPES = {
+        "headlights": SubsystemState,
+        "driver_window": WindowState,
+        "passenger_window": WindowState,
+        "doors": DoorState,
+        "engine_rpm": int,
+    }
+
+    # Fields each DBC signal handler can change; other signals change `signals[name]`
+    SIGNAL_FIELDS = {
+        "headlights": ("headlights",),
+        "window_command": ("driver_window", "passenger_window"),
+        "doors": ("doors",),
+        "engine_rpm": ("engine_rpm",),
+    }
+
     def __init__(self):
         self.headlights = SubsystemState.OFF
         self.driver_window = WindowState.OPEN  # Start with windows open
         self.passenger_window = WindowState.OPEN  # Start passenger closed
         self.doors = DoorState.UNLOCKED
         self.engine_rpm = 0
-        
+
+        # Decoded signals that don't drive a modelled subsystem, by signal name
+        self.signals: Dict[str, float] = {}
+
+        # Subsystem name -> handler, so callers never walk an if/elif chain
+        self.subsystem_handlers = {
+            "headlights": self.set_headlights,
+            "windows": self.set_windows,
+            "doors": self.set_doors,
+            "engine": self.set_engine,
+        }
+
+        # DBC signal name -> handler taking the signal's physical value
+        self.signal_handlers = {
+            "headlights": self.set_headlights,
+            "window_command": self.set_windows,
+            "doors": self.set_doors,
+            "engine_rpm": self.set_engine_rpm,
+        }
+
+    def set_headlights(self, value: int) -> bool:
+        """Apply a headlights command (0=OFF, 1=ON)"""
+        state = HEADLIGHT_STATES.get(value)
+        if state is None:
+            return False
+        self.headlights = state
+        return True
+
+    def set_windows(self, value: int) -> bool:
+        """Apply a windows command (0/1=driver close/open, 2/3=passenger close/open)"""
+        # For windows, value determines which window: 0=driver, 1=passenger
+        # The second parameter would be open/close (this is simplified)
+        if value == 0:
+            self.driver_window = WindowState.CLOSED
+        elif value == 1:
+            self.driver_window = WindowState.OPEN
+        elif value == 2:
+            self.passenger_window = WindowState.CLOSED
+        elif value == 3:
+            self.passenger_window = WindowState.OPEN
+        else:
+            return False  # Invalid window command
+        return True
+
+    def set_doors(self, value: int) -> bool:
+        """Apply a door lock command (0=UNLOCK, 1=LOCK)"""
+        state = DOOR_STATES.get(value)
+        if state is None:
+            return False
+        self.doors = state
+        return True
+
+    def set_engine(self, value: int) -> bool:
+        """Apply an engine command (value in thousands of RPM)"""
+        try:
+            return self.set_engine_rpm(value * 1000)
+        except TypeError:
+            return False
+
+    def set_engine_rpm(self, rpm: float) -> bool:
+        """Set the engine speed in RPM, limited to 0-8000"""
+        self.engine_rpm = max(0, min(8000, rpm))
+        return True
+
+    def signal_setter(self, name: str) -> Callable[[float], bool]:
+        """Setter that stores an unmodelled signal in `signals`"""
+        signals = self.signals
+
+        def store(value: float) -> bool:
+            signals[name] = value
+            return True
+        return store
+
+    def signal_fields(self, name: str) -> Tuple[str, ...]:
+        """State fields a decoded signal can change"""
+        return self.SIGNAL_FIELDS.get(name, (name,))
+
     def update_subsystem(self, subsystem: str, value: int) -> bool:
         """Update a subsystem state. Returns True if successful."""
-        try:
-            if subsystem == "headlights":
-                self.headlights = SubsystemState(value)
-                return True
-            elif subsystem == "windows":
-                # For windows, value determines which window: 0=driver, 1=passenger
-                # The second parameter would be open/close (this is simplified)
-                if value == 0:
-                    self.driver_window = WindowState.CLOSED
-                elif value == 1:
-                    self.driver_window = WindowState.OPEN
-                elif value == 2:
-                    self.passenger_window = WindowState.CLOSED
-                elif value == 3:
-                    self.passenger_window = WindowState.OPEN
-                else:
-                    return False  # Invalid window command
-                return True
-            elif subsystem == "doors":
-                self.doors = DoorState(value)
-                return True
-            elif subsystem == "engine":
-                self.engine_rpm = max(0, min(8000, value * 1000))  # Scale and limit RPM
-                return True
-        except (ValueError, TypeError):
-            pass
-        return False
+        handler = self.subsystem_handlers.get(subsystem)
+        if handler is None:
+            return False
+        return handler(value)
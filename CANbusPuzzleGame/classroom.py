@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Classroom server for the CAN Bus Puzzle Game
+
+Hosts hundreds of independent game sessions in one asyncio process, so a
+whole class can play from terminals instead of running a pygame process
+each. Every session has its own CANSimulation (car state and mission
+progress) and MessageLog; the mission pack and signal database are loaded
+once and shared.
+
+Clients connect to a Unix stream socket (or TCP) and send the game's text
+commands, one per line. Each line gets one JSON line back holding only what
+changed: car fields, mission progress and new log lines. Any line-oriented
+tool works as a client:
+
+    socat - UNIX-CONNECT:/tmp/can-classroom.sock
+    send 0x201 01
+    {"status": "MISSION_COMPLETED", "changed": {"headlights": "ON", ...}, "log": [...]}
+
+Besides `send`, a client may `join <name>` to attach to a named session
+(reconnecting picks up where the student left off), ask for the full
+`state`, or query `server` load figures.
+
+Usage: python classroom.py [--unix PATH] [--tcp [HOST:]PORT] [--max-sessions N]
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import time
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from car_state import CarState
+from can_message import CANBusMessage, CANMessageParser
+from can_endpoint import parse_udp_address
+from constants import MESSAGE_WINDOW_SIZE
+from message_log import MessageLog
+from mission import Mission, create_default_missions, load_missions
+from signal_db import SignalDatabase, load_default_database
+from simulation import CANSimulation
+
+DEFAULT_SOCKET_PATH = "/tmp/can-classroom.sock"
+DEFAULT_MAX_SESSIONS = 1000
+MAX_PUSHED_LINES = 20  # Log lines sent per reply; older ones are only counted
+MAX_LINE_LENGTH = 1024  # Longer command lines close the connection
+
+def log_line(message: CANBusMessage) -> str:
+    if message.system_text is not None:
+        return f"SYS: {message.system_text}"
+    return str(message)
+
+class ClassroomSession:
+    """One student's game: car, missions and message log, plus what the client has been sent"""
+
+    def __init__(self, name: str, missions: List[Mission], signal_db: SignalDatabase):
+        self.name = name
+        # Missions carry their own `completed` flag, so every session gets copies of the pack
+        self.simulation = CANSimulation([copy.copy(mission) for mission in missions], signal_db)
+        self.message_log = MessageLog(MESSAGE_WINDOW_SIZE)
+        self.client: Optional["ClassroomProtocol"] = None
+        self.sent_state: Dict[str, Any] = {}
+        self.sent_lines = 0  # Log entries already pushed to the client
+        self.message_log.add_system_message(f"Session {name} started", time.time())
+
+    def state(self) -> Dict[str, Any]:
+        """Car fields and mission progress as JSON-ready values"""
+        simulation = self.simulation
+        car_state = simulation.car_state
+        state: Dict[str, Any] = {}
+        for field in CarState.FIELD_TYPES:
+            value = getattr(car_state, field)
+            state[field] = value.name if isinstance(value, Enum) else value
+        mission = simulation.current_mission
+        state["missions_completed"] = simulation.current_mission_index
+        state["mission"] = mission.description if mission is not None else None
+        return state
+
+    def new_log_lines(self) -> List[str]:
+        history = self.message_log.history
+        count = min(len(history) - self.sent_lines, MAX_PUSHED_LINES)
+        self.sent_lines = len(history)
+        return [log_line(message) for message in history.window(None, count)] if count > 0 else []
+
+    def full_state(self) -> Dict[str, Any]:
+        """Everything a newly attached client needs"""
+        self.sent_state = self.state()
+        self.sent_lines = max(0, len(self.message_log.history) - MAX_PUSHED_LINES)
+        return {"session": self.name, "missions": len(self.simulation.missions), "state": self.sent_state,
+                "log": self.new_log_lines()}
+
+    def diff(self) -> Dict[str, Any]:
+        """Fields that changed and log lines added since the last reply"""
+        state = self.state()
+        sent = self.sent_state
+        changed = {field: value for field, value in state.items() if sent.get(field) != value}
+        self.sent_state = state
+        reply: Dict[str, Any] = {}
+        if changed:
+            reply["changed"] = changed
+        lines = self.new_log_lines()
+        if lines:
+            reply["log"] = lines
+        return reply
+
+    def send(self, command: str) -> Dict[str, Any]:
+        """Apply a `send <id> <data>` command like the game does and return the diff"""
+        success, can_id, data = CANMessageParser.parse_command(command)
+        timestamp = time.time()
+        if not success:
+            self.message_log.add_system_message("Invalid command!", timestamp)
+            return {"status": "INVALID", **self.diff()}
+        self.message_log.add_can_message(can_id, data, timestamp)
+        simulation = self.simulation
+        status = simulation.apply_frame(can_id, data)
+        for completed_mission in simulation.last_completed:
+            self.message_log.add_system_message(f"Mission completed: {completed_mission.description}", timestamp)
+        if simulation.last_completed and simulation.all_missions_completed:
+            self.message_log.add_system_message("All missions completed! You won!", timestamp)
+        return {"status": status.name, **self.diff()}
+
+class ClassroomProtocol(asyncio.Protocol):
+    """One client connection: newline-separated commands in, JSON lines out"""
+
+    def __init__(self, server: "ClassroomServer"):
+        self.server = server
+        self.transport: Optional[asyncio.Transport] = None
+        self.session: Optional[ClassroomSession] = None
+        self.partial = b""
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        self.transport = transport
+        self.server.connections += 1
+
+    def data_received(self, data: bytes):
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        if len(self.partial) > MAX_LINE_LENGTH:
+            self.transport.close()
+            return
+        # Every command read together is answered with a single write
+        replies = [self.server.handle(self, line.decode("utf-8", "replace").strip()) for line in lines]
+        replies = [json.dumps(reply).encode() + b"\n" for reply in replies if reply is not None]
+        if replies:
+            self.transport.write(b"".join(replies))
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.server.connections -= 1
+        self.server.detach(self)
+
+class ClassroomServer:
+    """Session registry and command dispatch for all connections"""
+
+    def __init__(self, missions: Optional[List[Mission]] = None, signal_db: Optional[SignalDatabase] = None,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.missions = missions if missions is not None else create_default_missions()
+        self.signal_db = signal_db if signal_db is not None else load_default_database()
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, ClassroomSession] = {}
+        self.anonymous = 0  # Sessions created for clients that never sent `join`
+        self.connections = 0
+        self.commands = 0
+        self.started = time.time()
+        self.servers: List[asyncio.AbstractServer] = []
+
+    def attach(self, client: ClassroomProtocol, name: Optional[str] = None) -> Optional[ClassroomSession]:
+        """Attach a client to the named session, creating it if needed; None when the server is full"""
+        if name is None:
+            self.anonymous += 1
+            name = f"guest-{self.anonymous}"
+        session = self.sessions.get(name)
+        if session is None:
+            if len(self.sessions) >= self.max_sessions:
+                return None
+            session = self.sessions[name] = ClassroomSession(name, self.missions, self.signal_db)
+        elif session.client is not None and session.client is not client:
+            session.client.session = None  # The student reconnected; the old connection loses the session
+        self.detach(client)
+        session.client = client
+        client.session = session
+        return session
+
+    def detach(self, client: ClassroomProtocol):
+        session = client.session
+        if session is None:
+            return
+        client.session = None
+        session.client = None
+        if session.name.startswith("guest-"):
+            del self.sessions[session.name]  # Nobody can rejoin an unnamed session
+
+    def handle(self, client: ClassroomProtocol, line: str) -> Optional[Dict[str, Any]]:
+        """Run one command line and return its reply"""
+        if not line:
+            return None
+        self.commands += 1
+        verb, _, argument = line.partition(" ")
+        verb = verb.lower()
+        if verb == "server":
+            return {"server": self.load()}
+        if verb == "join":
+            name = argument.strip()
+            if not name or name.startswith("guest-"):
+                return {"error": "usage: join <name>"}
+            session = self.attach(client, name)
+            return session.full_state() if session is not None else {"error": "server full"}
+
+        session = client.session
+        first = session is None
+        if first:
+            session = self.attach(client)
+            if session is None:
+                return {"error": "server full"}
+        if verb == "state":
+            return session.full_state()
+        reply = session.send(line)
+        if first:
+            reply = {"status": reply["status"], **session.full_state()}  # A new client needs everything
+        return reply
+
+    def load(self) -> Dict[str, Any]:
+        """Counters for monitoring and the benchmark"""
+        return {"sessions": len(self.sessions), "connections": self.connections, "commands": self.commands,
+                "cpu_seconds": time.process_time(), "uptime": time.time() - self.started}
+
+    async def start(self, unix_path: Optional[str] = None, tcp_address: Optional[tuple] = None):
+        """Open the listening sockets; raises OSError if binding fails"""
+        loop = asyncio.get_running_loop()
+        if unix_path is not None:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)  # Stale socket from an earlier run
+            self.servers.append(await loop.create_unix_server(lambda: ClassroomProtocol(self), unix_path))
+        if tcp_address is not None:
+            self.servers.append(await loop.create_server(lambda: ClassroomProtocol(self), *tcp_address))
+
+    def close(self):
+        for server in self.servers:
+            server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-session CAN Bus Puzzle Game server")
+    parser.add_argument("--unix", metavar="PATH", help=f"Unix socket to listen on (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--tcp", metavar="[HOST:]PORT", type=parse_udp_address,
+                        help="also listen on TCP (host defaults to 127.0.0.1)")
+    parser.add_argument("--missions", metavar="PACK", help="mission pack JSON file (default: missions.json)")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS,
+                        help="sessions kept at once, including disconnected named ones")
+    args = parser.parse_args()
+    unix_path = args.unix if args.unix or args.tcp else DEFAULT_SOCKET_PATH
+
+    server = ClassroomServer(load_missions(args.missions) if args.missions else None,
+                             max_sessions=args.max_sessions)
+
+    async def serve():
+        await server.start(unix_path, args.tcp)
+        print(f"Classroom server on {' and '.join(str(a) for a in (unix_path, args.tcp) if a)}", flush=True)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if unix_path is not None and os.path.exists(unix_path):
+            os.unlink(unix_path)
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,14 @@ Constants for the CAN Bus Puzzle Game
 WINDOW_WIDTH = 1200
 WINDOW_HEIGHT = 800
 FPS = 60
+CURSOR_BLINK_INTERVAL = 0.5  # Seconds between input cursor blinks
+
+# CAN message log
+MESSAGE_WINDOW_SIZE = 15  # Live messages kept in the ring buffer
+VISIBLE_MESSAGE_ROWS = 12
+
+# External bus endpoint
+BUS_FRAMES_PER_TICK = 2000  # Frames applied per game loop iteration
 
 # Colors
 WHITE = (255, 255, 255)
@@ -18,11 +26,6 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 DARK_GRAY = (64, 64, 64)
 LIGHT_GRAY = (192, 192, 192)
-
-# CAN Bus ID mappings
-CAN_IDS = {
-    0x101: "windows",
-    0x201: "headlights", 
-    0x301: "doors",
-    0x401: "engine"
-}
+ORANGE = (255, 140, 0)
+PURPLE = (128, 0, 160)
+DARK_GREEN = (0, 150, 0)
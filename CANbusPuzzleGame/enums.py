@@ -2,7 +2,7 @@
 Enums for the CAN Bus Puzzle Game
 """
 
-from enum import Enum
+from enum import Enum, IntEnum
 
 class SubsystemState(Enum):
     OFF = 0
@@ -15,3 +15,10 @@ class WindowState(Enum):
 class DoorState(Enum):
     UNLOCKED = 0
     LOCKED = 1
+
+class FrameStatus(IntEnum):
+    """Outcome of applying one CAN frame to the simulation"""
+    ACCEPTED = 0
+    MISSION_COMPLETED = 1
+    UNKNOWN_ID = 2
+    REJECTED = 3
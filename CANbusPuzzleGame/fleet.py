@@ -0,0 +1,281 @@
+"""
+Fleet simulation for the CAN Bus Puzzle Game
+
+Simulates many cars at once for grading backends. FleetState keeps every
+subsystem as a NumPy array with one entry per vehicle (struct of arrays)
+instead of one CarState object per car, and FleetSimulation applies a batch
+of frames tagged with vehicle IDs through vectorized decode-and-scatter.
+
+Results match running one CANSimulation per vehicle: frames for the same
+vehicle are applied in batch order, and missions advance after every frame.
+"""
+
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from enums import FrameStatus, SubsystemState, WindowState, DoorState
+from car_state import CarState, HEADLIGHT_STATES, DOOR_STATES
+from mission import Condition, Mission, OPERATORS, create_default_missions
+from signal_db import Message, SignalDatabase, load_default_database
+
+# (vehicles, physical values) -> bool mask of values the handler accepted
+FleetHandler = Callable[[np.ndarray, np.ndarray], np.ndarray]
+# (fleet, vehicles) -> bool mask of vehicles meeting the condition
+FleetPredicate = Callable[["FleetState", np.ndarray], np.ndarray]
+
+HEADLIGHT_VALUES = np.array(sorted(HEADLIGHT_STATES))
+DOOR_VALUES = np.array(sorted(DOOR_STATES))
+
+class FleetState:
+    """Subsystem state of `size` cars, one array element per vehicle.
+
+    Enum fields hold the enum's value (uint8); engine_rpm is float64 so
+    scaled DBC signals keep their precision.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.headlights = np.full(size, SubsystemState.OFF.value, dtype=np.uint8)
+        self.driver_window = np.full(size, WindowState.OPEN.value, dtype=np.uint8)
+        self.passenger_window = np.full(size, WindowState.OPEN.value, dtype=np.uint8)
+        self.doors = np.full(size, DoorState.UNLOCKED.value, dtype=np.uint8)
+        self.engine_rpm = np.zeros(size, dtype=np.float64)
+
+        # Decoded signals that don't drive a modelled subsystem, by signal name
+        self.signals: Dict[str, np.ndarray] = {}
+
+        # DBC signal name -> vectorized handler, mirroring CarState.signal_handlers
+        self.signal_handlers: Dict[str, FleetHandler] = {
+            "headlights": self.set_headlights,
+            "window_command": self.set_windows,
+            "doors": self.set_doors,
+            "engine_rpm": self.set_engine_rpm,
+        }
+
+    def set_headlights(self, vehicles: np.ndarray, values: np.ndarray) -> np.ndarray:
+        valid = np.isin(values, HEADLIGHT_VALUES)
+        self.headlights[vehicles[valid]] = values[valid]
+        return valid
+
+    def set_windows(self, vehicles: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """0/1 = driver close/open, 2/3 = passenger close/open"""
+        driver = (values == 0) | (values == 1)
+        passenger = (values == 2) | (values == 3)
+        self.driver_window[vehicles[driver]] = values[driver]
+        self.passenger_window[vehicles[passenger]] = values[passenger] - 2
+        return driver | passenger
+
+    def set_doors(self, vehicles: np.ndarray, values: np.ndarray) -> np.ndarray:
+        valid = np.isin(values, DOOR_VALUES)
+        self.doors[vehicles[valid]] = values[valid]
+        return valid
+
+    def set_engine_rpm(self, vehicles: np.ndarray, values: np.ndarray) -> np.ndarray:
+        self.engine_rpm[vehicles] = np.clip(values, 0, 8000)
+        return np.ones(len(values), dtype=bool)
+
+    def signal_setter(self, name: str) -> FleetHandler:
+        """Handler that stores an unmodelled signal in `signals`"""
+        def store(vehicles: np.ndarray, values: np.ndarray) -> np.ndarray:
+            column = self.signals.get(name)
+            if column is None:
+                column = self.signals[name] = np.zeros(self.size, dtype=np.float64)
+            column[vehicles] = values
+            return np.ones(len(values), dtype=bool)
+        return store
+
+    def field(self, name: str) -> np.ndarray:
+        """Array for a modelled field or decoded signal"""
+        if name in CarState.FIELD_TYPES:
+            return getattr(self, name)
+        column = self.signals.get(name)
+        return column if column is not None else np.zeros(self.size, dtype=np.float64)
+
+    def car_state(self, vehicle: int) -> CarState:
+        """Materialize one vehicle as a CarState"""
+        car = CarState()
+        car.headlights = SubsystemState(int(self.headlights[vehicle]))
+        car.driver_window = WindowState(int(self.driver_window[vehicle]))
+        car.passenger_window = WindowState(int(self.passenger_window[vehicle]))
+        car.doors = DoorState(int(self.doors[vehicle]))
+        rpm = float(self.engine_rpm[vehicle])
+        car.engine_rpm = int(rpm) if rpm.is_integer() else rpm
+        car.signals = {name: float(column[vehicle]) for name, column in self.signals.items()}
+        return car
+
+def compile_message(message: Message, handlers: Dict[str, FleetHandler],
+                    fallback: Callable[[str], FleetHandler]) -> FleetHandler:
+    """Vectorized counterpart of Message.compile.
+
+    The decoder takes (vehicles, payload values as uint64) and returns which
+    frames were accepted. Payloads longer than the message are rejected
+    without touching the car; otherwise every signal is applied and a frame
+    is rejected if any handler rejects its value.
+    """
+    steps = []
+    for signal in message.signals:
+        handler = handlers.get(signal.name) or fallback(signal.name)
+        steps.append((np.uint64(signal.shift), np.uint64(signal.mask), not signal.little_endian,
+                      signal.length if signal.signed else 0, signal.factor, signal.offset,
+                      signal.factor != 1 or signal.offset != 0, handler))
+    limit = np.uint64(1 << (8 * message.dlc)) if message.dlc < 8 else None
+
+    def decode(vehicles: np.ndarray, values: np.ndarray) -> np.ndarray:
+        accepted = values < limit if limit is not None else np.ones(len(values), dtype=bool)
+        in_range = accepted.copy()
+        vehicles, values = vehicles[in_range], values[in_range]
+        swapped = values.byteswap() if any(step[2] for step in steps) else None
+        signal_ok = np.ones(len(values), dtype=bool)
+        for shift, mask, big_endian, signed_length, factor, offset, scaled, handler in steps:
+            raw = ((swapped if big_endian else values) >> shift) & mask
+            if signed_length:
+                raw = raw.astype(np.int64)
+                raw[raw >= 1 << (signed_length - 1)] -= 1 << signed_length
+            physical = raw.astype(np.float64) * factor + offset if scaled else raw
+            signal_ok &= handler(vehicles, physical)
+        accepted[in_range] = signal_ok
+        return accepted
+    return decode
+
+def compile_fleet_condition(condition: Condition) -> FleetPredicate:
+    """Vectorized counterpart of Condition.compile"""
+    field = condition.field
+    value = getattr(condition.value, "value", condition.value)  # Enum members compare by value
+    if condition.op == "in":
+        upper = getattr(condition.upper, "value", condition.upper)
+        return lambda fleet, vehicles: (lambda x: (x >= value) & (x <= upper))(fleet.field(field)[vehicles])
+    compare = OPERATORS[condition.op]
+    return lambda fleet, vehicles: compare(fleet.field(field)[vehicles], value)
+
+def compile_fleet_mission(mission: Mission) -> FleetPredicate:
+    predicates = [compile_fleet_condition(condition) for condition in mission.conditions]
+
+    def predicate(fleet: FleetState, vehicles: np.ndarray) -> np.ndarray:
+        result = np.ones(len(vehicles), dtype=bool)
+        for condition in predicates:
+            result &= condition(fleet, vehicles)
+        return result
+    return predicate
+
+class FleetMissions:
+    """Per-vehicle mission progress as a (vehicles x missions) completion matrix.
+
+    After a frame, every mission that was active for the vehicle before the
+    frame and whose conditions now hold completes, which is what
+    MissionEngine does for a single car.
+    """
+
+    def __init__(self, missions: List[Mission], size: int):
+        self.missions = missions
+        self.predicates = [compile_fleet_mission(mission) for mission in missions]
+        positions = {mission.mission_id: number for number, mission in enumerate(missions)}
+        if len(positions) != len(missions):
+            raise ValueError("mission IDs must be unique")
+        self.prerequisites = [[positions[mission_id] for mission_id in mission.after] for mission in missions]
+        self.completed = np.zeros((size, len(missions)), dtype=bool)
+
+    def reset(self):
+        self.completed[:] = False
+
+    def notify(self, fleet: FleetState, vehicles: np.ndarray) -> np.ndarray:
+        """Advance missions for vehicles that each just accepted one frame.
+
+        Returns a bool mask of the vehicles that completed a mission.
+        """
+        before = self.completed[vehicles]
+        newly = np.zeros_like(before)
+        for number, (predicate, prerequisites) in enumerate(zip(self.predicates, self.prerequisites)):
+            active = ~before[:, number]
+            for prerequisite in prerequisites:
+                active &= before[:, prerequisite]
+            rows = np.flatnonzero(active)
+            if rows.size:
+                newly[rows[predicate(fleet, vehicles[rows])], number] = True
+        self.completed[vehicles] = before | newly
+        return newly.any(axis=1)
+
+class FleetSimulation:
+    """Vectorized CANSimulation for a fleet of identical cars"""
+
+    def __init__(self, size: int, missions: Optional[List[Mission]] = None,
+                 signal_db: Optional[SignalDatabase] = None):
+        self.size = size
+        self.missions = missions if missions is not None else create_default_missions()
+        self.signal_db = signal_db if signal_db is not None else load_default_database()
+        self.reset()
+
+    def reset(self):
+        """Start every car over with no mission progress"""
+        self.state = FleetState(self.size)
+        self.mission_progress = FleetMissions(self.missions, self.size)
+        self.frame_ids = np.array(sorted(self.signal_db.messages), dtype=np.uint32)
+        self.decoders = [
+            compile_message(self.signal_db.messages[frame_id], self.state.signal_handlers,
+                            self.state.signal_setter)
+            for frame_id in self.frame_ids.tolist()]
+        self.frames_processed = 0
+        self.frames_rejected = 0
+
+    @property
+    def missions_completed(self) -> np.ndarray:
+        """Number of missions each vehicle has completed"""
+        return self.mission_progress.completed.sum(axis=1)
+
+    @property
+    def all_missions_completed(self) -> np.ndarray:
+        """Bool mask of vehicles that finished every mission"""
+        return self.mission_progress.completed.all(axis=1)
+
+    def apply_frames(self, vehicle_ids, raw_ids, values) -> np.ndarray:
+        """Apply a batch of frames addressed to individual vehicles.
+
+        Takes parallel array-likes (vehicle ID, raw CAN ID, payload value);
+        memoryviews from FrameBuffer work directly. Returns one FrameStatus
+        value per frame as a uint8 array.
+        """
+        vehicle_ids = np.asarray(vehicle_ids, dtype=np.int64)
+        raw_ids = np.asarray(raw_ids, dtype=np.uint32)
+        values = np.asarray(values, dtype=np.uint64)
+        count = len(vehicle_ids)
+        if len(raw_ids) != count or len(values) != count:
+            raise ValueError("vehicle_ids, raw_ids and values must have the same length")
+        if count and (vehicle_ids.min() < 0 or vehicle_ids.max() >= self.size):
+            raise ValueError(f"vehicle IDs must be in 0..{self.size - 1}")
+
+        statuses = np.full(count, FrameStatus.UNKNOWN_ID, dtype=np.uint8)
+        message_numbers = np.searchsorted(self.frame_ids, raw_ids)
+        known = message_numbers < len(self.frame_ids)
+        known[known] = self.frame_ids[message_numbers[known]] == raw_ids[known]
+
+        # A vehicle's k-th frame in the batch goes into round k, so each round
+        # touches a vehicle at most once and can be scattered in one go.
+        for frames in self.rounds(vehicle_ids):
+            frames = frames[known[frames]]
+            accepted_frames = []
+            for number in np.unique(message_numbers[frames]):
+                selected = frames[message_numbers[frames] == number]
+                accepted = self.decoders[number](vehicle_ids[selected], values[selected])
+                statuses[selected] = np.where(accepted, FrameStatus.ACCEPTED, FrameStatus.REJECTED)
+                accepted_frames.append(selected[accepted])
+            if accepted_frames:
+                accepted_frames = np.concatenate(accepted_frames)
+                completed = self.mission_progress.notify(self.state, vehicle_ids[accepted_frames])
+                statuses[accepted_frames[completed]] = FrameStatus.MISSION_COMPLETED
+
+        self.frames_processed += count
+        self.frames_rejected += int(np.count_nonzero(statuses >= FrameStatus.UNKNOWN_ID))
+        return statuses
+
+    @staticmethod
+    def rounds(vehicle_ids: np.ndarray) -> List[np.ndarray]:
+        """Split frame indices so each vehicle appears at most once per round, keeping batch order"""
+        count = len(vehicle_ids)
+        if count == 0:
+            return []
+        order = np.argsort(vehicle_ids, kind="stable")
+        sorted_ids = vehicle_ids[order]
+        group_starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        group_sizes = np.diff(np.r_[group_starts, count])
+        rank = np.empty(count, dtype=np.int64)
+        rank[order] = np.arange(count) - np.repeat(group_starts, group_sizes)
+        by_round = np.argsort(rank, kind="stable")
+        return np.split(by_round, np.cumsum(np.bincount(rank))[:-1])
@@ -4,23 +4,40 @@ CAN Bus Puzzle Game - Main Entry Point
 A fun educational game where players control car subsystems using CAN bus commands.
 """
 
+import argparse
+import numpy as np
 import pygame
 import sys
 import time
-from typing import List
+from typing import List, Optional, Sequence, Tuple
 
 # Import our modules
 from constants import *
-from enums import SubsystemState, WindowState, DoorState
-from car_state import CarState
-from mission import Mission
-from can_message import CANBusMessage, CANMessageParser
+from enums import FrameStatus
+from can_message import CANMessageParser
+from simulation import CANSimulation
+from mission import Mission, load_missions
+from can_log import LogReplay
+from can_endpoint import CANEndpoint, parse_udp_address
+from can_bus import BIT_RATES, DEFAULT_BIT_RATE, CANBus
+from scheduler import CyclicScheduler, load_cyclic_messages
+from traffic import NOISE_MIX, TrafficGenerator, TrafficSource
+from message_log import MessageLog
+from can_filter import FilterBank
+from physics import SubsystemPhysics
+from signal_plot import SignalPlot
 from ui_components import UIRenderer
 
+BUS_FRAMES_EVENT = pygame.USEREVENT + 1  # Posted by the endpoint thread when frames arrive
+PLAYER_SOURCE = "player"  # Bus source name for typed commands
+ACTUAL_RPM_CHANNEL = "rpm (actual)"  # Plot channel for the engine speed from the physics model
+
 class Game:
     """Main game class - simplified with modular components"""
     
-    def __init__(self):
+    def __init__(self, replay: Optional[LogReplay] = None, missions: Optional[List[Mission]] = None,
+                 endpoint: Optional[CANEndpoint] = None, bit_rate: int = DEFAULT_BIT_RATE,
+                 noise_rate: float = 0.0):
         # Initialize Pygame
         pygame.init()
         
@@ -37,81 +54,245 @@ class Game:
         }
         
         # Initialize components
-        self.car_state = CarState()
+        self.simulation = CANSimulation(missions)
         self.ui_renderer = UIRenderer(self.screen, fonts)
         self.can_parser = CANMessageParser()
+        self.bus = CANBus(bit_rate)
+        self.bus_epoch = time.time()  # Wall-clock time of bus time 0
+        self.cyclic = CyclicScheduler()  # Background ECU traffic
+        self.physics = SubsystemPhysics()  # Window, engine, light and lock dynamics at 1 kHz
+        self.physics.reset(self.simulation.car_state)
+        self.physics_clock = time.perf_counter()
+        self.plot = SignalPlot(self.simulation.signal_db)  # Decoded signals over time
+        self.plot.add_channel(ACTUAL_RPM_CHANNEL, 0, 8000)
         
         # Game state
-        self.can_messages: List[CANBusMessage] = []
-        self.current_mission_index = 0
+        self.message_log = MessageLog(MESSAGE_WINDOW_SIZE)
         self.input_text = ""
         self.input_active = True
         self.running = True
         self.show_mapping = True
+        self.show_stats = False  # Message panel shows the per-ID table instead of the log
+        self.replay = replay
+        self.endpoint = endpoint
+        self.pending_events = []  # Events picked up while idling, handled next frame
+        self.noise: Optional[TrafficSource] = None  # Noisy bus mode: rejected background frames
+        if noise_rate > 0:
+            self.noise = TrafficSource(TrafficGenerator(self.simulation.signal_db, NOISE_MIX), noise_rate)
         
         # Error animation
         self.show_error = False
         self.error_start_time = 0
         self.error_scale = 0
         
-        # Initialize missions
-        self.missions = [
-            Mission("Turn on headlights", {"headlights": SubsystemState.ON}, ""),
-            Mission("Close the driver's window", {"driver_window": WindowState.CLOSED}, ""),
-            Mission("Open the passenger window", {"passenger_window": WindowState.OPEN}, ""),
-            Mission("Lock the doors", {"doors": DoorState.LOCKED}, ""),
-            Mission("Start engine (RPM > 1000)", {"engine_rpm": 1000}, ""),
-            Mission("Turn off headlights", {"headlights": SubsystemState.OFF}, ""),
-        ]
-        
         # Add initial system message
         self.add_system_message("System initialized")
+        if self.noise is not None:
+            self.add_system_message(f"Noisy bus: {noise_rate:g} background frames/s")
+        
+        if self.endpoint is not None:
+            self.endpoint.on_frames = self.wake_for_bus_frames
+            self.endpoint.start()
     
-    def add_can_message(self, can_id: int, data: int):
+    def add_can_message(self, can_id: int, data: int, timestamp: Optional[float] = None):
         """Add a CAN message to the display"""
-        message = CANBusMessage(can_id, data, time.time())
-        self.can_messages.append(message)
-        # Keep only last 15 messages
-        if len(self.can_messages) > 15:
-            self.can_messages.pop(0)
+        self.message_log.add_can_message(can_id, data, time.time() if timestamp is None else timestamp)
     
     def add_system_message(self, text: str):
         """Add a system message (displayed as special CAN message)"""
-        message = CANBusMessage(0x000, 0, time.time())
-        message.system_text = text
-        self.can_messages.append(message)
-        if len(self.can_messages) > 15:
-            self.can_messages.pop(0)
+        self.message_log.add_system_message(text, time.time())
     
     def process_command(self, command: str):
         """Process a player command"""
+        if command.strip().lower().startswith("filter"):
+            self.process_filter_command(command)
+            return
+        if command.strip().lower().startswith("cyclic"):
+            self.process_cyclic_command(command)
+            return
+        if command.strip().lower() == "bus":
+            self.add_system_message(self.bus_summary())
+            return
+        if command.strip().lower().startswith("accept"):
+            self.process_accept_command(command)
+            return
+        if command.strip().lower() == "stats":
+            self.show_stats = not self.show_stats
+            return
+        
         success, can_id, data = self.can_parser.parse_command(command)
         
         if not success:
             self.trigger_error()
             return
         
-        # Add to CAN message log
-        self.add_can_message(can_id, data)
-        
-        # Check if it's a valid CAN ID
-        if can_id not in CAN_IDS:
+        # The frame reaches the log and the car once it has won arbitration and been sent
+        self.bus.queue(can_id, data, at=self.bus_time(), source=PLAYER_SOURCE)
+        self.update_bus()
+    
+    def bus_time(self) -> float:
+        """Current bus time in seconds"""
+        return time.time() - self.bus_epoch
+    
+    def update_bus(self):
+        """Deliver frames that have finished transmitting on the simulated bus"""
+        frames = self.bus.run_until(self.bus_time())
+        if frames:
+            self.plot.record_frames([(self.bus_epoch + frame.finished_at, frame.raw_id, frame.value)
+                                     for frame in frames])
+        for frame in frames:
+            self.add_can_message(frame.raw_id, frame.value, self.bus_epoch + frame.finished_at)
+            
+            # Update car state and mission progress
+            status = self.apply_frame(frame.raw_id, frame.value)
+            if frame.source == PLAYER_SOURCE and status not in (FrameStatus.ACCEPTED, FrameStatus.MISSION_COMPLETED):
+                self.trigger_error()
+    
+    def bus_summary(self) -> str:
+        """One-line bus statistics for the message log"""
+        bus = self.bus
+        worst = max((stats.maximum for stats in bus.latency.values()), default=0.0)
+        return (f"Bus {bus.bit_rate // 1000} kbit/s: {bus.frames_sent} frames, "
+                f"load {bus.load:.2%}, max latency {worst * 1e6:.0f} us")
+    
+    def process_filter_command(self, command: str):
+        """Handle `filter <id> [data]` and `filter off` for the message log"""
+        parts = command.strip().lower().split()
+        if len(parts) == 2 and parts[1] == "off":
+            self.message_log.set_filter(None)
+            return
+        try:
+            if len(parts) not in (2, 3):
+                raise ValueError
+            can_id = int(parts[1], 0)
+            data = int(parts[2], 0) if len(parts) == 3 else None
+        except ValueError:
             self.trigger_error()
             return
-        
-        # Update car state
-        subsystem = CAN_IDS[can_id]
-        if self.car_state.update_subsystem(subsystem, data):
-            # Check if current mission is completed
-            if self.current_mission_index < len(self.missions):
-                current_mission = self.missions[self.current_mission_index]
-                if current_mission.check_completion(self.car_state):
-                    self.add_system_message(f"Mission completed: {current_mission.description}")
-                    self.current_mission_index += 1
-                    if self.current_mission_index >= len(self.missions):
-                        self.add_system_message("All missions completed! You won!")
-        else:
+        self.message_log.set_filter(can_id, data)
+    
+    def process_accept_command(self, command: str):
+        """Handle `accept <id>:<mask> ...` (candump syntax, `~` inverts) and `accept off`"""
+        specs = command.strip()[len("accept"):].strip()
+        if specs.lower() == "off":
+            self.message_log.set_acceptance(None)
+            return
+        try:
+            bank = FilterBank.parse(specs)
+            if not len(bank):
+                raise ValueError
+        except ValueError:
             self.trigger_error()
+            return
+        self.message_log.set_acceptance(bank)
+    
+    def process_cyclic_command(self, command: str):
+        """Handle `cyclic <id> <data> <period_ms> [jitter_ms]`, `cyclic stop <id>` and `cyclic off`"""
+        parts = command.strip().lower().split()
+        try:
+            if len(parts) == 2 and parts[1] == "off":
+                self.cyclic.clear()
+                self.add_system_message("Cyclic traffic stopped")
+            elif len(parts) == 3 and parts[1] == "stop":
+                can_id = int(parts[2], 0)
+                self.add_system_message(f"Stopped {self.cyclic.remove_id(can_id)} cyclic message(s) 0x{can_id:03X}")
+            elif len(parts) in (4, 5):
+                can_id, data = int(parts[1], 0), int(parts[2], 0)
+                period = float(parts[3]) / 1000
+                jitter = float(parts[4]) / 1000 if len(parts) == 5 else 0.0
+                self.cyclic.add(can_id, data, period, jitter)
+                self.add_system_message(f"Sending 0x{can_id:03X} every {period * 1000:g} ms")
+            else:
+                raise ValueError
+        except ValueError:
+            self.trigger_error()
+    
+    def message_log_title(self) -> str:
+        """Title for the message panel, showing any filter or scroll position"""
+        log = self.message_log
+        title = f"CAN IDs ({len(log.stats)} tracked)" if self.show_stats else "CAN Bus Messages"
+        if log.acceptance is not None:
+            title += f" [accept {log.acceptance}]"
+        if log.filter_id is not None:
+            title += f" [ID 0x{log.filter_id:03X}"
+            if log.filter_data is not None:
+                title += f" = {log.filter_data:02X}"
+            title += f": {log.view_length}]"
+        if log.scroll_offset:
+            title += f" (-{log.scroll_offset})"
+        return title
+    
+    def apply_frame(self, can_id: int, data: int) -> FrameStatus:
+        """Apply a frame to the simulation and announce completed missions"""
+        status = self.simulation.apply_frame(can_id, data)
+        if status == FrameStatus.MISSION_COMPLETED:
+            self.announce_completed_missions()
+        return status
+    
+    def announce_completed_missions(self):
+        for completed_mission in self.simulation.last_completed:
+            self.add_system_message(f"Mission completed: {completed_mission.description}")
+        if self.simulation.all_missions_completed:
+            self.add_system_message("All missions completed! You won!")
+    
+    def apply_bus_frames(self, frames: Sequence[Tuple[float, int, int]]):
+        """Apply (timestamp, can_id, data) frames arriving from the bus rather than the player.
+        
+        Bus traffic is logged and drives the car, but unknown or rejected
+        frames don't trigger the wrong-command animation. Frames are logged
+        in batches, split only where a mission completes so its announcement
+        follows the frame that completed it.
+        """
+        self.plot.record_frames(frames)
+        apply_frame = self.simulation.apply_frame
+        completed = FrameStatus.MISSION_COMPLETED
+        logged = 0
+        for index, (_, can_id, data) in enumerate(frames):
+            if apply_frame(can_id, data) == completed:
+                self.message_log.add_can_messages(frames[logged:index + 1])
+                logged = index + 1
+                self.announce_completed_missions()
+        if logged < len(frames):
+            self.message_log.add_can_messages(frames[logged:] if logged else frames)
+    
+    def update_replay(self):
+        """Feed frames that are due from the log replay"""
+        if self.replay is None or self.replay.finished:
+            return
+        # The plot and message log run on the wall clock, not the log's own timestamps
+        self.apply_bus_frames(self.replay.rebase(self.replay.poll(), time.time()))
+        if self.replay.finished:
+            self.add_system_message(f"Replay finished ({self.replay.frames_replayed} frames)")
+    
+    def update_cyclic(self):
+        """Apply cyclic frames that have fallen due"""
+        if self.cyclic.messages:
+            self.apply_bus_frames(self.cyclic.poll(BUS_FRAMES_PER_TICK))
+    
+    def update_noise(self):
+        """Apply background noise frames; a backlog is caught up over the next ticks, never dropped"""
+        if self.noise is not None:
+            self.apply_bus_frames(self.noise.poll(BUS_FRAMES_PER_TICK))
+    
+    def wake_for_bus_frames(self):
+        """Called from the endpoint thread: wake a loop blocked waiting for input"""
+        pygame.event.post(pygame.event.Event(BUS_FRAMES_EVENT))
+    
+    def update_endpoint(self):
+        """Apply this tick's batch of frames from the external bus endpoint"""
+        if self.endpoint is not None:
+            self.apply_bus_frames(self.endpoint.poll(BUS_FRAMES_PER_TICK))
+    
+    def update_physics(self):
+        """Run the fixed-tick physics up to now, then aim it at the car's current commanded state"""
+        now = time.perf_counter()
+        moving = not self.physics.settled
+        self.physics.advance(now - self.physics_clock)
+        self.physics_clock = now
+        self.physics.set_targets(self.simulation.car_state)
+        if moving:
+            self.plot.record(ACTUAL_RPM_CHANNEL, np.array([time.time()]),
+                             np.array([self.physics.value("engine_rpm")]))
     
     def trigger_error(self):
         """Trigger the error animation"""
@@ -139,10 +320,15 @@ class Game:
     
     def handle_events(self):
         """Handle pygame events"""
-        for event in pygame.event.get():
+        events = self.pending_events + pygame.event.get()
+        self.pending_events = []
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.ui_renderer.invalidate()
+            
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE and self.show_mapping:
                     # Dismiss mapping display and start game
@@ -153,6 +339,15 @@ class Game:
                     # Show mapping again
                     self.show_mapping = True
                 
+                elif event.key == pygame.K_PAGEUP:
+                    self.message_log.scroll(VISIBLE_MESSAGE_ROWS, VISIBLE_MESSAGE_ROWS)
+                
+                elif event.key == pygame.K_PAGEDOWN:
+                    self.message_log.scroll(-VISIBLE_MESSAGE_ROWS, VISIBLE_MESSAGE_ROWS)
+                
+                elif event.key == pygame.K_END:
+                    self.message_log.scroll_to_end()
+                
                 elif not self.show_mapping:  # Only process input when not showing mapping
                     if event.key == pygame.K_RETURN:
                         if self.input_text.strip():
@@ -165,37 +360,100 @@ class Game:
                     elif event.unicode.isprintable():
                         self.input_text += event.unicode
     
+    def seconds_until_next_frame(self) -> Optional[float]:
+        """How long the loop may sleep before something needs a new frame.
+        
+        Returns 0 while animating and None when nothing is timed, in which
+        case the loop sleeps until the next input event.
+        """
+        if self.show_error or not self.physics.settled:
+            return 0.0
+        deadlines = []
+        if self.input_active and not self.show_mapping:
+            deadlines.append(CURSOR_BLINK_INTERVAL - time.time() % CURSOR_BLINK_INTERVAL)
+        if self.replay is not None and not self.replay.finished:
+            deadlines.append(self.replay.seconds_until_next())
+        next_bus_event = self.bus.next_event_time()
+        if next_bus_event is not None:
+            deadlines.append(max(0.0, next_bus_event - self.bus_time()))
+        if self.endpoint is not None and self.endpoint.pending:
+            deadlines.append(0.0)  # Backlog left over from the last tick
+        scroll_delay = self.plot.seconds_until_scroll(time.time())
+        if scroll_delay is not None:
+            deadlines.append(scroll_delay)
+        cyclic_delay = self.cyclic.seconds_until_next()
+        if cyclic_delay is not None:
+            deadlines.append(cyclic_delay)
+        if self.noise is not None:
+            deadlines.append(self.noise.seconds_until_next())
+        return min(deadlines) if deadlines else None
+    
+    def wait_for_next_frame(self):
+        """Hold the frame rate while animating; otherwise block on input until the next timed redraw"""
+        delay = self.seconds_until_next_frame()
+        if delay is not None and delay < 1.0 / FPS:
+            self.clock.tick(FPS)
+            return
+        
+        if delay is None:
+            event = pygame.event.wait()
+        else:
+            event = pygame.event.wait(int(delay * 1000) + 1)
+        if event.type != pygame.NOEVENT:
+            self.pending_events.append(event)
+        self.clock.tick()
+    
     def run(self):
         """Main game loop"""
         while self.running:
             self.handle_events()
+            self.update_replay()
+            self.update_endpoint()
+            self.update_cyclic()
+            self.update_noise()
+            self.update_bus()
+            self.update_physics()
             self.update_error_animation()
             
-            # Clear screen
-            self.screen.fill(WHITE)
-            
-            # Draw all game elements using UI renderer
-            self.ui_renderer.draw_mission(self.current_mission_index, self.missions)
-            self.ui_renderer.draw_car(self.car_state)
-            self.ui_renderer.draw_can_messages(self.can_messages)
-            
-            # Show subsystem mapping if enabled
-            if self.show_mapping:
-                self.ui_renderer.draw_subsystem_mapping()
-            
-            self.ui_renderer.draw_input_box(self.input_text, self.input_active, self.show_mapping)
-            self.ui_renderer.draw_error_animation(self.show_error, self.error_scale)
-            
-            # Update display
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            # Redraw only what changed and push just those regions to the display
+            dirty_rects = self.ui_renderer.render_frame(
+                self.simulation.car_state, self.simulation.current_mission, self.simulation.current_mission_index,
+                self.simulation.missions, self.message_log, self.message_log_title(), self.input_text,
+                self.input_active, self.show_mapping, self.show_error, self.error_scale, self.cyclic, self.show_stats,
+                self.physics, self.plot)
+            if dirty_rects:
+                pygame.display.update(dirty_rects)
+            self.wait_for_next_frame()
         
+        if self.endpoint is not None:
+            self.endpoint.close()
         pygame.quit()
         sys.exit()
 
 def main():
     """Main entry point"""
-    game = Game()
+    parser = argparse.ArgumentParser(description="CAN Bus Puzzle Game")
+    parser.add_argument("--replay", metavar="LOGFILE", help="replay a candump or Vector ASC log into the car")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed multiplier (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--missions", metavar="PACK", help="mission pack JSON file (default: missions.json)")
+    parser.add_argument("--udp", metavar="[HOST:]PORT", type=parse_udp_address,
+                        help="accept packed SocketCAN frames from external tools over UDP")
+    parser.add_argument("--unix", metavar="PATH", help="accept packed SocketCAN frames on a Unix stream socket")
+    parser.add_argument("--cyclic", metavar="FILE",
+                        help="JSON list of cyclic frames to send in the background")
+    parser.add_argument("--bitrate", type=int, choices=BIT_RATES, default=DEFAULT_BIT_RATE,
+                        help="simulated bus speed in bit/s")
+    parser.add_argument("--noisy", metavar="RATE", type=float, default=0.0,
+                        help="fill the bus with RATE frames/s of unknown-ID and oversized background traffic")
+    args = parser.parse_args()
+    
+    replay = LogReplay(args.replay, args.speed) if args.replay else None
+    missions = load_missions(args.missions) if args.missions else None
+    endpoint = CANEndpoint(args.udp, args.unix) if args.udp or args.unix else None
+    game = Game(replay, missions, endpoint, args.bitrate, args.noisy)
+    if args.cyclic:
+        load_cyclic_messages(game.cyclic, args.cyclic)
     game.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,412 @@
+"""
+Message log for the CAN Bus Puzzle Game
+
+A fixed-capacity ring buffer holds the live on-screen window, while the full
+scrollback is kept in parallel typed arrays with a per-CAN-ID position index,
+so millions of frames can be scrolled, filtered and searched cheaply.
+Per-ID statistics are updated as frames arrive, never recomputed, and only
+IDs that repeat are tracked, so a bus full of random IDs stays bounded.
+"""
+
+import heapq
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from can_message import CANBusMessage
+from can_filter import FilterBank
+
+KIND_CAN = 0
+KIND_SYSTEM = 1
+
+MAX_STORED_VALUE = (1 << 64) - 1
+STATS_SMOOTHING = 1 / 16  # EWMA gain for interval and jitter, as in RTP (RFC 3550)
+MAX_TRACKED_IDS = 512  # IDs with full statistics; the least busy is dropped for a newcomer
+PROBATION_IDS = 2048  # IDs seen once, remembered until they repeat or age out
+
+LoggedFrame = Tuple[float, int, int]  # (timestamp, can_id, data)
+
+class MessageRing:
+    """Fixed-capacity ring buffer of the most recent messages"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.slots: List[Optional[CANBusMessage]] = [None] * capacity
+        self.head = 0  # Next slot to write
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, message: CANBusMessage):
+        self.slots[self.head] = message
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def latest(self, count: int) -> List[CANBusMessage]:
+        """The newest `count` messages, oldest first"""
+        count = min(count, self.count)
+        start = (self.head - count) % self.capacity
+        if start + count <= self.capacity:
+            return self.slots[start:start + count]
+        return self.slots[start:] + self.slots[:start + count - self.capacity]
+
+    def __iter__(self) -> Iterator[CANBusMessage]:
+        return iter(self.latest(self.count))
+
+    def clear(self):
+        self.slots = [None] * self.capacity
+        self.head = 0
+        self.count = 0
+
+class MessageHistory:
+    """Complete message scrollback stored as parallel typed arrays.
+
+    Each entry costs about 25 bytes: ID, payload value, timestamp, a kind
+    byte and one slot in the per-ID index. System messages keep their text
+    in a side table keyed by position.
+    """
+
+    def __init__(self):
+        self.ids = array("I")
+        self.values = array("Q")
+        self.timestamps = array("d")
+        self.kinds = bytearray()
+        self.id_index: Dict[int, array] = {}
+        self.system_texts: Dict[int, str] = {}
+        self.oversized_values: Dict[int, int] = {}  # Negative or > 64-bit values typed by the player
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, can_id: int, data: int, timestamp: float) -> int:
+        """Record a CAN message and return its position"""
+        position = len(self.ids)
+        self.ids.append(can_id)
+        if 0 <= data <= MAX_STORED_VALUE:
+            self.values.append(data)
+        else:
+            self.values.append(0)
+            self.oversized_values[position] = data
+        self.timestamps.append(timestamp)
+        self.kinds.append(KIND_CAN)
+        positions = self.id_index.get(can_id)
+        if positions is None:
+            positions = self.id_index[can_id] = array("I")
+        positions.append(position)
+        return position
+
+    def append_system(self, text: str, timestamp: float) -> int:
+        """Record a system message and return its position"""
+        position = len(self.ids)
+        self.ids.append(0)
+        self.values.append(0)
+        self.timestamps.append(timestamp)
+        self.kinds.append(KIND_SYSTEM)
+        self.system_texts[position] = text
+        return position
+
+    def value_at(self, position: int) -> int:
+        if position in self.oversized_values:
+            return self.oversized_values[position]
+        return self.values[position]
+
+    def message(self, position: int) -> CANBusMessage:
+        """Materialize the message stored at `position`"""
+        message = CANBusMessage(self.ids[position], self.value_at(position), self.timestamps[position])
+        if self.kinds[position] == KIND_SYSTEM:
+            message.system_text = self.system_texts[position]
+        return message
+
+    def positions_for_id(self, can_id: int) -> array:
+        """Positions of every message with this ID, in arrival order (a live view)"""
+        return self.id_index.get(can_id, array("I"))
+
+    def search(self, can_id: Optional[int] = None, data: Optional[int] = None) -> array:
+        """Positions of CAN messages matching the ID and/or payload value"""
+        if can_id is not None:
+            candidates: Sequence[int] = self.positions_for_id(can_id)
+        else:
+            kinds = self.kinds
+            candidates = [position for position in range(len(kinds)) if kinds[position] == KIND_CAN]
+        if data is None:
+            return array("I", candidates)
+        value_at = self.value_at
+        return array("I", (position for position in candidates if value_at(position) == data))
+
+    def window(self, positions: Optional[Sequence[int]], count: int, scroll: int = 0) -> List[CANBusMessage]:
+        """`count` messages ending `scroll` entries before the newest, oldest first.
+
+        `positions` restricts the window to a filtered subset (for example the
+        result of `search`); None means the whole history.
+        """
+        total = len(self.ids) if positions is None else len(positions)
+        end = max(0, total - scroll)
+        start = max(0, end - count)
+        if positions is None:
+            return [self.message(position) for position in range(start, end)]
+        return [self.message(positions[index]) for index in range(start, end)]
+
+    def clear(self):
+        self.__init__()
+
+class IDStats:
+    """Running counters for one CAN ID"""
+
+    __slots__ = ("can_id", "count", "last_data", "last_seen", "interval", "jitter", "rank")
+
+    def __init__(self, can_id: int):
+        self.can_id = can_id
+        self.rank = 0  # Position in IDStatistics.ranking
+        self.count = 0
+        self.last_data = 0
+        self.last_seen: Optional[float] = None
+        self.interval = 0.0  # Smoothed seconds between frames
+        self.jitter = 0.0  # Smoothed deviation of the interval from its mean
+
+    def update(self, data: int, timestamp: float):
+        if self.last_seen is not None:
+            interval = timestamp - self.last_seen
+            if self.count == 1:
+                self.interval = interval
+            else:
+                self.jitter += (abs(interval - self.interval) - self.jitter) * STATS_SMOOTHING
+                self.interval += (interval - self.interval) * STATS_SMOOTHING
+        self.count += 1
+        self.last_data = data
+        self.last_seen = timestamp
+
+    @property
+    def rate(self) -> float:
+        """Recent frames per second"""
+        return 1.0 / self.interval if self.interval > 0 else 0.0
+
+class IDStatistics:
+    """Per-ID frame count, rate, last data and inter-arrival jitter.
+
+    An ID gets statistics on its second frame; until then it waits in a
+    bounded probation LRU. At most MAX_TRACKED_IDS are tracked: a newcomer
+    replaces the ID with the fewest frames. Frames of IDs that age out of
+    probation or are replaced are counted in `other_frames`.
+
+    `ranking` holds the tracked IDs sorted by count, most frames first, and
+    is kept sorted as frames arrive: an ID whose count goes up swaps places
+    with the first ID of its old count, so every frame costs O(1).
+    """
+
+    def __init__(self, max_ids: int = MAX_TRACKED_IDS, probation_ids: int = PROBATION_IDS):
+        self.max_ids = max_ids
+        self.probation_ids = probation_ids
+        self.by_id: Dict[int, IDStats] = {}
+        self.ranking: List[IDStats] = []
+        self.first_rank: Dict[int, int] = {}  # Count -> rank of the first ID with that count
+        self.probation: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()  # ID -> first (data, timestamp)
+        self.other_frames = 0
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def update(self, can_id: int, data: int, timestamp: float):
+        stats = self.by_id.get(can_id)
+        if stats is None:
+            first = self.probation.pop(can_id, None)
+            if first is None:
+                self.probation[can_id] = (data, timestamp)
+                if len(self.probation) > self.probation_ids:
+                    self.probation.popitem(last=False)
+                    self.other_frames += 1
+                return
+            stats = self.track(can_id)
+            stats.update(*first)
+            self.promote(stats)
+        stats.update(data, timestamp)
+        self.promote(stats)
+
+    def track(self, can_id: int) -> IDStats:
+        """Start statistics for an ID, replacing the least busy one when full"""
+        ranking = self.ranking
+        if len(ranking) >= self.max_ids:
+            dropped = ranking.pop()
+            if self.first_rank[dropped.count] == len(ranking):
+                del self.first_rank[dropped.count]
+            del self.by_id[dropped.can_id]
+            self.other_frames += dropped.count
+        stats = self.by_id[can_id] = IDStats(can_id)
+        stats.rank = len(ranking)
+        ranking.append(stats)
+        self.first_rank.setdefault(0, stats.rank)
+        return stats
+
+    def promote(self, stats: IDStats):
+        """Restore the ranking order after `stats.count` went up by one"""
+        ranking, first_rank = self.ranking, self.first_rank
+        old_count = stats.count - 1
+        rank, first = stats.rank, first_rank[old_count]
+        if first != rank:
+            other = ranking[first]
+            ranking[rank], other.rank = other, rank
+            ranking[first], stats.rank = stats, first
+        if first + 1 < len(ranking) and ranking[first + 1].count == old_count:
+            first_rank[old_count] = first + 1
+        else:
+            del first_rank[old_count]
+        first_rank.setdefault(stats.count, first)
+
+    def busiest(self, count: int, accept: Optional[Callable[[int], bool]] = None) -> List[IDStats]:
+        """The `count` IDs with the most frames, optionally only those passing `accept`"""
+        if accept is None:
+            return self.ranking[:count]
+        busiest: List[IDStats] = []
+        for stats in self.ranking:
+            if accept(stats.can_id):
+                busiest.append(stats)
+                if len(busiest) == count:
+                    break
+        return busiest
+
+    def clear(self):
+        self.by_id.clear()
+        self.ranking.clear()
+        self.first_rank.clear()
+        self.probation.clear()
+        self.other_frames = 0
+
+class MessageLog:
+    """The game's message log: live ring window plus indexed history with scroll and filter"""
+
+    def __init__(self, window_size: int):
+        self.ring = MessageRing(window_size)
+        self.history = MessageHistory()
+        self.scroll_offset = 0
+        self.filter_id: Optional[int] = None
+        self.filter_data: Optional[int] = None
+        self.acceptance: Optional[FilterBank] = None
+        self.filtered_positions: Optional[array] = None
+        self.view_is_index = False  # filtered_positions is a live per-ID index array
+        self.view_version = 0  # Bumped whenever the filter or acceptance bank changes
+        self.stats = IDStatistics()
+
+    def __len__(self):
+        return len(self.history)
+
+    def accepts_id(self, can_id: int) -> bool:
+        """Whether messages with this ID can appear in the current view"""
+        return ((self.filter_id is None or can_id == self.filter_id) and
+                (self.acceptance is None or self.acceptance.matches(can_id)))
+
+    def in_view(self, can_id: int, data: int) -> bool:
+        """Whether a CAN message passes the filter and the acceptance bank"""
+        return self.accepts_id(can_id) and (self.filter_data is None or data == self.filter_data)
+
+    def track(self, position: int, in_view: bool):
+        """Add a new message to the filtered view and keep a scrolled view pinned"""
+        if in_view and self.filtered_positions is not None and not self.view_is_index:
+            self.filtered_positions.append(position)
+        if in_view and self.scroll_offset:
+            self.scroll_offset += 1  # Keep a scrolled view pinned to the same messages
+
+    def add_can_message(self, can_id: int, data: int, timestamp: float) -> CANBusMessage:
+        message = CANBusMessage(can_id, data, timestamp)
+        self.ring.append(message)
+        position = self.history.append(can_id, data, timestamp)
+        self.stats.update(can_id, data, timestamp)
+        self.track(position, self.filtered_positions is None or self.in_view(can_id, data))
+        return message
+
+    def add_can_messages(self, frames: Sequence[LoggedFrame]):
+        """Log a batch of (timestamp, can_id, data) frames.
+
+        Only the newest frames that fit the live window become message
+        objects, and the acceptance bank is applied to the whole batch at once.
+        """
+        for timestamp, can_id, data in frames[-self.ring.capacity:]:
+            self.ring.append(CANBusMessage(can_id, data, timestamp))
+        append = self.history.append
+        update_stats = self.stats.update
+        if self.filtered_positions is None and not self.scroll_offset:
+            for timestamp, can_id, data in frames:
+                append(can_id, data, timestamp)
+                update_stats(can_id, data, timestamp)
+            return
+
+        if self.acceptance is not None and self.filter_id is None:
+            accepted = self.acceptance.accept(can_id for _, can_id, _ in frames)
+        else:
+            accepted = [self.filtered_positions is None or self.in_view(can_id, data)
+                        for _, can_id, data in frames]
+        track = self.track
+        for (timestamp, can_id, data), in_view in zip(frames, accepted):
+            track(append(can_id, data, timestamp), in_view)
+            update_stats(can_id, data, timestamp)
+
+    def add_system_message(self, text: str, timestamp: float) -> CANBusMessage:
+        message = CANBusMessage(0x000, 0, timestamp)
+        message.system_text = text
+        self.ring.append(message)
+        self.history.append_system(text, timestamp)
+        if self.scroll_offset and self.filtered_positions is None:
+            self.scroll_offset += 1
+        return message
+
+    def set_filter(self, can_id: Optional[int], data: Optional[int] = None):
+        """Show only messages with this ID (and payload value); None shows everything"""
+        self.filter_id = can_id
+        self.filter_data = data if can_id is not None else None
+        self.refresh_view()
+
+    def set_acceptance(self, bank: Optional[FilterBank]):
+        """Show only IDs accepted by an acceptance filter bank; None shows everything"""
+        self.acceptance = bank
+        self.refresh_view()
+
+    def refresh_view(self):
+        """Rebuild the filtered positions after the filter or acceptance bank changed"""
+        history = self.history
+        can_id, data = self.filter_id, self.filter_data
+        self.view_is_index = False
+        if can_id is None and self.acceptance is None:
+            self.filtered_positions = None
+        elif self.acceptance is None and data is None:
+            self.filtered_positions = history.positions_for_id(can_id)
+            history.id_index.setdefault(can_id, self.filtered_positions)
+            self.view_is_index = True
+        elif self.acceptance is None:
+            self.filtered_positions = history.search(can_id, data)
+        else:
+            # Merge the per-ID position lists of every accepted ID back into arrival order
+            can_ids = [can_id] if can_id is not None else list(history.id_index)
+            positions = heapq.merge(*(history.id_index[accepted] for accepted in can_ids
+                                      if accepted in history.id_index and self.acceptance.matches(accepted)))
+            if data is not None:
+                value_at = history.value_at
+                positions = (position for position in positions if value_at(position) == data)
+            self.filtered_positions = array("I", positions)
+        self.scroll_offset = 0
+        self.view_version += 1
+
+    @property
+    def view_length(self) -> int:
+        if self.filtered_positions is None:
+            return len(self.history)
+        return len(self.filtered_positions)
+
+    def scroll(self, rows: int, visible_rows: int):
+        """Scroll back (positive) or forward (negative) through the history"""
+        max_offset = max(0, self.view_length - visible_rows)
+        self.scroll_offset = max(0, min(max_offset, self.scroll_offset + rows))
+
+    def scroll_to_end(self):
+        self.scroll_offset = 0
+
+    def visible(self, rows: int) -> List[CANBusMessage]:
+        """Messages to show, oldest first"""
+        if self.scroll_offset == 0 and self.filtered_positions is None and rows <= self.ring.capacity:
+            return self.ring.latest(rows)
+        return self.history.window(self.filtered_positions, rows, self.scroll_offset)
+
+    def clear(self):
+        self.ring.clear()
+        self.history.clear()
+        self.stats.clear()
+        self.acceptance = None
+        self.set_filter(None)
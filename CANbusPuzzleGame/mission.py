@@ -1,23 +1,252 @@
 """
 Mission system for the CAN Bus Puzzle Game
+
+Missions are loaded from a JSON mission pack and their conditions compiled
+into predicates. MissionEngine indexes active missions by the CarState
+fields they read, so a frame re-checks only the missions it can affect.
 """
 
-from typing import Dict
+import json
+import operator
+import os
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional
 from car_state import CarState
 
+DEFAULT_MISSIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "missions.json")
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+# "engine_rpm > 1000", "headlights == ON", "engine_rpm in 1000..3000"
+CONDITION_PATTERN = re.compile(
+    r"^\s*(\w+)\s*(?:(==|!=|>=|<=|>|<)\s*(\S+)|in\s+(-?[\d.]+)\s*\.\.\s*(-?[\d.]+))\s*$")
+
+Predicate = Callable[[CarState], bool]
+
+ANY_VALUE = object()  # Index key for conditions that can change with any field value
+
+def field_getter(field: str) -> Callable[[CarState], Any]:
+    """Read a modelled CarState field, or a decoded signal from CarState.signals"""
+    if field in CarState.FIELD_TYPES:
+        return operator.attrgetter(field)
+    return lambda car_state: car_state.signals.get(field, 0)
+
+def parse_value(field: str, text: Any):
+    """Convert a condition value to the field's type (enum member name or number)"""
+    field_type = CarState.FIELD_TYPES.get(field)
+    if field_type is not None and field_type is not int:
+        if isinstance(text, field_type):
+            return text
+        try:
+            return field_type[str(text).upper()]
+        except KeyError:
+            raise ValueError(f"{text!r} is not a valid {field_type.__name__} for {field}")
+    if isinstance(text, (int, float)):
+        return text
+    return float(text) if "." in text else int(text, 0)
+
+class Condition:
+    """One comparison of a CarState field against a value or range"""
+
+    def __init__(self, field: str, op: str, value: Any, upper: Any = None):
+        if op != "in" and op not in OPERATORS:
+            raise ValueError(f"unknown operator {op!r}")
+        self.field = field
+        self.op = op
+        self.value = parse_value(field, value)
+        self.upper = parse_value(field, upper) if op == "in" else None
+
+    @classmethod
+    def parse(cls, text: str) -> "Condition":
+        match = CONDITION_PATTERN.match(text)
+        if match is None:
+            raise ValueError(f"malformed mission condition {text!r}")
+        field, op, value, lower, upper = match.groups()
+        if op is None:
+            return cls(field, "in", lower, upper)
+        return cls(field, op, value)
+
+    def compile(self) -> Predicate:
+        getter = field_getter(self.field)
+        if self.op == "in":
+            lower, upper = self.value, self.upper
+            return lambda car_state: lower <= getter(car_state) <= upper
+        compare, value = OPERATORS[self.op], self.value
+        return lambda car_state: compare(getter(car_state), value)
+
+    @property
+    def index_key(self):
+        """(field, value) for equality conditions, (field, ANY_VALUE) otherwise"""
+        return (self.field, self.value if self.op == "==" else ANY_VALUE)
+
+    def __str__(self):
+        if self.op == "in":
+            return f"{self.field} in {self.value}..{self.upper}"
+        value = self.value.name if hasattr(self.value, "name") else self.value
+        return f"{self.field} {self.op} {value}"
+
+def compile_conditions(conditions: List[Condition]) -> Predicate:
+    """Combine conditions into a single predicate"""
+    predicates = [condition.compile() for condition in conditions]
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda car_state: all(predicate(car_state) for predicate in predicates)
+
 class Mission:
     """Represents a game mission"""
-    
-    def __init__(self, description: str, target_state: Dict, can_command: str):
+
+    def __init__(self, description: str, target_state: Optional[Dict] = None, can_command: str = "",
+                 conditions: Optional[List[Condition]] = None, mission_id: Optional[str] = None,
+                 after: Iterable[str] = ()):
         self.description = description
-        self.target_state = target_state
+        self.target_state = target_state or {}
         self.can_command = can_command
         self.completed = False
-    
+        self.mission_id = mission_id or description
+        self.after = tuple(after)  # IDs of missions that must be completed first
+
+        # Plain target_state entries are equality conditions
+        self.conditions = list(conditions or []) + [
+            Condition(field, "==", value) for field, value in self.target_state.items()]
+        self.fields = frozenset(condition.field for condition in self.conditions)
+        self.index_keys = frozenset(condition.index_key for condition in self.conditions)
+        self.predicate = compile_conditions(self.conditions)
+
     def check_completion(self, car_state: CarState) -> bool:
         """Check if mission is completed based on car state"""
-        for attr, expected_value in self.target_state.items():
-            if getattr(car_state, attr) != expected_value:
-                return False
+        if not self.predicate(car_state):
+            return False
         self.completed = True
         return True
+
+class MissionEngine:
+    """Tracks progress through a mission pack.
+
+    A mission is active once every mission in its `after` list is complete.
+    Active missions are indexed by the fields they read, and equality
+    conditions also by the value they wait for, so `notify` re-checks only
+    missions that the changed fields could have completed. Newly
+    activated missions are checked on the next notification whatever fields
+    it carries, matching the game's one-mission-per-frame pacing.
+    """
+
+    def __init__(self, missions: List[Mission]):
+        self.missions = missions
+        self.getters = {field: field_getter(field) for mission in missions for field in mission.fields}
+        by_id = {mission.mission_id: mission for mission in missions}
+        if len(by_id) != len(missions):
+            raise ValueError("mission IDs must be unique")
+        self.dependents: Dict[str, List[Mission]] = {mission_id: [] for mission_id in by_id}
+        for mission in missions:
+            for prerequisite in mission.after:
+                if prerequisite not in by_id:
+                    raise ValueError(f"mission {mission.mission_id!r} waits for unknown mission {prerequisite!r}")
+                self.dependents[prerequisite].append(mission)
+        self.reset()
+
+    def reset(self):
+        self.completed: List[Mission] = []
+        self.active: Dict[Mission, None] = {}  # Insertion-ordered set
+        self.index: Dict[tuple, Dict[Mission, None]] = {}  # (field, value) -> insertion-ordered set
+        self.pending_check: List[Mission] = []
+        self.last_values: Dict[str, Any] = {}  # Field values seen by the previous notify
+        self.waiting_on = {mission.mission_id: len(mission.after) for mission in self.missions}
+        for mission in self.missions:
+            mission.completed = False
+            if not mission.after:
+                self.activate(mission)
+
+    def activate(self, mission: Mission):
+        self.active[mission] = None
+        self.pending_check.append(mission)
+        for key in mission.index_keys:
+            self.index.setdefault(key, {})[mission] = None
+
+    def complete(self, mission: Mission):
+        del self.active[mission]
+        self.completed.append(mission)
+        for key in mission.index_keys:
+            self.index[key].pop(mission, None)
+        for dependent in self.dependents[mission.mission_id]:
+            self.waiting_on[dependent.mission_id] -= 1
+            if self.waiting_on[dependent.mission_id] == 0:
+                self.activate(dependent)
+
+    @property
+    def finished(self) -> bool:
+        return len(self.completed) == len(self.missions)
+
+    @property
+    def current(self) -> Optional[Mission]:
+        """The earliest activated mission still open"""
+        return next(iter(self.active), None)
+
+    def notify(self, car_state: CarState, fields: Iterable[str]) -> List[Mission]:
+        """Re-check missions that depend on the changed fields; returns those completed.
+
+        Fields whose value is the same as at the previous notification are
+        skipped, so repeated frames cost one comparison per field.
+        """
+        candidates = self.pending_check
+        self.pending_check = []
+        index = self.index
+        getters = self.getters
+        last_values = self.last_values
+        for field in fields:
+            getter = getters.get(field)
+            if getter is None:
+                continue
+            value = getter(car_state)
+            if field in last_values and last_values[field] == value:
+                continue  # Unchanged, so no mission reading it can have flipped
+            last_values[field] = value
+            for key in ((field, ANY_VALUE), (field, value)):
+                missions = index.get(key)
+                if missions:
+                    candidates = candidates + list(missions) if candidates else list(missions)
+        if not candidates:
+            return candidates
+
+        completed = []
+        for mission in candidates:
+            if not mission.completed and mission.check_completion(car_state):
+                completed.append(mission)
+        for mission in completed:
+            self.complete(mission)
+        return completed
+
+def load_missions(path: str) -> List[Mission]:
+    """Load a JSON mission pack.
+
+    The file holds {"sequential": bool, "missions": [...]}; each mission has
+    a description, a list of condition strings such as "engine_rpm > 1000"
+    and optionally an id, a hint and an `after` list. In a sequential pack
+    every mission without `after` waits for the one before it.
+    """
+    with open(path, "r", encoding="utf-8") as pack_file:
+        pack = json.load(pack_file)
+
+    missions: List[Mission] = []
+    for number, entry in enumerate(pack["missions"]):
+        after = entry.get("after")
+        if after is None:
+            after = [missions[-1].mission_id] if pack.get("sequential") and missions else []
+        missions.append(Mission(
+            entry["description"],
+            can_command=entry.get("hint", ""),
+            conditions=[Condition.parse(text) for text in entry["conditions"]],
+            mission_id=entry.get("id", f"mission-{number + 1}"),
+            after=after,
+        ))
+    return missions
+
+def create_default_missions() -> List[Mission]:
+    """Build the standard mission sequence played by the game"""
+    return load_missions(DEFAULT_MISSIONS_PATH)
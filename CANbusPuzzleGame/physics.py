@@ -0,0 +1,118 @@
+"""
+Subsystem physics for the CAN Bus Puzzle Game
+
+CarState holds what each ECU has been commanded; SubsystemPhysics models how
+the hardware gets there. Window motors travel at a fixed speed, the engine
+ramps toward its target RPM with inertia, headlights warm up and the door
+lock actuators take a moment to throw.
+
+Every subsystem of every car is one element of the same NumPy arrays, so a
+single vectorized step advances them all. Steps run at a fixed 1 kHz tick,
+decoupled from the 60 FPS render (accumulator loop as in "Fix Your
+Timestep!"), and the renderer draws the state interpolated between the last
+two ticks.
+"""
+
+import math
+from typing import Dict, Tuple
+import numpy as np
+from car_state import CarState
+from enums import DoorState, SubsystemState, WindowState
+
+PHYSICS_TICK = 0.001  # Seconds per simulation step
+MAX_TICKS_PER_UPDATE = 250  # After a stall, drop simulated time beyond this instead of spiralling
+SETTLED_TOLERANCE = 1e-3  # Relative error below which a subsystem snaps to its target
+
+# (name, slew limit in units per second or 0, first-order time constant in seconds or 0)
+SUBSYSTEMS: Tuple[Tuple[str, float, float], ...] = (
+    ("driver_window", 1 / 3.0, 0.0),  # 0 = closed, 1 = open; 3 s for full travel
+    ("passenger_window", 1 / 3.0, 0.0),
+    ("engine_rpm", 4000.0, 0.4),  # Inertia lag, with torque limiting the ramp to 4000 rpm/s
+    ("headlights", 0.0, 0.08),  # 0 = dark, 1 = full brightness; filament warm-up
+    ("doors", 1 / 0.25, 0.0),  # 0 = unlocked, 1 = locked; lock actuator travel
+)
+SUBSYSTEM_INDEX: Dict[str, int] = {name: index for index, (name, _, _) in enumerate(SUBSYSTEMS)}
+# Size of each subsystem's range, so one tolerance works for windows and RPM alike
+SUBSYSTEM_SCALE = np.array([1.0, 1.0, 8000.0, 1.0, 1.0])
+
+def commanded_targets(car_state: CarState) -> Tuple[float, ...]:
+    """Positions the hardware is driving toward, in SUBSYSTEMS order"""
+    return (
+        1.0 if car_state.driver_window == WindowState.OPEN else 0.0,
+        1.0 if car_state.passenger_window == WindowState.OPEN else 0.0,
+        float(car_state.engine_rpm),
+        1.0 if car_state.headlights == SubsystemState.ON else 0.0,
+        1.0 if car_state.doors == DoorState.LOCKED else 0.0,
+    )
+
+class SubsystemPhysics:
+    """Fixed-tick integrator for the subsystems of `cars` cars.
+
+    State arrays have one row per car and one column per subsystem. A step
+    moves each position toward its target by a first-order lag (where the
+    subsystem has a time constant), then clamps the move to its slew limit.
+    """
+
+    def __init__(self, cars: int = 1, tick: float = PHYSICS_TICK):
+        self.tick = tick
+        shape = (cars, len(SUBSYSTEMS))
+        self.position = np.zeros(shape)
+        self.previous = np.zeros(shape)  # Position one tick earlier, for interpolation
+        self.target = np.zeros(shape)
+        self.accumulator = 0.0  # Real time not yet simulated, always less than one tick
+        self.ticks = 0
+
+        slew = np.array([rate for _, rate, _ in SUBSYSTEMS])
+        self.max_step = np.where(slew > 0, slew * tick, np.inf)
+        self.gain = np.array([1.0 - math.exp(-tick / tau) if tau > 0 else 1.0 for _, _, tau in SUBSYSTEMS])
+        self.tolerance = SUBSYSTEM_SCALE * SETTLED_TOLERANCE
+        self.settled = True
+
+    def reset(self, car_state: CarState, car: int = 0):
+        """Put a car's hardware exactly where its state says, with nothing in motion"""
+        self.target[car] = commanded_targets(car_state)
+        self.position[car] = self.target[car]
+        self.previous[car] = self.target[car]
+
+    def set_targets(self, car_state: CarState, car: int = 0):
+        targets = commanded_targets(car_state)
+        if self.settled and tuple(self.target[car]) == targets:
+            return
+        self.target[car] = targets
+        self.settled = False
+
+    def step(self):
+        """Advance every subsystem of every car by one tick"""
+        np.copyto(self.previous, self.position)
+        step = (self.target - self.position) * self.gain
+        np.clip(step, -self.max_step, self.max_step, out=step)
+        self.position += step
+        self.ticks += 1
+
+    def advance(self, elapsed: float):
+        """Run as many whole ticks as fit in `elapsed` real seconds plus the carried remainder"""
+        if self.settled:
+            self.accumulator = 0.0
+            return
+        self.accumulator += elapsed
+        ticks = int(self.accumulator / self.tick)
+        if ticks > MAX_TICKS_PER_UPDATE:
+            ticks = MAX_TICKS_PER_UPDATE
+            self.accumulator = ticks * self.tick
+        for _ in range(ticks):
+            self.step()
+        self.accumulator -= ticks * self.tick
+
+        # Snap subsystems that have all but arrived, so lags don't creep forever
+        arrived = np.abs(self.target - self.position) < self.tolerance
+        self.position[arrived] = self.target[arrived]
+        if arrived.all():
+            np.copyto(self.previous, self.position)
+            self.settled = True
+
+    def value(self, name: str, car: int = 0) -> float:
+        """A subsystem's position interpolated between the last two ticks"""
+        index = SUBSYSTEM_INDEX[name]
+        previous = self.previous[car, index]
+        alpha = self.accumulator / self.tick
+        return float(previous + (self.position[car, index] - previous) * alpha)
@@ -0,0 +1,242 @@
+"""
+Cyclic message scheduler for the CAN Bus Puzzle Game
+
+Real ECUs send most frames on fixed cycles (engine RPM every 10 ms, lights
+every 100 ms). CyclicScheduler keeps thousands of such messages on a
+hierarchical timer wheel: scheduling and cancelling a timer is O(1), and
+advancing one tick costs O(1) plus the timers that expire, however many
+messages are registered.
+"""
+
+import json
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_TICK = 0.001  # Seconds per wheel tick
+WHEEL_BITS = (8, 6, 6, 6)  # Slots per level as powers of two: 256 ms, 16 s, 17 min, 18 h at 1 ms
+
+CyclicFrame = Tuple[float, int, int]  # (timestamp, raw_id, value), as from LogReplay.poll
+
+class Timer:
+    """A wheel entry; `slot` is the dict it currently sits in, for O(1) cancel"""
+
+    __slots__ = ("deadline", "payload", "slot")
+
+    def __init__(self, deadline: int, payload):
+        self.deadline = deadline
+        self.payload = payload
+        self.slot: Optional[Dict["Timer", None]] = None
+
+class TimerWheel:
+    """Hierarchical timing wheel (Varghese and Lauck) counting in integer ticks.
+
+    Level 0 has one slot per tick; each higher level has one slot per full
+    turn of the level below. A timer is filed at the lowest level whose span
+    covers its distance, and is cascaded down when the levels below wrap.
+    """
+
+    def __init__(self, wheel_bits: Tuple[int, ...] = WHEEL_BITS):
+        self.shifts: List[int] = []
+        self.masks: List[int] = []
+        shift = 0
+        for bits in wheel_bits:
+            self.shifts.append(shift)
+            self.masks.append((1 << bits) - 1)
+            shift += bits
+        self.span = 1 << shift  # Ticks covered by the whole wheel
+        self.levels = [[{} for _ in range(mask + 1)] for mask in self.masks]
+        self.now = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def file(self, timer: Timer):
+        """Put a timer in the slot matching its distance from now"""
+        deadline = timer.deadline
+        distance = min(deadline - self.now, self.span - 1)
+        level = 0
+        while distance >> self.shifts[level] > self.masks[level] and level < len(self.levels) - 1:
+            level += 1
+        if level and deadline >> self.shifts[level] == self.now >> self.shifts[level]:
+            level -= 1  # Same turn of this level: keep it one level lower
+        slot = self.levels[level][(deadline >> self.shifts[level]) & self.masks[level]]
+        slot[timer] = None
+        timer.slot = slot
+
+    def schedule(self, deadline: int, payload) -> Timer:
+        """Add a timer firing at tick `deadline` (the next tick if that has passed)"""
+        timer = Timer(max(deadline, self.now + 1), payload)
+        self.file(timer)
+        self.count += 1
+        return timer
+
+    def cancel(self, timer: Timer):
+        if timer.slot is not None:
+            del timer.slot[timer]
+            timer.slot = None
+            self.count -= 1
+
+    def tick(self) -> List[Timer]:
+        """Advance one tick; returns the timers that expired"""
+        self.now += 1
+        now = self.now
+        for level in range(1, len(self.levels)):
+            if now & ((1 << self.shifts[level]) - 1):
+                break
+            slot = self.levels[level][(now >> self.shifts[level]) & self.masks[level]]
+            if slot:
+                cascading = list(slot)
+                slot.clear()
+                for timer in cascading:
+                    self.file(timer)  # Lands lower, or back at the top if still beyond the wheel
+
+        slot = self.levels[0][now & self.masks[0]]
+        if not slot:
+            return []
+        expired = list(slot)
+        slot.clear()
+        for timer in expired:
+            timer.slot = None
+        self.count -= len(expired)
+        return expired
+
+    def skip_to(self, target: int):
+        """Jump an empty wheel forward without visiting each tick"""
+        if self.count:
+            raise RuntimeError("only an empty wheel can skip ticks")
+        self.now = max(self.now, target)
+
+class CyclicMessage:
+    """A frame sent every `period` seconds, each send shifted by up to +/- `jitter`"""
+
+    __slots__ = ("raw_id", "value", "period", "jitter", "period_ticks", "jitter_ticks",
+                 "nominal_tick", "timer", "frames_sent")
+
+    def __init__(self, raw_id: int, value: int, period: float, jitter: float = 0.0):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        if jitter < 0 or jitter >= period:
+            raise ValueError("jitter must be at least 0 and smaller than the period")
+        self.raw_id = raw_id
+        self.value = value
+        self.period = period
+        self.jitter = jitter
+        self.period_ticks = 0
+        self.jitter_ticks = 0
+        self.nominal_tick = 0  # Unjittered due tick of the next send, so cycles never drift
+        self.timer: Optional[Timer] = None
+        self.frames_sent = 0
+
+class CyclicScheduler:
+    """Emits cyclic frames as they fall due on a timer wheel.
+
+    `poll()` returns (timestamp, raw_id, value) frames, like LogReplay.poll,
+    so the game applies them through the same bus-traffic path.
+    """
+
+    def __init__(self, tick: float = DEFAULT_TICK, seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.time):
+        self.tick = tick
+        self.clock = clock
+        self.epoch = clock()
+        self.random = random.Random(seed)
+        self.wheel = TimerWheel()
+        self.messages: List[CyclicMessage] = []
+        self.version = 0  # Bumped when messages are added or removed
+        self.frames_sent = 0
+
+    def __len__(self):
+        return len(self.messages)
+
+    def ticks_at(self, now: Optional[float] = None) -> int:
+        return int(((self.clock() if now is None else now) - self.epoch) / self.tick)
+
+    def add(self, raw_id: int, value: int, period: float, jitter: float = 0.0,
+            phase: Optional[float] = None) -> CyclicMessage:
+        """Register a cyclic frame; the first send is `phase` seconds from now (default: random)"""
+        message = CyclicMessage(raw_id, value, period, jitter)
+        if not self.wheel.count:
+            self.wheel.skip_to(self.ticks_at())  # An idle wheel is not polled, so catch it up first
+        message.period_ticks = max(1, round(period / self.tick))
+        message.jitter_ticks = round(jitter / self.tick)
+        if phase is None:
+            phase_ticks = self.random.randrange(message.period_ticks)
+        else:
+            phase_ticks = round(phase / self.tick)
+        message.nominal_tick = self.wheel.now + phase_ticks
+        self.schedule(message)
+        self.messages.append(message)
+        self.version += 1
+        return message
+
+    def schedule(self, message: CyclicMessage):
+        deadline = message.nominal_tick
+        if message.jitter_ticks:
+            deadline += self.random.randint(-message.jitter_ticks, message.jitter_ticks)
+        message.timer = self.wheel.schedule(deadline, message)
+
+    def remove(self, message: CyclicMessage):
+        if message.timer is not None:
+            self.wheel.cancel(message.timer)
+            message.timer = None
+        self.messages.remove(message)
+        self.version += 1
+
+    def remove_id(self, raw_id: int) -> int:
+        """Stop every cyclic message with this ID; returns how many were removed"""
+        matching = [message for message in self.messages if message.raw_id == raw_id]
+        for message in matching:
+            self.remove(message)
+        return len(matching)
+
+    def clear(self):
+        for message in list(self.messages):
+            self.remove(message)
+
+    def poll(self, max_frames: int = 10000, now: Optional[float] = None) -> List[CyclicFrame]:
+        """Frames that have fallen due since the last poll, oldest first.
+
+        Stops after the tick in which max_frames is reached; the rest follow
+        on later polls, so a stalled caller catches up without a huge burst.
+        """
+        frames: List[CyclicFrame] = []
+        wheel = self.wheel
+        target = self.ticks_at(now)
+        if not wheel.count:
+            wheel.skip_to(target)
+        while wheel.now < target and len(frames) < max_frames:
+            for timer in wheel.tick():
+                message = timer.payload
+                frames.append((self.epoch + timer.deadline * self.tick, message.raw_id, message.value))
+                message.frames_sent += 1
+                message.nominal_tick += message.period_ticks
+                self.schedule(message)
+        self.frames_sent += len(frames)
+        return frames
+
+    def seconds_until_next(self, now: Optional[float] = None) -> Optional[float]:
+        """0 while messages are registered (something is due every few ticks), None otherwise"""
+        return 0.0 if self.messages else None
+
+    @property
+    def frames_per_second(self) -> float:
+        """Average frame rate of all registered messages"""
+        return sum(1.0 / message.period for message in self.messages)
+
+def load_cyclic_messages(scheduler: CyclicScheduler, path: str) -> List[CyclicMessage]:
+    """Register the cyclic messages listed in a JSON file.
+
+    The file holds a list of {"id": "0x0C0", "data": 2, "period_ms": 10,
+    "jitter_ms": 1}; IDs and data may be numbers or "0x" strings.
+    """
+    with open(path, "r", encoding="utf-8") as cyclic_file:
+        entries = json.load(cyclic_file)
+
+    def number(value) -> int:
+        return int(value, 0) if isinstance(value, str) else int(value)
+
+    return [scheduler.add(number(entry["id"]), number(entry.get("data", 0)), entry["period_ms"] / 1000,
+                          entry.get("jitter_ms", 0) / 1000)
+            for entry in entries]
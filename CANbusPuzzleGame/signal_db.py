@@ -0,0 +1,207 @@
+"""
+Signal database for the CAN Bus Puzzle Game
+
+Loads a subset of the Vector DBC format (BO_ messages, SG_ signals and VAL_
+tables) and compiles each message into a single decoder function, so a
+frame turns into CarState updates with one dict lookup plus a shift and
+mask per signal.
+"""
+
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_DBC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vehicle.dbc")
+
+FrameDecoder = Callable[[int], bool]
+SignalHandler = Callable[[float], bool]
+
+MESSAGE_PATTERN = re.compile(r"^BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)\s+(\w+)")
+SIGNAL_PATTERN = re.compile(
+    r"^SG_\s+(\w+)\s*(M|m\d+)?\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*"
+    r"\(\s*([^,\s]+)\s*,\s*([^)\s]+)\s*\)\s*\[\s*([^|\s]*)\s*\|\s*([^\]\s]*)\s*\]\s*\"([^\"]*)\"")
+VALUE_TABLE_PATTERN = re.compile(r"^VAL_\s+(\d+)\s+(\w+)\s+(.*?)\s*;")
+VALUE_PAIR_PATTERN = re.compile(r"(-?\d+)\s+\"([^\"]*)\"")
+
+def parse_number(text: str):
+    """Parse a DBC number, keeping integers as int so scaled values stay exact"""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+class Signal:
+    """One signal inside a CAN message"""
+
+    def __init__(self, name: str, start_bit: int, length: int, little_endian: bool = True,
+                 signed: bool = False, factor=1, offset=0, minimum=0, maximum=0, unit: str = ""):
+        if not 1 <= length <= 64:
+            raise ValueError(f"signal {name} has invalid length {length}")
+        self.name = name
+        self.start_bit = start_bit
+        self.length = length
+        self.little_endian = little_endian
+        self.signed = signed
+        self.factor = factor
+        self.offset = offset
+        self.minimum = minimum
+        self.maximum = maximum
+        self.unit = unit
+        self.choices: Dict[int, str] = {}
+
+    @property
+    def shift(self) -> int:
+        """Right shift that brings the signal's LSB to bit 0.
+
+        Intel signals are read from the payload as a little-endian u64;
+        Motorola signals from the same bytes read as a big-endian u64.
+        """
+        if self.little_endian:
+            return self.start_bit
+        msb_index = (self.start_bit // 8) * 8 + (7 - self.start_bit % 8)
+        return 63 - (msb_index + self.length - 1)
+
+    @property
+    def mask(self) -> int:
+        return (1 << self.length) - 1
+
+    def decode(self, value: int) -> float:
+        """Decode this signal's physical value from a little-endian payload value"""
+        if not self.little_endian:
+            value = int.from_bytes(value.to_bytes(8, "little"), "big")
+        raw = (value >> self.shift) & self.mask
+        if self.signed and raw >> (self.length - 1):
+            raw -= 1 << self.length
+        return raw * self.factor + self.offset
+
+class Message:
+    """A CAN message definition: ID, length and the signals it carries"""
+
+    def __init__(self, frame_id: int, name: str, dlc: int, sender: str = ""):
+        self.frame_id = frame_id  # DBC convention: bit 31 set for 29-bit IDs, like CAN_EFF_FLAG
+        self.name = name
+        self.dlc = dlc
+        self.sender = sender
+        self.signals: List[Signal] = []
+
+    def signal(self, name: str) -> Optional[Signal]:
+        for signal in self.signals:
+            if signal.name == name:
+                return signal
+        return None
+
+    def compile(self, handlers: Dict[str, SignalHandler],
+                fallback: Callable[[str], SignalHandler]) -> FrameDecoder:
+        """Build one decoder for this message.
+
+        `handlers` maps signal names to setters; signals without a handler go
+        to the setter returned by `fallback(name)`. The decoder returns False
+        if the payload is longer than the message or any setter rejects it.
+        """
+        limit = 1 << (8 * self.dlc)
+        steps: List[Tuple[int, int, bool, int, object, object, bool, SignalHandler]] = []
+        for signal in self.signals:
+            handler = handlers.get(signal.name) or fallback(signal.name)
+            sign_bit = 1 << (signal.length - 1) if signal.signed else 0
+            scaled = signal.factor != 1 or signal.offset != 0
+            steps.append((signal.shift, signal.mask, not signal.little_endian, sign_bit,
+                          signal.factor, signal.offset, scaled, handler))
+
+        # Fast path for the common single unsigned, unscaled Intel signal
+        if len(steps) == 1:
+            shift, mask, big_endian, sign_bit, factor, offset, scaled, handler = steps[0]
+            if not big_endian and not sign_bit:
+                if scaled:
+                    def decode_scaled(value: int) -> bool:
+                        return 0 <= value < limit and handler(((value >> shift) & mask) * factor + offset)
+                    return decode_scaled
+
+                def decode_single(value: int) -> bool:
+                    return 0 <= value < limit and handler((value >> shift) & mask)
+                return decode_single
+
+        needs_big_endian = any(step[2] for step in steps)
+        from_bytes = int.from_bytes
+
+        def decode(value: int) -> bool:
+            if not 0 <= value < limit:
+                return False
+            swapped = from_bytes(value.to_bytes(8, "little"), "big") if needs_big_endian else 0
+            accepted = True
+            for shift, mask, big_endian, sign_bit, factor, offset, scaled, handler in steps:
+                raw = ((swapped if big_endian else value) >> shift) & mask
+                if sign_bit and raw & sign_bit:
+                    raw -= sign_bit << 1
+                if not handler(raw * factor + offset if scaled else raw):
+                    accepted = False
+            return accepted
+        return decode
+
+class SignalDatabase:
+    """Messages keyed by raw CAN ID, loaded from a DBC file"""
+
+    def __init__(self, messages: Optional[List[Message]] = None):
+        self.messages: Dict[int, Message] = {}
+        for message in messages or []:
+            self.add_message(message)
+
+    def add_message(self, message: Message):
+        self.messages[message.frame_id] = message
+
+    def __contains__(self, frame_id: int) -> bool:
+        return frame_id in self.messages
+
+    def __len__(self):
+        return len(self.messages)
+
+    def compile(self, handlers: Dict[str, SignalHandler],
+                fallback: Callable[[str], SignalHandler]) -> Dict[int, FrameDecoder]:
+        """Compile every message into a {raw_id: decoder} table"""
+        return {frame_id: message.compile(handlers, fallback)
+                for frame_id, message in self.messages.items()}
+
+    @classmethod
+    def from_dbc(cls, text: str) -> "SignalDatabase":
+        """Parse the DBC subset: BO_, SG_ and VAL_ lines; everything else is ignored"""
+        database = cls()
+        message: Optional[Message] = None
+        for line_number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if line.startswith("BO_ "):
+                match = MESSAGE_PATTERN.match(line)
+                if match is None:
+                    raise ValueError(f"line {line_number}: malformed message definition")
+                frame_id, name, dlc, sender = match.groups()
+                message = Message(int(frame_id), name, int(dlc), sender)
+                database.add_message(message)
+            elif line.startswith("SG_ "):
+                match = SIGNAL_PATTERN.match(line)
+                if match is None or message is None:
+                    raise ValueError(f"line {line_number}: malformed signal definition")
+                (name, multiplex, start_bit, length, byte_order, sign,
+                 factor, offset, minimum, maximum, unit) = match.groups()
+                if multiplex and multiplex != "M":
+                    continue  # Multiplexed signals are outside the supported subset
+                message.signals.append(Signal(
+                    name, int(start_bit), int(length), byte_order == "1", sign == "-",
+                    parse_number(factor), parse_number(offset),
+                    parse_number(minimum or "0"), parse_number(maximum or "0"), unit))
+            elif line.startswith("VAL_ "):
+                match = VALUE_TABLE_PATTERN.match(line)
+                if match is None:
+                    continue
+                frame_id, signal_name, pairs = match.groups()
+                target = database.messages.get(int(frame_id))
+                signal = target.signal(signal_name) if target else None
+                if signal is not None:
+                    signal.choices = {int(raw): label for raw, label in VALUE_PAIR_PATTERN.findall(pairs)}
+        return database
+
+    @classmethod
+    def load(cls, path: str) -> "SignalDatabase":
+        with open(path, "r", encoding="utf-8", errors="replace") as dbc_file:
+            return cls.from_dbc(dbc_file.read())
+
+def load_default_database() -> SignalDatabase:
+    """The database describing the game's car"""
+    return SignalDatabase.load(DEFAULT_DBC_PATH)
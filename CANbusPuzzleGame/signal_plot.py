@@ -0,0 +1,210 @@
+"""
+Rolling signal plot for the CAN Bus Puzzle Game
+
+Oscilloscope-style traces of decoded CAN signals. Each channel keeps its
+samples in a NumPy ring buffer written twice (at i and i + capacity), so the
+newest samples are always one contiguous slice. New samples are folded into
+a per-pixel-column min/max table as they are decimated, so drawing costs one
+pass over the visible columns however many samples arrived: a few hundred
+points per trace, drawn with a single line strip.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from signal_db import SignalDatabase
+
+PLOT_SECONDS = 10.0  # Time span shown across the plot
+PLOT_COLUMNS = 330  # Pixel columns, one min/max pair each
+CHANNEL_CAPACITY = 1 << 18  # Samples kept per channel
+EMPTY_COLUMN = np.iinfo(np.int64).min  # Column number of a slot that never held samples
+
+PlotFrame = Tuple[float, int, int]  # (timestamp, raw_id, value), as logged
+
+class PlotChannel:
+    """Sample ring and column min/max table for one signal"""
+
+    def __init__(self, name: str, low: float, high: float, columns: int = PLOT_COLUMNS,
+                 capacity: int = CHANNEL_CAPACITY):
+        self.name = name
+        self.low = low
+        self.high = high if high != low else low + 1
+        self.capacity = capacity
+        self.times = np.zeros(2 * capacity)
+        self.values = np.zeros(2 * capacity, dtype=np.float32)
+        self.head = 0  # Next write slot, in [0, capacity)
+        self.total = 0  # Samples ever written
+        self.decimated = 0  # Samples already folded into the column table
+
+        self.columns = columns
+        self.column_numbers = np.full(columns, EMPTY_COLUMN, dtype=np.int64)  # Absolute column held by each slot
+        self.column_min = np.zeros(columns, dtype=np.float32)
+        self.column_max = np.zeros(columns, dtype=np.float32)
+        self.column_last = np.zeros(columns, dtype=np.float32)  # Newest value in the column
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    @property
+    def last_time(self) -> Optional[float]:
+        return float(self.times[self.head + self.capacity - 1]) if self.total else None
+
+    def extend(self, times: np.ndarray, values: np.ndarray):
+        """Append samples, oldest first; only the newest `capacity` are kept"""
+        times, values = times[-self.capacity:], values[-self.capacity:]
+        count = len(times)
+        capacity = self.capacity
+        start = self.head
+        first = min(count, capacity - start)
+        for offset in (0, capacity):
+            self.times[start + offset:start + offset + first] = times[:first]
+            self.values[start + offset:start + offset + first] = values[:first]
+            self.times[offset:offset + count - first] = times[first:]
+            self.values[offset:offset + count - first] = values[first:]
+        self.head = (start + count) % capacity
+        self.total += count
+
+    def recent(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The newest `count` samples as contiguous views"""
+        count = min(count, len(self))
+        end = self.head + self.capacity
+        return self.times[end - count:end], self.values[end - count:end]
+
+    def value_before(self, timestamp: float) -> Optional[float]:
+        """The last sample taken before `timestamp`, to carry into the plot's left edge"""
+        times, values = self.recent(len(self))
+        index = int(np.searchsorted(times, timestamp)) - 1
+        return float(values[index]) if index >= 0 else None
+
+    def decimate(self, column_seconds: float):
+        """Fold samples added since the last call into the column min/max table"""
+        times, values = self.recent(self.total - self.decimated)
+        self.decimated = self.total
+        if not len(times):
+            return
+        columns = np.floor(times / column_seconds).astype(np.int64)
+        keep = columns > columns[-1] - self.columns  # Older columns would be overwritten anyway
+        columns, values = columns[keep], values[keep]
+        starts = np.flatnonzero(np.concatenate(([True], columns[1:] != columns[:-1])))
+        numbers = columns[starts]
+        minimums = np.minimum.reduceat(values, starts)
+        maximums = np.maximum.reduceat(values, starts)
+        lasts = values[np.append(starts[1:], len(values)) - 1]
+
+        slots = numbers % self.columns
+        same = self.column_numbers[slots] == numbers  # Column already holds earlier samples
+        self.column_min[slots] = np.where(same, np.minimum(self.column_min[slots], minimums), minimums)
+        self.column_max[slots] = np.where(same, np.maximum(self.column_max[slots], maximums), maximums)
+        self.column_last[slots] = lasts
+        self.column_numbers[slots] = numbers
+
+    def trace(self, now: float, seconds: float) -> Optional[np.ndarray]:
+        """(column, fraction of range) points for the window ending at `now`, or None if empty.
+
+        Each column with samples contributes its max and min; empty columns
+        hold the previous value, like a sample-and-hold scope.
+        """
+        column_seconds = seconds / self.columns
+        self.decimate(column_seconds)
+        newest = math.floor(now / column_seconds)
+        numbers = np.arange(newest - self.columns + 1, newest + 1)
+        slots = numbers % self.columns
+        present = self.column_numbers[slots] == numbers
+
+        held = np.where(present, np.arange(self.columns), -1)
+        np.maximum.accumulate(held, out=held)  # Index of the newest column with samples so far
+        carried = self.column_last[slots][np.maximum(held, 0)]
+        leading = self.value_before(numbers[0] * column_seconds)
+        valid = held >= 0
+        if leading is not None:
+            carried = np.where(valid, carried, leading)
+            valid[:] = True
+        if not valid.any():
+            return None
+
+        highs = np.where(present, self.column_max[slots], carried)[valid]
+        lows = np.where(present, self.column_min[slots], carried)[valid]
+        points = np.empty((2 * len(highs), 2))
+        points[0::2, 0] = points[1::2, 0] = np.flatnonzero(valid)
+        points[0::2, 1] = highs
+        points[1::2, 1] = lows
+        points[:, 1] = np.clip((points[:, 1] - self.low) / (self.high - self.low), 0.0, 1.0)
+        return points
+
+class SignalPlot:
+    """Channels for every signal in the database, fed from logged frames"""
+
+    def __init__(self, signal_db: SignalDatabase, seconds: float = PLOT_SECONDS, columns: int = PLOT_COLUMNS):
+        self.seconds = seconds
+        self.columns = columns
+        self.channels: Dict[str, PlotChannel] = {}
+        # raw_id -> (payload limit, [(channel, shift, mask, big_endian, signed_length, factor, offset)])
+        self.decoders: Dict[int, Tuple[int, List[tuple]]] = {}
+        for frame_id, message in signal_db.messages.items():
+            steps = []
+            for signal in message.signals:
+                low, high = signal.minimum, signal.maximum
+                if low == high:  # No range in the DBC: use everything the raw bits can hold
+                    raw_low = -(1 << (signal.length - 1)) if signal.signed else 0
+                    low, high = sorted((raw_low * signal.factor + signal.offset,
+                                        (raw_low + signal.mask) * signal.factor + signal.offset))
+                channel = self.add_channel(signal.name, low, high)
+                steps.append((channel, np.uint64(signal.shift), np.uint64(signal.mask), not signal.little_endian,
+                              signal.length if signal.signed else 0, signal.factor, signal.offset))
+            self.decoders[frame_id] = (1 << (8 * message.dlc), steps)
+        self.samples = 0  # Samples ever recorded, for change detection
+
+    def add_channel(self, name: str, low: float, high: float) -> PlotChannel:
+        channel = self.channels[name] = PlotChannel(name, low, high, self.columns)
+        return channel
+
+    def record(self, name: str, times: np.ndarray, values: np.ndarray):
+        """Append samples to a channel directly"""
+        if len(times):
+            self.channels[name].extend(times, values)
+            self.samples += len(times)
+
+    def record_frames(self, frames: Sequence[PlotFrame]):
+        """Decode the plotted signals out of a batch of (timestamp, raw_id, value) frames"""
+        decoders = self.decoders
+        by_id: Dict[int, List[Tuple[float, int]]] = {}  # One pass: only the messages in this batch get decoded
+        for timestamp, raw_id, value in frames:
+            if raw_id in decoders:
+                rows = by_id.get(raw_id)
+                if rows is None:
+                    rows = by_id[raw_id] = []
+                rows.append((timestamp, value))
+        for frame_id, rows in by_id.items():
+            limit, steps = decoders[frame_id]
+            if any(not 0 <= value < limit for _, value in rows):
+                rows = [(timestamp, value) for timestamp, value in rows if 0 <= value < limit]
+                if not rows:
+                    continue
+            times = np.fromiter((timestamp for timestamp, _ in rows), dtype=np.float64, count=len(rows))
+            values = np.fromiter((value for _, value in rows), dtype=np.uint64, count=len(rows))
+            swapped = values.byteswap() if any(step[3] for step in steps) else None
+            for channel, shift, mask, big_endian, signed_length, factor, offset in steps:
+                raw = ((swapped if big_endian else values) >> shift) & mask
+                if signed_length:
+                    raw = raw.astype(np.int64)
+                    raw[raw >= 1 << (signed_length - 1)] -= 1 << signed_length
+                channel.extend(times, raw.astype(np.float64) * factor + offset)
+            self.samples += len(rows)
+
+    def active(self, now: float) -> bool:
+        """Whether any trace still has samples inside the window, so the plot scrolls"""
+        return any(channel.last_time is not None and channel.last_time > now - self.seconds
+                   for channel in self.channels.values())
+
+    def seconds_until_scroll(self, now: float) -> Optional[float]:
+        """Time until the traces move one column, or None while nothing is in the window"""
+        if not self.active(now):
+            return None
+        column_seconds = self.seconds / self.columns
+        return column_seconds - now % column_seconds
+
+    def traces(self, now: float) -> Iterable[Tuple[PlotChannel, np.ndarray]]:
+        for channel in self.channels.values():
+            points = channel.trace(now, self.seconds)
+            if points is not None:
+                yield channel, points
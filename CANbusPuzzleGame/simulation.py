@@ -0,0 +1,121 @@
+"""
+Headless simulation core for the CAN Bus Puzzle Game
+
+Applies CAN frames to a CarState and advances missions without touching
+pygame, so recorded sessions and fuzz traffic can be replayed at full speed.
+"""
+
+from typing import Iterable, List, Optional, Tuple
+from enums import FrameStatus
+from car_state import CarState
+from mission import Mission, MissionEngine, create_default_missions
+from can_message import CANMessageParser
+from signal_db import SignalDatabase, load_default_database
+
+class CANSimulation:
+    """Display-free CAN bus simulation: frames in, state and mission progress out"""
+
+    def __init__(self, missions: Optional[List[Mission]] = None,
+                 signal_db: Optional[SignalDatabase] = None):
+        self.missions = missions if missions is not None else create_default_missions()
+        self.signal_db = signal_db if signal_db is not None else load_default_database()
+        self.mission_engine = MissionEngine(self.missions)
+        self.reset()
+
+    def reset(self):
+        """Start over with a fresh car and no mission progress"""
+        self.car_state = CarState()
+        self.mission_engine.reset()
+        self.last_completed: List[Mission] = []
+        self.frames_processed = 0
+        self.frames_rejected = 0
+
+        # CAN ID -> compiled message decoder bound to this car, built once instead of per frame
+        self.frame_handlers = self.signal_db.compile(self.car_state.signal_handlers,
+                                                     self.car_state.signal_setter)
+        # CAN ID -> CarState fields the message can change, for the mission index
+        self.frame_fields = {
+            frame_id: tuple({field for signal in message.signals
+                             for field in self.car_state.signal_fields(signal.name)})
+            for frame_id, message in self.signal_db.messages.items()
+        }
+
+    @property
+    def current_mission_index(self) -> int:
+        """Number of missions completed so far"""
+        return len(self.mission_engine.completed)
+
+    @property
+    def current_mission(self) -> Optional[Mission]:
+        """The mission currently being played, or None once all are done"""
+        return self.mission_engine.current
+
+    @property
+    def all_missions_completed(self) -> bool:
+        return self.mission_engine.finished
+
+    def apply_frame(self, can_id: int, data: int) -> FrameStatus:
+        """Apply one frame to the car state and advance missions.
+
+        Missions completed by this frame are left in `last_completed`.
+        """
+        self.frames_processed += 1
+        self.last_completed = []
+        handler = self.frame_handlers.get(can_id)
+        if handler is None:
+            self.frames_rejected += 1
+            return FrameStatus.UNKNOWN_ID
+        if not handler(data):
+            self.frames_rejected += 1
+            return FrameStatus.REJECTED
+
+        self.last_completed = self.mission_engine.notify(self.car_state, self.frame_fields[can_id])
+        return FrameStatus.MISSION_COMPLETED if self.last_completed else FrameStatus.ACCEPTED
+
+    def apply_frames(self, frames: Iterable[Tuple[int, int]]) -> bytearray:
+        """Apply a batch of (can_id, data) frames.
+
+        Returns one FrameStatus value per frame, packed into a bytearray so
+        large batches don't allocate a result object per frame. Completed
+        missions are in `mission_engine.completed`, in completion order.
+        """
+        handlers = self.frame_handlers
+        frame_fields = self.frame_fields
+        notify = self.mission_engine.notify
+        car_state = self.car_state
+
+        accepted = FrameStatus.ACCEPTED
+        completed = FrameStatus.MISSION_COMPLETED
+        unknown = FrameStatus.UNKNOWN_ID
+        rejected = FrameStatus.REJECTED
+
+        results = bytearray()
+        append = results.append
+        rejected_count = 0
+        for can_id, data in frames:
+            handler = handlers.get(can_id)
+            if handler is None:
+                append(unknown)
+                rejected_count += 1
+            elif not handler(data):
+                append(rejected)
+                rejected_count += 1
+            elif notify(car_state, frame_fields[can_id]):
+                append(completed)
+            else:
+                append(accepted)
+
+        self.last_completed = []
+        self.frames_processed += len(results)
+        self.frames_rejected += rejected_count
+        return results
+
+    def process_command(self, command: str) -> Tuple[Optional[FrameStatus], Optional[int], Optional[int]]:
+        """Parse and apply a text command. Returns (status, can_id, data).
+
+        The status is None when the command could not be parsed.
+        """
+        success, can_id, data = CANMessageParser.parse_command(command)
+        if not success:
+            return None, None, None
+        return self.apply_frame(can_id, data), can_id, data
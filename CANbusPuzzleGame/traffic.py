@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Traffic generator and fuzzer for the CAN Bus Puzzle Game
+
+TrafficGenerator builds reproducible random and adversarial input from the
+signal database: valid frames, values outside a signal's range or value
+table, payloads longer than the DLC, unknown standard and extended IDs, and
+boundary cases. The fuzzer drives it through the command parser, the
+CarState subsystem handlers, the frame decoders and the message log, and
+reports throughput, rejection rates and per-call latency; any exception is
+a finding.
+
+TrafficSource paces a generator at a fixed frame rate for the game's noisy
+bus mode (`main.py --noisy RATE`).
+
+Usage: python traffic.py [--count N] [--rate FPS] [--seed N]
+"""
+
+import argparse
+import itertools
+import math
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from can_frame import CAN_EFF_FLAG, CAN_EFF_MASK, CAN_SFF_MASK
+from can_log import LogFrame
+from can_message import CANMessageParser
+from car_state import CarState
+from enums import FrameStatus
+from message_log import MessageLog
+from signal_db import Message, Signal, SignalDatabase, load_default_database
+from simulation import CANSimulation
+
+# Frame kinds and how often each is generated by default
+DEFAULT_MIX = {"valid": 0.4, "out_of_range": 0.2, "oversized": 0.1, "unknown": 0.2, "boundary": 0.1}
+# Background noise for the game: visible in the log but never accepted by the car
+NOISE_MIX = {"unknown": 0.8, "oversized": 0.2}
+
+MALFORMED_COMMANDS = 0.3  # Share of fuzzed commands that are mutated into bad syntax
+MAX_REPORTED_CRASHES = 5
+LATENCY_PERCENTILES = (50, 99)
+
+Frame = Tuple[int, int]  # (raw_id, value)
+
+def signal_raw_range(signal: Signal) -> Tuple[int, int]:
+    """Raw values that decode inside the signal's [minimum|maximum] range"""
+    if signal.signed:
+        low, high = -(1 << (signal.length - 1)), (1 << (signal.length - 1)) - 1
+    else:
+        low, high = 0, signal.mask
+    if signal.minimum == signal.maximum or not signal.factor:
+        return low, high  # Range not given
+    bounds = sorted(((signal.minimum - signal.offset) / signal.factor,
+                     (signal.maximum - signal.offset) / signal.factor))
+    return max(low, math.ceil(bounds[0])), min(high, math.floor(bounds[1]))
+
+def encode_signals(message: Message, raws: Sequence[int]) -> int:
+    """Pack raw signal values into a little-endian payload value, the inverse of the decoders"""
+    intel = motorola = 0
+    for signal, raw in zip(message.signals, raws):
+        bits = (raw & signal.mask) << signal.shift
+        if signal.little_endian:
+            intel |= bits
+        else:
+            motorola |= bits
+    if motorola:
+        intel |= int.from_bytes(motorola.to_bytes(8, "big"), "little")
+    return intel
+
+class TrafficGenerator:
+    """Seeded source of random and adversarial frames, commands and subsystem updates"""
+
+    def __init__(self, signal_db: Optional[SignalDatabase] = None,
+                 mix: Optional[Dict[str, float]] = None, seed: Optional[int] = None):
+        self.signal_db = signal_db if signal_db is not None else load_default_database()
+        self.messages = list(self.signal_db.messages.values())
+        if not self.messages:
+            raise ValueError("traffic generator needs a signal database with messages")
+        self.random = random.Random(seed)
+        self.makers: Dict[str, Callable[[], Frame]] = {
+            "valid": self.valid_frame,
+            "out_of_range": self.out_of_range_frame,
+            "oversized": self.oversized_frame,
+            "unknown": self.unknown_frame,
+            "boundary": self.boundary_frame,
+        }
+        mix = mix if mix is not None else DEFAULT_MIX
+        unknown_kinds = set(mix) - set(self.makers)
+        if unknown_kinds:
+            raise ValueError(f"unknown frame kinds: {', '.join(sorted(unknown_kinds))}")
+        self.kinds = list(mix)
+        self.weights = list(itertools.accumulate(mix.values()))  # Cumulative, for random.choices
+
+        # Raw values each signal accepts and rejects, worked out once
+        self.valid_raws: Dict[Tuple[int, str], Sequence[int]] = {}
+        self.invalid_raws: Dict[Tuple[int, str], Sequence[int]] = {}
+        for message in self.messages:
+            for signal in message.signals:
+                key = (message.frame_id, signal.name)
+                low, high = signal_raw_range(signal)
+                if signal.choices:
+                    valid = sorted(raw for raw in signal.choices if low <= raw <= high)
+                else:
+                    valid = range(low, high + 1)
+                self.valid_raws[key] = valid
+                lowest = -(1 << (signal.length - 1)) if signal.signed else 0
+                highest = lowest + signal.mask
+                candidates = {lowest, low - 1, high + 1, highest}
+                if signal.choices:
+                    candidates.update((min(signal.choices) - 1, max(signal.choices) + 1))
+                self.invalid_raws[key] = [raw for raw in sorted(candidates)
+                                          if lowest <= raw <= highest and raw not in valid]
+
+    def frames(self, count: int) -> List[Frame]:
+        """`count` (raw_id, value) frames in the configured mix"""
+        makers = self.makers
+        kinds = self.random.choices(self.kinds, cum_weights=self.weights, k=count)
+        return [makers[kind]() for kind in kinds]
+
+    def valid_frame(self) -> Frame:
+        message = self.random.choice(self.messages)
+        raws = [self.random.choice(self.valid_raws[message.frame_id, signal.name])
+                for signal in message.signals]
+        return message.frame_id, encode_signals(message, raws)
+
+    def out_of_range_frame(self) -> Frame:
+        """A known ID with one signal outside its range or value table"""
+        rng = self.random
+        message = rng.choice(self.messages)
+        raws = [rng.choice(self.valid_raws[message.frame_id, signal.name]) for signal in message.signals]
+        index = rng.randrange(len(message.signals))
+        invalid = self.invalid_raws[message.frame_id, message.signals[index].name]
+        if invalid:
+            raws[index] = rng.choice(invalid)
+        return message.frame_id, encode_signals(message, raws)
+
+    def oversized_frame(self) -> Frame:
+        """A known ID with payload bytes past its DLC"""
+        message = self.random.choice(self.messages)
+        if message.dlc >= 8:
+            return message.frame_id, self.random.getrandbits(72) | 1 << 64
+        return message.frame_id, self.random.randrange(1 << (8 * message.dlc), 1 << 64)
+
+    def unknown_frame(self) -> Frame:
+        """A standard or extended ID missing from the signal database"""
+        rng = self.random
+        while True:
+            if rng.random() < 0.25:
+                raw_id = CAN_EFF_FLAG | rng.getrandbits(29)
+            else:
+                raw_id = rng.getrandbits(11)
+            if raw_id not in self.signal_db:
+                return raw_id, rng.getrandbits(8 * rng.randint(0, 8))
+
+    def boundary_frame(self) -> Frame:
+        """Edge-case IDs and payloads: zero, all ones, one past the DLC"""
+        rng = self.random
+        message = rng.choice(self.messages)
+        raw_id = rng.choice((message.frame_id, 0, CAN_SFF_MASK, CAN_EFF_FLAG, CAN_EFF_FLAG | CAN_EFF_MASK))
+        limit = 1 << (8 * message.dlc)
+        return raw_id, rng.choice((0, 1, limit - 1, limit, (1 << 64) - 1))
+
+    def commands(self, count: int) -> List[str]:
+        """Typed `send` commands for the parser; some with malformed syntax"""
+        rng = self.random
+        commands = []
+        for raw_id, value in self.frames(count):
+            can_id = raw_id & CAN_EFF_MASK
+            if rng.random() < MALFORMED_COMMANDS:
+                commands.append(rng.choice(MALFORMED_TEMPLATES)(can_id, value))
+            else:
+                commands.append(rng.choice(COMMAND_TEMPLATES)(can_id, value))
+        return commands
+
+    def subsystem_updates(self, count: int) -> List[Tuple[str, Any]]:
+        """(subsystem, value) pairs for CarState.update_subsystem, including wrong names and types"""
+        rng = self.random
+        names = list(CarState().subsystem_handlers) + ["wipers", "", "Headlights", "engine "]
+        values = [0, 1, 2, 3, 4, -1, 8, 9, 255, 1 << 64, -(1 << 64), 0.5, 2.0, float("nan"),
+                  float("inf"), True, False, None, "1", "on", "2" * 64]
+        return [(rng.choice(names), rng.choice(values) if rng.random() < 0.5 else rng.randint(-300, 300))
+                for _ in range(count)]
+
+COMMAND_TEMPLATES: List[Callable[[int, int], str]] = [
+    lambda can_id, value: f"send 0x{can_id:03X} 0x{value:02X}",
+    lambda can_id, value: f"send 0x{can_id:x} {value}",
+    lambda can_id, value: f"SEND {can_id} {value}",
+    lambda can_id, value: f"  send\t0x{can_id:03X}   0x{value:X}  ",
+]
+
+MALFORMED_TEMPLATES: List[Callable[[int, int], str]] = [
+    lambda can_id, value: "",
+    lambda can_id, value: "send",
+    lambda can_id, value: f"send 0x{can_id:03X}",
+    lambda can_id, value: f"send 0x{can_id:03X} {value} {value}",
+    lambda can_id, value: f"sned 0x{can_id:03X} {value}",
+    lambda can_id, value: f"send 0x{can_id:03X}g {value}",
+    lambda can_id, value: f"send -{can_id} {value}",
+    lambda can_id, value: f"send 0x{can_id + CAN_EFF_MASK + 1:X} {value}",
+    lambda can_id, value: f"send 0x{can_id:03X} 0x",
+    lambda can_id, value: f"send 0x{can_id:03X} -{value}",
+    lambda can_id, value: f"send 0x{can_id:03X} 1e3",
+    lambda can_id, value: f"send 0x{can_id:03X} {'9' * 5000}",
+    lambda can_id, value: f"send ０x{can_id:03X} {value}",
+    lambda can_id, value: f"send 0x{can_id:03X}\x00 {value}",
+]
+
+class TrafficSource:
+    """Paces a TrafficGenerator at `rate` frames per second.
+
+    `poll()` returns (timestamp, raw_id, value) frames, like LogReplay.poll,
+    with timestamps spaced evenly at the rate. Frames beyond max_frames stay
+    due and follow on later polls, so none are dropped.
+    """
+
+    def __init__(self, generator: TrafficGenerator, rate: float,
+                 clock: Callable[[], float] = time.time):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.generator = generator
+        self.rate = rate
+        self.clock = clock
+        self.epoch = clock()
+        self.frames_sent = 0
+
+    def poll(self, max_frames: int = 10000, now: Optional[float] = None) -> List[LogFrame]:
+        now = self.clock() if now is None else now
+        due = min(int((now - self.epoch) * self.rate) - self.frames_sent, max_frames)
+        if due <= 0:
+            return []
+        first, interval = self.frames_sent + 1, 1.0 / self.rate
+        epoch = self.epoch
+        frames = [(epoch + (first + index) * interval, raw_id, value)
+                  for index, (raw_id, value) in enumerate(self.generator.frames(due))]
+        self.frames_sent += due
+        return frames
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """Seconds until the next frame is due (0 when frames are waiting)"""
+        now = self.clock() if now is None else now
+        return max(0.0, self.epoch + (self.frames_sent + 1) / self.rate - now)
+
+def percentile(ordered: Sequence[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+class FuzzReport:
+    """Throughput, rejections, latency and crashes for one fuzzed target"""
+
+    def __init__(self, name: str, count: int):
+        self.name = name
+        self.count = count
+        self.elapsed = 0.0
+        self.rejected = 0
+        self.latencies: List[float] = []  # Seconds per call, sorted
+        self.crashes: List[Tuple[Any, str]] = []  # (input, exception)
+        self.crash_count = 0
+
+    @property
+    def rate(self) -> float:
+        return self.count / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def summary(self) -> str:
+        latency = "  ".join(f"p{p} {percentile(self.latencies, p) * 1e6:6.2f} us" for p in LATENCY_PERCENTILES)
+        lines = [f"{self.name:<14} {self.count:>9} inputs  {self.rate / 1e6:6.2f} M/s  "
+                 f"{self.rejected / self.count if self.count else 0:6.1%} rejected  {latency}  "
+                 f"{self.crash_count} crashes"]
+        for item, error in self.crashes:
+            lines.append(f"  crash on {item!r:.80}: {error}")
+        return "\n".join(lines)
+
+def fuzz(name: str, target: Callable[[Any], bool], inputs: Sequence[Any]) -> FuzzReport:
+    """Run inputs through `target` (returns True when accepted), catching every exception.
+
+    Each input goes through the target once, so stateful targets are
+    measured as they evolve. Every call is timed for the latency
+    percentiles, and the call times add up to `elapsed`.
+    """
+    report = FuzzReport(name, len(inputs))
+    perf_counter = time.perf_counter
+    latencies = []
+    append = latencies.append
+    for item in inputs:
+        call_start = perf_counter()
+        try:
+            accepted = target(item)
+        except Exception as error:
+            append(perf_counter() - call_start)
+            report.crash_count += 1
+            if len(report.crashes) < MAX_REPORTED_CRASHES:
+                report.crashes.append((item, repr(error)))
+            continue
+        append(perf_counter() - call_start)
+        if not accepted:
+            report.rejected += 1
+    report.elapsed = math.fsum(latencies)
+    latencies.sort()
+    report.latencies = latencies
+    return report
+
+def fuzz_all(generator: TrafficGenerator, count: int) -> List[FuzzReport]:
+    """Fuzz the parser, CarState, the frame decoders and the message log"""
+    parse_command = CANMessageParser.parse_command
+    car_state = CarState()
+    simulation = CANSimulation(signal_db=generator.signal_db)
+    accepted = (FrameStatus.ACCEPTED, FrameStatus.MISSION_COMPLETED)
+    message_log = MessageLog(12)
+    timestamp = time.time()
+
+    def log_frame(frame: Frame) -> bool:
+        message_log.add_can_message(frame[0], frame[1], timestamp)
+        return True
+
+    frames = generator.frames(count)
+    return [
+        fuzz("parser", lambda command: parse_command(command)[0], generator.commands(count)),
+        fuzz("car_state", lambda update: car_state.update_subsystem(*update), generator.subsystem_updates(count)),
+        fuzz("decoders", lambda frame: simulation.apply_frame(*frame) in accepted, frames),
+        fuzz("message_log", log_frame, frames),
+    ]
+
+def run_paced(generator: TrafficGenerator, count: int, rate: float) -> str:
+    """Feed `count` frames at `rate` into the simulation and log, as the game loop does.
+
+    Reports the achieved rate and how long frames waited between falling
+    due and being processed.
+    """
+    source = TrafficSource(generator, rate)
+    simulation = CANSimulation(signal_db=generator.signal_db)
+    message_log = MessageLog(12)
+    delays: List[float] = []
+    while source.frames_sent < count:
+        time.sleep(source.seconds_until_next())
+        frames = source.poll(count - source.frames_sent)
+        for timestamp, raw_id, value in frames:
+            message_log.add_can_message(raw_id, value, timestamp)
+            simulation.apply_frame(raw_id, value)
+        done = time.time()
+        delays.extend(done - timestamp for timestamp, _, _ in frames)
+    elapsed = time.time() - source.epoch
+    delays.sort()
+    return (f"paced {rate:g}/s: {count} frames in {elapsed:.2f} s ({count / elapsed:.0f}/s), "
+            f"{simulation.frames_rejected / count:.1%} rejected, "
+            f"delay p99 {percentile(delays, 99) * 1000:.2f} ms, max {delays[-1] * 1000:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz the CAN Bus Puzzle Game with random and adversarial traffic")
+    parser.add_argument("--count", type=int, default=100_000, help="inputs per target")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="also feed frames at this many per second and report delays (0 = skip)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    generator = TrafficGenerator(seed=args.seed)
+    reports = fuzz_all(generator, args.count)
+    for report in reports:
+        print(report.summary())
+    if args.rate > 0:
+        print(run_paced(generator, args.count, args.rate))
+    sys.exit(1 if any(report.crash_count for report in reports) else 0)
+
+if __name__ == "__main__":
+    main()
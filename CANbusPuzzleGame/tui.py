@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Terminal frontend for the CAN Bus Puzzle Game
+
+Plays the game in a text terminal with curses, for SSH sessions on machines
+without a display. It drives the same CANSimulation (CarState, missions and
+CANMessageParser) and MessageLog as the pygame window, but never loads SDL.
+
+The screen is kept as one cached line per row: each frame writes only the
+rows whose text changed, and curses then sends the terminal just the cells
+that differ. Between key presses the loop blocks in get_wch, so an idle
+session costs no CPU.
+
+Usage: python tui.py [--missions PACK]
+"""
+
+import argparse
+import curses
+import time
+from typing import List, Optional, Tuple
+from constants import MESSAGE_WINDOW_SIZE
+from enums import FrameStatus
+from can_message import CANMessageParser
+from can_filter import FilterBank
+from message_log import MessageLog
+from mission import Mission, load_missions
+from simulation import CANSimulation
+
+MAPPING_LINES = (
+    "0x101 windows: 0/1 driver close/open, 2/3 passenger close/open",
+    "0x201 headlights 0/1   0x301 doors 0/1 unlock/lock   0x401 engine 0-8",
+)
+HELP_LINE = "send <id> <data> | filter <id> [data] / off | accept <id>:<mask> / off | PgUp/PgDn | quit"
+LOG_TOP = 11  # Row of the message log title; the log fills the rows below it
+ENTER_KEYS = ("\n", "\r", curses.KEY_ENTER)
+BACKSPACE_KEYS = ("\b", "\x7f", curses.KEY_BACKSPACE)
+
+class TextScreen:
+    """A curses window drawn as whole rows, remembering what each row holds"""
+
+    def __init__(self, window):
+        self.window = window
+        self.rows: List[Optional[Tuple[str, int]]] = []
+        self.height = self.width = 0
+        self.rows_written = 0  # Rows actually sent to curses, for profiling
+        self.resize()
+
+    def resize(self):
+        """Pick up the terminal size and forget the cached rows"""
+        self.height, self.width = self.window.getmaxyx()
+        self.rows = [None] * self.height
+        self.window.erase()
+
+    def put(self, row: int, text: str, attr: int = curses.A_NORMAL):
+        """Show `text` on a row, padded to the full width; unchanged rows are skipped"""
+        if not 0 <= row < self.height:
+            return
+        text = text[:self.width - 1].ljust(self.width - 1)  # Writing the bottom-right cell raises
+        if self.rows[row] == (text, attr):
+            return
+        self.rows[row] = (text, attr)
+        self.window.addstr(row, 0, text, attr)
+        self.rows_written += 1
+
+class TerminalGame:
+    """The puzzle game in a curses window"""
+
+    def __init__(self, window, missions: Optional[List[Mission]] = None):
+        self.window = window
+        self.screen = TextScreen(window)
+        self.simulation = CANSimulation(missions)
+        self.message_log = MessageLog(MESSAGE_WINDOW_SIZE)
+        self.input_text = ""
+        self.error_text = ""  # Shown on the status line until the next command
+        self.running = True
+
+        window.keypad(True)
+        window.idlok(True)  # Let curses scroll the log with line insert/delete
+        self.attrs = {"title": curses.A_REVERSE, "heading": curses.A_BOLD, "system": curses.A_BOLD,
+                      "error": curses.A_BOLD, "running": curses.A_BOLD, "dim": curses.A_DIM}
+        if curses.has_colors():
+            curses.start_color()
+            try:
+                curses.use_default_colors()
+                background = -1
+            except curses.error:
+                background = curses.COLOR_BLACK
+            for pair, (name, color) in enumerate((("system", curses.COLOR_CYAN), ("error", curses.COLOR_RED),
+                                                  ("running", curses.COLOR_GREEN)), 1):
+                curses.init_pair(pair, color, background)
+                self.attrs[name] = curses.color_pair(pair) | curses.A_BOLD
+        self.add_system_message("System initialized")
+
+    def add_system_message(self, text: str):
+        self.message_log.add_system_message(text, time.time())
+
+    @property
+    def log_rows(self) -> int:
+        return max(0, self.screen.height - LOG_TOP - 3)
+
+    def process_command(self, command: str):
+        """Process a typed command; anything invalid is reported on the status line"""
+        self.error_text = ""
+        parts = command.strip().lower().split()
+        if parts in (["quit"], ["exit"]):
+            self.running = False
+        elif parts[0] == "filter":
+            self.process_filter_command(parts)
+        elif parts[0] == "accept":
+            self.process_accept_command(command.strip()[len("accept"):].strip())
+        else:
+            self.send(command)
+
+    def send(self, command: str):
+        success, can_id, data = CANMessageParser.parse_command(command)
+        if not success:
+            self.error("Invalid command!")
+            return
+        self.message_log.add_can_message(can_id, data, time.time())
+        status = self.simulation.apply_frame(can_id, data)
+        if status in (FrameStatus.UNKNOWN_ID, FrameStatus.REJECTED):
+            self.error("Invalid command!")
+        for completed_mission in self.simulation.last_completed:
+            self.add_system_message(f"Mission completed: {completed_mission.description}")
+        if status == FrameStatus.MISSION_COMPLETED and self.simulation.all_missions_completed:
+            self.add_system_message("All missions completed! You won!")
+
+    def process_filter_command(self, parts: List[str]):
+        """Handle `filter <id> [data]` and `filter off`"""
+        if parts[1:] == ["off"]:
+            self.message_log.set_filter(None)
+            return
+        try:
+            if len(parts) not in (2, 3):
+                raise ValueError
+            can_id = int(parts[1], 0)
+            data = int(parts[2], 0) if len(parts) == 3 else None
+        except ValueError:
+            self.error("Usage: filter <id> [data] | filter off")
+            return
+        self.message_log.set_filter(can_id, data)
+
+    def process_accept_command(self, specs: str):
+        """Handle `accept <id>:<mask> ...` (candump syntax) and `accept off`"""
+        if specs.lower() == "off":
+            self.message_log.set_acceptance(None)
+            return
+        try:
+            bank = FilterBank.parse(specs)
+            if not len(bank):
+                raise ValueError
+        except ValueError:
+            self.error("Usage: accept <id>:<mask> ... | accept off")
+            return
+        self.message_log.set_acceptance(bank)
+
+    def error(self, text: str):
+        self.error_text = text
+        self.add_system_message(text)
+        curses.beep()
+
+    def log_title(self) -> str:
+        log = self.message_log
+        title = "CAN Bus Messages"
+        if log.acceptance is not None:
+            title += f" [accept {log.acceptance}]"
+        if log.filter_id is not None:
+            title += f" [ID 0x{log.filter_id:03X}"
+            if log.filter_data is not None:
+                title += f" = {log.filter_data:02X}"
+            title += f": {log.view_length}]"
+        if log.scroll_offset:
+            title += f" (-{log.scroll_offset})"
+        return title
+
+    def render(self):
+        """Compose every row, send the changed ones and place the cursor on the input line"""
+        put = self.screen.put
+        attrs = self.attrs
+        simulation = self.simulation
+        car_state = simulation.car_state
+        missions = simulation.missions
+        mission = simulation.current_mission
+        completed = simulation.current_mission_index
+
+        put(0, f" CAN Bus Puzzle Game   {completed}/{len(missions)} missions", attrs["title"])
+        if mission is not None:
+            put(1, f"Mission {missions.index(mission) + 1}: {mission.description}", attrs["heading"])
+            put(2, f"Progress: {completed}/{len(missions)} missions completed")
+        else:
+            put(1, "ALL MISSIONS COMPLETED! YOU WON!", attrs["running"])
+            put(2, "Congratulations! You've mastered CAN bus communication!")
+        put(4, f"Windows     driver {car_state.driver_window.name:<8} passenger {car_state.passenger_window.name}")
+        put(5, f"Headlights  {car_state.headlights.name:<15} Doors {car_state.doors.name}")
+        put(6, f"Engine RPM  {car_state.engine_rpm}",
+            attrs["running"] if car_state.engine_rpm > 1000 else curses.A_NORMAL)
+        for row, line in enumerate(MAPPING_LINES, 8):
+            put(row, line, attrs["dim"])
+
+        put(LOG_TOP, self.log_title(), attrs["heading"] | curses.A_UNDERLINE)
+        rows = self.log_rows
+        messages = self.message_log.visible(rows) if rows else []
+        for row, message in enumerate(messages, LOG_TOP + 1):
+            if message.system_text is not None:
+                put(row, f"SYS: {message.system_text}", attrs["system"])
+            else:
+                put(row, str(message))
+        for row in range(LOG_TOP + 1 + len(messages), LOG_TOP + 1 + rows):
+            put(row, "")
+
+        height = self.screen.height
+        if self.error_text:
+            put(height - 2, self.error_text, attrs["error"])
+        else:
+            put(height - 2, HELP_LINE, attrs["dim"])
+        prompt = f"> {self.input_text}"
+        visible_prompt = prompt[-(self.screen.width - 1):]  # Keep the end of long input in view
+        put(height - 1, visible_prompt)
+        if height:
+            self.window.move(height - 1, min(len(visible_prompt), self.screen.width - 2))
+        self.window.noutrefresh()
+        curses.doupdate()
+
+    def handle_key(self, key):
+        """Apply one key from get_wch (a str, or an int for function keys)"""
+        log_rows = max(1, self.log_rows)
+        if key == curses.KEY_RESIZE:
+            self.screen.resize()
+        elif key in ENTER_KEYS:
+            if self.input_text.strip():
+                self.process_command(self.input_text)
+            self.input_text = ""
+        elif key in BACKSPACE_KEYS:
+            self.input_text = self.input_text[:-1]
+        elif key == curses.KEY_PPAGE:
+            self.message_log.scroll(log_rows, log_rows)
+        elif key == curses.KEY_NPAGE:
+            self.message_log.scroll(-log_rows, log_rows)
+        elif key == curses.KEY_END:
+            self.message_log.scroll_to_end()
+        elif isinstance(key, str) and key.isprintable():
+            self.input_text += key
+
+    def run(self):
+        """Redraw, then sleep until the next key"""
+        while self.running:
+            self.render()
+            self.handle_key(self.window.get_wch())
+
+def main():
+    parser = argparse.ArgumentParser(description="CAN Bus Puzzle Game in a text terminal")
+    parser.add_argument("--missions", metavar="PACK", help="mission pack JSON file (default: missions.json)")
+    args = parser.parse_args()
+
+    missions = load_missions(args.missions) if args.missions else None
+    try:
+        curses.wrapper(lambda window: TerminalGame(window, missions).run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
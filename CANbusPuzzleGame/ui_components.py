@@ -4,12 +4,49 @@ UI components for the CAN Bus Puzzle Game
 
 import pygame
 import time
-from typing import List
+from typing import List, Optional
 from constants import *
 from enums import SubsystemState, WindowState, DoorState
 from can_message import CANBusMessage
+from can_frame import CAN_EFF_FLAG, CAN_EFF_MASK
+from message_log import MessageLog
 from car_state import CarState
 from mission import Mission
+from scheduler import CyclicScheduler
+from physics import SubsystemPhysics
+from signal_plot import SignalPlot
+
+# Car diagram layout - car positioned in left area
+CAR_X = 200
+CAR_Y = 350
+CAR_WIDTH = 280
+CAR_HEIGHT = 160
+DRIVER_WINDOW_RECT = pygame.Rect(CAR_X - 60, CAR_Y - 60, 80, 50)  # Driver window (top)
+PASSENGER_WINDOW_RECT = pygame.Rect(CAR_X - 60, CAR_Y + 10, 80, 50)  # Passenger window (bottom)
+DRIVER_LABEL_POS = (CAR_X - 100, CAR_Y - 95)  # Above the window, more to the left
+PASSENGER_LABEL_POS = (CAR_X - 100, CAR_Y + 85)  # Below the window, more to the left
+
+# Screen regions owned by each dynamic widget, used as dirty rectangles
+MISSION_AREA = pygame.Rect(10, 10, WINDOW_WIDTH - 20, 80)
+HEADLIGHTS_AREA = pygame.Rect(CAR_X - CAR_WIDTH//2 - 37, CAR_Y - 52, 45, 105)
+DRIVER_WINDOW_AREA = DRIVER_WINDOW_RECT.inflate(6, 6).union(pygame.Rect(DRIVER_LABEL_POS, (180, 20)))
+PASSENGER_WINDOW_AREA = PASSENGER_WINDOW_RECT.inflate(6, 6).union(pygame.Rect(PASSENGER_LABEL_POS, (180, 20)))
+DOOR_LOCKS_AREA = pygame.Rect(CAR_X + 86, CAR_Y - 44, 29, 89)
+CAR_STATUS_AREA = pygame.Rect(CAR_X - 82, CAR_Y + 108, 200, 72)
+INPUT_AREA = pygame.Rect(10, WINDOW_HEIGHT - 128, WINDOW_WIDTH - 20, 108)
+MAPPING_AREA = pygame.Rect(450, 120, 350, 305)  # Text runs past the bordered box
+ERROR_AREA = pygame.Rect(WINDOW_WIDTH // 2 - 180, WINDOW_HEIGHT // 2 - 140, 360, 340)
+TRAFFIC_AREA = pygame.Rect(430, 440, 350, 225)
+TRAFFIC_ROWS = 7
+TRAFFIC_REFRESH_RATE = 4  # Panel redraws per second while cyclic frames flow
+PLOT_AREA = pygame.Rect(430, 110, 350, 310)
+PLOT_COLORS = (BLUE, RED, DARK_GREEN, ORANGE, PURPLE, DARK_GRAY)
+STATS_REFRESH_RATE = 4  # Per-ID statistics table redraws per second
+STATS_COLUMNS = (("ID", 10), ("Frames", 120), ("Rate/s", 195), ("Jitter ms", 260), ("Data", 335))
+
+def cursor_blink_on(now: Optional[float] = None) -> bool:
+    """Whether the blinking input cursor is currently shown"""
+    return bool(int((time.time() if now is None else now) / CURSOR_BLINK_INTERVAL) % 2)
 
 class UIRenderer:
     """Handles all UI rendering for the game"""
@@ -20,140 +57,120 @@ class UIRenderer:
         self.large_font = fonts['large_font']
         self.title_font = fonts['title_font']
         self.small_font = fonts['small_font']
+        self.message_panel = MessagePanel(self.font)
+        
+        # Layered rendering: static layer baked once, widgets redrawn on change
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(WHITE)
+        self.draw_car_body(self.background)
+        self.widget_keys = {}
+        self.needs_full_redraw = True
     
     def draw_car(self, car_state: CarState):
         """Draw the car representation with better visibility and labeling"""
-        # Car positioned in left area
-        car_x = 200
-        car_y = 350
-        car_width = 280
-        car_height = 160
-        
+        self.draw_car_body(self.screen)
+        self.draw_headlights(car_state)
+        self.draw_window(car_state.driver_window, DRIVER_WINDOW_RECT, "Driver", DRIVER_LABEL_POS)
+        self.draw_window(car_state.passenger_window, PASSENGER_WINDOW_RECT, "Passenger", PASSENGER_LABEL_POS)
+        self.draw_door_locks(car_state)
+        self.draw_car_status(car_state)
+    
+    def draw_car_body(self, surface):
+        """Draw the parts of the car that never change: body, shadow and title"""
         # Main car body with shadow effect
-        shadow_rect = pygame.Rect(car_x - car_width//2 + 3, car_y - car_height//2 + 3, car_width, car_height)
-        pygame.draw.rect(self.screen, DARK_GRAY, shadow_rect)
+        shadow_rect = pygame.Rect(CAR_X - CAR_WIDTH//2 + 3, CAR_Y - CAR_HEIGHT//2 + 3, CAR_WIDTH, CAR_HEIGHT)
+        pygame.draw.rect(surface, DARK_GRAY, shadow_rect)
         
-        car_rect = pygame.Rect(car_x - car_width//2, car_y - car_height//2, car_width, car_height)
-        pygame.draw.rect(self.screen, LIGHT_GRAY, car_rect)
-        pygame.draw.rect(self.screen, BLACK, car_rect, 4)
+        car_rect = pygame.Rect(CAR_X - CAR_WIDTH//2, CAR_Y - CAR_HEIGHT//2, CAR_WIDTH, CAR_HEIGHT)
+        pygame.draw.rect(surface, LIGHT_GRAY, car_rect)
+        pygame.draw.rect(surface, BLACK, car_rect, 4)
         
         # Car title - positioned higher above the car, slightly to the left
         title_text = self.title_font.render("Here is a CAR to control", True, BLACK)
-        self.screen.blit(title_text, (car_x - 120, car_y - car_height//2 - 80))
-        
-        # Headlights (front of car)
-        light_color = YELLOW if car_state.headlights == SubsystemState.ON else GRAY
+        surface.blit(title_text, (CAR_X - 120, CAR_Y - CAR_HEIGHT//2 - 80))
+    
+    def draw_headlights(self, car_state: CarState, brightness: Optional[float] = None):
+        """Draw the headlights at the front of the car, `brightness` 0-1 while warming up"""
+        if brightness is None:
+            brightness = 1.0 if car_state.headlights == SubsystemState.ON else 0.0
+        light_color = tuple(round(dark + (lit - dark) * brightness) for dark, lit in zip(GRAY, YELLOW))
         light_size = 20
         
         # Left headlight
-        pygame.draw.circle(self.screen, light_color, (car_x - car_width//2 - 15, car_y - 30), light_size)
-        pygame.draw.circle(self.screen, BLACK, (car_x - car_width//2 - 15, car_y - 30), light_size, 3)
+        pygame.draw.circle(self.screen, light_color, (CAR_X - CAR_WIDTH//2 - 15, CAR_Y - 30), light_size)
+        pygame.draw.circle(self.screen, BLACK, (CAR_X - CAR_WIDTH//2 - 15, CAR_Y - 30), light_size, 3)
         
         # Right headlight  
-        pygame.draw.circle(self.screen, light_color, (car_x - car_width//2 - 15, car_y + 30), light_size)
-        pygame.draw.circle(self.screen, BLACK, (car_x - car_width//2 - 15, car_y + 30), light_size, 3)
-        
-        # Windows
-        window_width = 80
-        window_height = 50
-        
-        # Driver window (top)
-        driver_window_rect = pygame.Rect(car_x - 60, car_y - 60, window_width, window_height)
-        if car_state.driver_window == WindowState.OPEN:
-            pygame.draw.rect(self.screen, WHITE, driver_window_rect)
-            pygame.draw.lines(self.screen, BLACK, False, [
-                (driver_window_rect.left, driver_window_rect.top + 10),
-                (driver_window_rect.right, driver_window_rect.top + 10),
-                (driver_window_rect.right, driver_window_rect.bottom),
-                (driver_window_rect.left, driver_window_rect.bottom)
-            ], 3)
-        else:
-            pygame.draw.rect(self.screen, LIGHT_BLUE, driver_window_rect)
-        pygame.draw.rect(self.screen, BLACK, driver_window_rect, 3)
-        
-        # Driver window status - positioned above the window, more to the left
-        driver_status = "OPEN" if car_state.driver_window == WindowState.OPEN else "CLOSED"
-        driver_text = self.font.render(f"Driver: {driver_status}", True, BLACK)
-        self.screen.blit(driver_text, (car_x - 100, car_y - 95))
-        
-        # Passenger window (bottom)
-        passenger_window_rect = pygame.Rect(car_x - 60, car_y + 10, window_width, window_height)
-        if car_state.passenger_window == WindowState.OPEN:
-            pygame.draw.rect(self.screen, WHITE, passenger_window_rect)
+        pygame.draw.circle(self.screen, light_color, (CAR_X - CAR_WIDTH//2 - 15, CAR_Y + 30), light_size)
+        pygame.draw.circle(self.screen, BLACK, (CAR_X - CAR_WIDTH//2 - 15, CAR_Y + 30), light_size, 3)
+    
+    def draw_window(self, window_state: WindowState, window_rect: pygame.Rect, label: str, label_pos,
+                    opening: Optional[float] = None):
+        """Draw one side window and its status label, `opening` 0-1 while the glass travels"""
+        target = 1.0 if window_state == WindowState.OPEN else 0.0
+        if opening is None:
+            opening = target
+        if opening >= 1.0:
+            pygame.draw.rect(self.screen, WHITE, window_rect)
             pygame.draw.lines(self.screen, BLACK, False, [
-                (passenger_window_rect.left, passenger_window_rect.top + 10),
-                (passenger_window_rect.right, passenger_window_rect.top + 10),
-                (passenger_window_rect.right, passenger_window_rect.bottom),
-                (passenger_window_rect.left, passenger_window_rect.bottom)
+                (window_rect.left, window_rect.top + 10),
+                (window_rect.right, window_rect.top + 10),
+                (window_rect.right, window_rect.bottom),
+                (window_rect.left, window_rect.bottom)
             ], 3)
         else:
-            pygame.draw.rect(self.screen, LIGHT_BLUE, passenger_window_rect)
-        pygame.draw.rect(self.screen, BLACK, passenger_window_rect, 3)
-        
-        # Passenger window status - positioned below the window, more to the left
-        passenger_status = "OPEN" if car_state.passenger_window == WindowState.OPEN else "CLOSED"
-        passenger_text = self.font.render(f"Passenger: {passenger_status}", True, BLACK)
-        self.screen.blit(passenger_text, (car_x - 100, car_y + 85))
+            # Glass rises from the bottom of the frame as the window closes
+            pygame.draw.rect(self.screen, WHITE, window_rect)
+            glass_height = round((1.0 - opening) * window_rect.height)
+            pygame.draw.rect(self.screen, LIGHT_BLUE, (window_rect.left, window_rect.bottom - glass_height,
+                                                       window_rect.width, glass_height))
+        pygame.draw.rect(self.screen, BLACK, window_rect, 3)
         
-        # Door locks (right side of car)
-        lock_color = RED if car_state.doors == DoorState.LOCKED else GREEN
+        if opening != target:
+            status = "OPENING" if target > opening else "CLOSING"
+        else:
+            status = "OPEN" if window_state == WindowState.OPEN else "CLOSED"
+        label_text = self.font.render(f"{label}: {status}", True, BLACK)
+        self.screen.blit(label_text, label_pos)
+    
+    def draw_door_locks(self, car_state: CarState, lock_travel: Optional[float] = None):
+        """Draw the door lock indicators; they change once the actuators are past half travel"""
+        if lock_travel is None:
+            locked = car_state.doors == DoorState.LOCKED
+        else:
+            locked = lock_travel >= 0.5
+        lock_color = RED if locked else GREEN
         lock_size = 12
         
-        # Door lock indicators
-        pygame.draw.circle(self.screen, lock_color, (car_x + 100, car_y - 30), lock_size)
-        pygame.draw.circle(self.screen, BLACK, (car_x + 100, car_y - 30), lock_size, 3)
-        pygame.draw.circle(self.screen, lock_color, (car_x + 100, car_y + 30), lock_size)
-        pygame.draw.circle(self.screen, BLACK, (car_x + 100, car_y + 30), lock_size, 3)
-        
+        pygame.draw.circle(self.screen, lock_color, (CAR_X + 100, CAR_Y - 30), lock_size)
+        pygame.draw.circle(self.screen, BLACK, (CAR_X + 100, CAR_Y - 30), lock_size, 3)
+        pygame.draw.circle(self.screen, lock_color, (CAR_X + 100, CAR_Y + 30), lock_size)
+        pygame.draw.circle(self.screen, BLACK, (CAR_X + 100, CAR_Y + 30), lock_size, 3)
+    
+    def draw_car_status(self, car_state: CarState, engine_rpm: Optional[int] = None):
+        """Draw the engine, headlight and door status lines below the car"""
         # Engine RPM display - positioned below car center, more visible
-        rpm_color = GREEN if car_state.engine_rpm > 1000 else BLACK
-        rpm_text = self.font.render(f"Engine RPM: {car_state.engine_rpm}", True, rpm_color)
-        self.screen.blit(rpm_text, (car_x - 80, car_y + 110))
+        if engine_rpm is None:
+            engine_rpm = car_state.engine_rpm
+        rpm_color = GREEN if engine_rpm > 1000 else BLACK
+        rpm_text = self.font.render(f"Engine RPM: {engine_rpm}", True, rpm_color)
+        self.screen.blit(rpm_text, (CAR_X - 80, CAR_Y + 110))
         
         # Headlight status text - positioned below engine RPM
         light_status = "ON" if car_state.headlights == SubsystemState.ON else "OFF"
         light_text = self.font.render(f"Headlights: {light_status}", True, BLACK)
-        self.screen.blit(light_text, (car_x - 80, car_y + 135))
+        self.screen.blit(light_text, (CAR_X - 80, CAR_Y + 135))
         
         # Door status - positioned below headlights
         door_status = "LOCKED" if car_state.doors == DoorState.LOCKED else "UNLOCKED"
         door_text = self.font.render(f"Doors: {door_status}", True, BLACK)
-        self.screen.blit(door_text, (car_x - 80, car_y + 160))
+        self.screen.blit(door_text, (CAR_X - 80, CAR_Y + 160))
     
-    def draw_can_messages(self, can_messages: List[CANBusMessage]):
-        """Draw the CAN bus message area"""
-        # Message area background
-        msg_x = WINDOW_WIDTH * 2 // 3
-        msg_y = 100
-        msg_width = WINDOW_WIDTH // 3 - 20
-        msg_height = WINDOW_HEIGHT - 200
-        
-        msg_rect = pygame.Rect(msg_x, msg_y, msg_width, msg_height)
-        pygame.draw.rect(self.screen, WHITE, msg_rect)
-        pygame.draw.rect(self.screen, BLACK, msg_rect, 2)
-        
-        # Title
-        title = self.font.render("CAN Bus Messages", True, BLACK)
-        self.screen.blit(title, (msg_x + 10, msg_y - 30))
-        
-        # Messages
-        y_offset = msg_y + 10
-        for message in can_messages[-12:]:  # Show last 12 messages
-            if hasattr(message, 'system_text'):
-                text = f"SYS: {message.system_text}"
-                color = BLUE
-            else:
-                text = str(message)
-                color = BLACK
-            
-            msg_surface = self.font.render(text, True, color)
-            if msg_surface.get_width() > msg_width - 20:
-                # Wrap long messages
-                text = text[:40] + "..."
-                msg_surface = self.font.render(text, True, color)
-            
-            self.screen.blit(msg_surface, (msg_x + 10, y_offset))
-            y_offset += 25
+    def draw_can_messages(self, message_log: MessageLog, title_text: str = "CAN Bus Messages",
+                          show_stats: bool = False):
+        """Draw the CAN bus message area, or the per-ID statistics table"""
+        self.message_panel.update(message_log, title_text, show_stats)
+        self.message_panel.draw(self.screen)
     
     def draw_subsystem_mapping(self):
         """Draw the CAN ID to subsystem mapping"""
@@ -199,12 +216,63 @@ class UIRenderer:
         dismiss_text = self.small_font.render("Press SPACE to start playing", True, RED)
         self.screen.blit(dismiss_text, (mapping_x + 15, y_offset + 35))
 
-    def draw_mission(self, current_mission_index: int, missions: List[Mission]):
-        """Draw the current mission"""
-        if current_mission_index < len(missions):
-            mission = missions[current_mission_index]
-            mission_text = f"Mission {current_mission_index + 1}: {mission.description}"
-            progress_text = f"Progress: {current_mission_index}/{len(missions)} missions completed"
+    def draw_cyclic_traffic(self, scheduler: CyclicScheduler):
+        """Draw the background traffic panel listing cyclic messages"""
+        if not scheduler.messages:
+            return
+        pygame.draw.rect(self.screen, WHITE, TRAFFIC_AREA)
+        pygame.draw.rect(self.screen, BLACK, TRAFFIC_AREA, 2)
+        
+        title = f"Cyclic Traffic: {len(scheduler.messages)} msgs, {scheduler.frames_per_second:.0f} frames/s"
+        self.screen.blit(self.font.render(title, True, BLACK), (TRAFFIC_AREA.x + 10, TRAFFIC_AREA.y + 8))
+        
+        y_offset = TRAFFIC_AREA.y + 38
+        for message in scheduler.messages[:TRAFFIC_ROWS]:
+            text = f"0x{message.raw_id:03X} = {message.value:02X} every {message.period * 1000:g} ms"
+            if message.jitter:
+                text += f" ±{message.jitter * 1000:g}"
+            text += f"  sent {message.frames_sent}"
+            self.screen.blit(self.small_font.render(text, True, DARK_GRAY), (TRAFFIC_AREA.x + 10, y_offset))
+            y_offset += 22
+        hidden = len(scheduler.messages) - TRAFFIC_ROWS
+        if hidden > 0:
+            more_text = self.small_font.render(f"... and {hidden} more", True, DARK_GRAY)
+            self.screen.blit(more_text, (TRAFFIC_AREA.x + 10, y_offset))
+    
+    def draw_signal_plot(self, plot: SignalPlot, now: float):
+        """Draw the rolling signal plot: one min/max-decimated line strip per channel"""
+        pygame.draw.rect(self.screen, WHITE, PLOT_AREA)
+        pygame.draw.rect(self.screen, BLACK, PLOT_AREA, 2)
+        title = self.font.render(f"Signals (last {plot.seconds:g} s)", True, BLACK)
+        self.screen.blit(title, (PLOT_AREA.x + 10, PLOT_AREA.y + 8))
+        
+        # Legend, wrapped onto as many rows as needed
+        legend_x, legend_y = PLOT_AREA.x + 10, PLOT_AREA.y + 32
+        colors = {}
+        for index, name in enumerate(plot.channels):
+            colors[name] = PLOT_COLORS[index % len(PLOT_COLORS)]
+            label = self.small_font.render(name, True, colors[name])
+            if legend_x + label.get_width() > PLOT_AREA.right - 10:
+                legend_x, legend_y = PLOT_AREA.x + 10, legend_y + 18
+            self.screen.blit(label, (legend_x, legend_y))
+            legend_x += label.get_width() + 12
+        
+        graph = pygame.Rect(PLOT_AREA.x + 10, legend_y + 24, plot.columns, PLOT_AREA.bottom - legend_y - 34)
+        for quarter in range(5):
+            grid_y = graph.bottom - quarter * (graph.height - 1) // 4
+            pygame.draw.line(self.screen, LIGHT_GRAY, (graph.left, grid_y), (graph.right, grid_y))
+        for channel, points in plot.traces(now):
+            if len(points) < 2:
+                continue
+            points[:, 0] += graph.left
+            points[:, 1] = graph.bottom - points[:, 1] * (graph.height - 1)
+            pygame.draw.lines(self.screen, colors[channel.name], False, points.tolist())
+    
+    def draw_mission(self, mission: Optional[Mission], missions_completed: int, missions: List[Mission]):
+        """Draw the current mission (None once all are done)"""
+        if mission is not None:
+            mission_text = f"Mission {missions.index(mission) + 1}: {mission.description}"
+            progress_text = f"Progress: {missions_completed}/{len(missions)} missions completed"
         else:
             mission_text = "🎉 ALL MISSIONS COMPLETED! YOU WON! 🎉"
             progress_text = "Congratulations! You've mastered CAN bus communication!"
@@ -221,7 +289,8 @@ class UIRenderer:
         progress_surface = self.font.render(progress_text, True, DARK_GRAY)
         self.screen.blit(progress_surface, (20, 55))
     
-    def draw_input_box(self, input_text: str, input_active: bool, show_mapping: bool):
+    def draw_input_box(self, input_text: str, input_active: bool, show_mapping: bool,
+                       cursor_visible: Optional[bool] = None):
         """Draw the command input box with better instructions"""
         input_y = WINDOW_HEIGHT - 100
         input_rect = pygame.Rect(10, input_y, WINDOW_WIDTH - 20, 50)
@@ -243,16 +312,103 @@ class UIRenderer:
             
             # Input text
             display_text = input_text
-            if input_active and int(time.time() * 2) % 2:  # Blinking cursor
+            if cursor_visible is None:
+                cursor_visible = input_active and cursor_blink_on()
+            if cursor_visible:  # Blinking cursor
                 display_text += "|"
             
             text_surface = self.font.render(display_text, True, BLACK)
             self.screen.blit(text_surface, (20, input_y + 15))
             
             # Help text
-            help_text = self.small_font.render("Press ENTER to send command | Press M to show mappings again", True, DARK_GRAY)
+            help_text = self.small_font.render("ENTER: send | M: mappings | PgUp/PgDn: scroll log | filter <id> [data] / filter off | accept <id>:<mask> | stats", True, DARK_GRAY)
             self.screen.blit(help_text, (20, input_y + 60))
     
+    def invalidate(self):
+        """Force the next render_frame to repaint the whole screen"""
+        self.needs_full_redraw = True
+    
+    def render_frame(self, car_state: CarState, mission: Optional[Mission], missions_completed: int,
+                     missions: List[Mission],
+                     message_log: MessageLog, log_title: str, input_text: str, input_active: bool,
+                     show_mapping: bool, show_error: bool, error_scale: float,
+                     scheduler: Optional[CyclicScheduler] = None, show_stats: bool = False,
+                     physics: Optional[SubsystemPhysics] = None,
+                     plot: Optional[SignalPlot] = None) -> List[pygame.Rect]:
+        """Redraw only the widgets whose inputs changed.
+        
+        Returns the dirty rectangles to pass to pygame.display.update. Each
+        dirty rectangle is repainted from the baked static layer, then every
+        widget overlapping it is redrawn in z-order with clipping, so
+        overlapping widgets and overlays stay correct. With `physics`, the
+        car is drawn from the subsystem positions interpolated between ticks,
+        quantized to what changes a pixel.
+        """
+        self.message_panel.update(message_log, log_title, show_stats)
+        cursor_visible = input_active and not show_mapping and cursor_blink_on()
+        if scheduler is not None and scheduler.messages:
+            traffic_key = (scheduler.version, int(time.time() * TRAFFIC_REFRESH_RATE))
+        else:
+            traffic_key = None
+        
+        if physics is not None:
+            window_height = DRIVER_WINDOW_RECT.height
+            driver_opening = round(physics.value("driver_window") * window_height) / window_height
+            passenger_opening = round(physics.value("passenger_window") * window_height) / window_height
+            engine_rpm = round(physics.value("engine_rpm"))
+            brightness = round(physics.value("headlights") * 64) / 64
+            lock_travel = float(physics.value("doors") >= 0.5)
+        else:
+            driver_opening = passenger_opening = engine_rpm = brightness = lock_travel = None
+        now = time.time()
+        if plot is None:
+            plot_key = None
+        elif plot.active(now):
+            plot_key = (plot.samples, int(now * plot.columns / plot.seconds))  # Scrolls one column at a time
+        else:
+            plot_key = plot.samples
+        
+        # (area, change key, draw) in back-to-front order
+        widgets = [
+            (MISSION_AREA, (missions_completed, len(missions), mission),
+             lambda: self.draw_mission(mission, missions_completed, missions)),
+            (HEADLIGHTS_AREA, (car_state.headlights, brightness),
+             lambda: self.draw_headlights(car_state, brightness)),
+            (DRIVER_WINDOW_AREA, (car_state.driver_window, driver_opening),
+             lambda: self.draw_window(car_state.driver_window, DRIVER_WINDOW_RECT, "Driver", DRIVER_LABEL_POS,
+                                      driver_opening)),
+            (PASSENGER_WINDOW_AREA, (car_state.passenger_window, passenger_opening),
+             lambda: self.draw_window(car_state.passenger_window, PASSENGER_WINDOW_RECT, "Passenger",
+                                      PASSENGER_LABEL_POS, passenger_opening)),
+            (DOOR_LOCKS_AREA, (car_state.doors, lock_travel), lambda: self.draw_door_locks(car_state, lock_travel)),
+            (CAR_STATUS_AREA, (car_state.engine_rpm, engine_rpm, car_state.headlights, car_state.doors),
+             lambda: self.draw_car_status(car_state, engine_rpm)),
+            (PLOT_AREA, plot_key, lambda: plot is not None and self.draw_signal_plot(plot, now)),
+            (self.message_panel.area, self.message_panel.version,
+             lambda: self.message_panel.draw(self.screen)),
+            (TRAFFIC_AREA, traffic_key, lambda: traffic_key and self.draw_cyclic_traffic(scheduler)),
+            (INPUT_AREA, (input_text, cursor_visible, show_mapping),
+             lambda: self.draw_input_box(input_text, input_active, show_mapping, cursor_visible)),
+            (MAPPING_AREA, show_mapping, lambda: show_mapping and self.draw_subsystem_mapping()),
+            (ERROR_AREA, (show_error, error_scale), lambda: self.draw_error_animation(show_error, error_scale)),
+        ]
+        
+        if self.needs_full_redraw:
+            dirty = [self.screen.get_rect()]
+            self.needs_full_redraw = False
+        else:
+            dirty = [area for area, key, _ in widgets if self.widget_keys.get(id(area)) != key]
+        self.widget_keys = {id(area): key for area, key, _ in widgets}
+        
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            self.screen.blit(self.background, rect, rect)
+            for area, _, draw in widgets:
+                if area.colliderect(rect):
+                    draw()
+        self.screen.set_clip(None)
+        return dirty
+    
     def draw_error_animation(self, show_error: bool, error_scale: float):
         """Draw the error animation"""
         if show_error and error_scale > 0:
@@ -276,3 +432,132 @@ class UIRenderer:
             error_text = self.large_font.render("WRONG COMMAND!", True, RED)
             text_rect = error_text.get_rect(center=(center_x, center_y + size + 50))
             self.screen.blit(error_text, text_rect)
+
+class MessagePanel:
+    """CAN message panel kept on its own surface.
+    
+    Each row is rendered once when its message arrives; older rows are
+    scrolled up in place, so a normal frame is a single blit.
+    """
+    
+    ROW_HEIGHT = 25
+    
+    def __init__(self, font):
+        self.font = font
+        self.x = WINDOW_WIDTH * 2 // 3
+        self.y = 100
+        self.width = WINDOW_WIDTH // 3 - 20
+        self.height = WINDOW_HEIGHT - 200
+        self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
+        self.area = pygame.Rect(self.x, self.y - 30, self.width, self.height + 30)  # Includes the title
+        self.surface = pygame.Surface((self.width, self.height))
+        self.rows_area = pygame.Rect(2, 10, self.width - 4, VISIBLE_MESSAGE_ROWS * self.ROW_HEIGHT)
+        
+        self.title_text = None
+        self.title_surface = None
+        self.view_key = None  # MessageLog.view_version of the rendered rows, or a stats table key
+        self.view_end = -1  # Index just past the newest rendered row
+        self.row_count = 0
+        self.version = 0  # Bumped whenever the panel surface or title changes
+        self.clear()
+    
+    def clear(self):
+        """Reset the panel surface to an empty bordered box"""
+        self.surface.fill(WHITE)
+        pygame.draw.rect(self.surface, BLACK, self.surface.get_rect(), 2)
+        self.row_count = 0
+    
+    def render_row(self, message: CANBusMessage):
+        """Render one message row"""
+        if message.system_text is not None:
+            text = f"SYS: {message.system_text}"
+            color = BLUE
+        else:
+            text = str(message)
+            color = BLACK
+        if self.font.size(text)[0] > self.width - 20:
+            # Wrap long messages
+            text = text[:40] + "..."
+        return self.font.render(text, True, color)
+    
+    def draw_rows(self, messages: List[CANBusMessage], first_row: int):
+        """Render messages into consecutive row slots starting at first_row"""
+        for offset, message in enumerate(messages):
+            row_y = self.rows_area.top + (first_row + offset) * self.ROW_HEIGHT
+            self.surface.blit(self.render_row(message), (10, row_y))
+    
+    def update(self, message_log: MessageLog, title_text: str, show_stats: bool = False):
+        """Bring the panel up to date with the log, rendering only new rows"""
+        if title_text != self.title_text:
+            self.title_text = title_text
+            self.title_surface = self.font.render(title_text, True, BLACK)
+            self.version += 1
+        if show_stats:
+            self.update_stats(message_log)
+            return
+        
+        view_key = message_log.view_version
+        view_end = message_log.view_length - message_log.scroll_offset
+        new_rows = view_end - self.view_end
+        if view_key == self.view_key and new_rows == 0:
+            return
+        
+        rows = VISIBLE_MESSAGE_ROWS
+        if view_key != self.view_key or new_rows < 0 or new_rows >= rows:
+            # View changed or scrolled too far: rebuild every row once
+            self.clear()
+            visible = message_log.visible(rows)
+            self.draw_rows(visible, 0)
+            self.row_count = len(visible)
+        else:
+            visible = message_log.visible(rows)[-new_rows:]
+            overflow = max(0, self.row_count + new_rows - rows)
+            if overflow:
+                # Shift existing rows up and blank the slots freed at the bottom
+                self.surface.scroll(0, -overflow * self.ROW_HEIGHT)
+                self.row_count -= overflow
+                blank_top = self.rows_area.top + self.row_count * self.ROW_HEIGHT
+                self.surface.fill(WHITE, (0, blank_top, self.width, self.height - blank_top))
+                self.surface.fill(WHITE, (0, 0, self.width, self.rows_area.top))
+                pygame.draw.rect(self.surface, BLACK, self.surface.get_rect(), 2)
+            self.draw_rows(visible, self.row_count)
+            self.row_count += len(visible)
+        
+        self.view_key = view_key
+        self.view_end = view_end
+        self.version += 1
+    
+    def update_stats(self, message_log: MessageLog):
+        """Redraw the per-ID table a few times per second, busiest IDs first"""
+        view_key = ("stats", message_log.view_version, int(time.time() * STATS_REFRESH_RATE))
+        if view_key == self.view_key:
+            return
+        self.clear()
+        row_y = self.rows_area.top
+        for heading, column_x in STATS_COLUMNS:
+            self.surface.blit(self.font.render(heading, True, DARK_GRAY), (column_x, row_y))
+        id_stats = message_log.stats
+        rows = VISIBLE_MESSAGE_ROWS - (2 if id_stats.other_frames else 1)
+        for stats in id_stats.busiest(rows, message_log.accepts_id):
+            row_y += self.ROW_HEIGHT
+            if stats.can_id & CAN_EFF_FLAG:
+                id_text = f"0x{stats.can_id & CAN_EFF_MASK:08X}"
+            else:
+                id_text = f"0x{stats.can_id:03X}"
+            rate = stats.rate
+            cells = (id_text, str(stats.count), f"{rate:.0f}" if rate >= 100 else f"{rate:.1f}",
+                     f"{stats.jitter * 1000:.1f}", f"{stats.last_data:02X}"[:4])
+            for text, (_, column_x) in zip(cells, STATS_COLUMNS):
+                self.surface.blit(self.font.render(text, True, BLACK), (column_x, row_y))
+        if id_stats.other_frames:
+            # Frames of IDs that never repeated or dropped out of the table, whatever the filter
+            row_y += self.ROW_HEIGHT
+            for text, (_, column_x) in zip(("other", str(id_stats.other_frames)), STATS_COLUMNS):
+                self.surface.blit(self.font.render(text, True, DARK_GRAY), (column_x, row_y))
+        self.view_key = view_key
+        self.view_end = -1
+        self.version += 1
+    
+    def draw(self, screen):
+        screen.blit(self.surface, self.rect)
+        screen.blit(self.title_surface, (self.x + 10, self.y - 30))
@@ -0,0 +1,218 @@
+"""
+Batch environment module containing the BatchDinosaurEnv class.
+Runs many independent dinosaur games in lockstep with their state held in
+NumPy arrays, so one step advances every game with a handful of array
+operations instead of a Python loop over game objects.
+"""
+
+import numbers
+import random
+import numpy as np
+from constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, GRAVITY, JUMP_STRENGTH,
+    DINOSAUR_WIDTH, DINOSAUR_HEIGHT, DINOSAUR_X_POSITION,
+    OBSTACLE_WIDTH, OBSTACLE_HEIGHT, OBSTACLE_SPEED,
+    INITIAL_SPAWN_DELAY, MIN_SPAWN_DELAY, SPAWN_JITTER, SCORE_FRAMES, ACTION_JUMP
+)
+from environment import OBSERVATION_SIZE, NO_OBSTACLE_DISTANCE
+from obstacle import max_obstacles
+
+NO_OBSTACLE = np.inf  # x of an empty obstacle slot
+
+
+class BatchDinosaurEnv:
+    """
+    N dinosaur games stepped together, each following the same rules as DinosaurEnv.
+    Game i seeded with s plays exactly like DinosaurEnv().reset(s) given the
+    same actions: the physics is the same float arithmetic, collisions use
+    the same integer truncation, and each game draws its obstacle gaps from
+    its own seeded random.Random.
+
+    Games that finish stay frozen (reward 0, done) until reset, unless
+    `autoreset` is set: then they restart at once on the next seed and the
+    observation returned for them is the new game's first one.
+    """
+
+    def __init__(self, count, spawn_jitter=SPAWN_JITTER, max_steps=None, autoreset=False,
+                 obstacle_speed=OBSTACLE_SPEED):
+        self.count = count
+        self.spawn_jitter = spawn_jitter
+        self.max_steps = max_steps
+        self.autoreset = autoreset
+        self.obstacle_speed = obstacle_speed
+        self.ground_y = SCREEN_HEIGHT - GROUND_HEIGHT - DINOSAUR_HEIGHT
+
+        self.y = np.zeros(count)
+        self.vel_y = np.zeros(count)
+        self.is_jumping = np.zeros(count, dtype=bool)
+        self.obstacle_x = np.full((count, max_obstacles(obstacle_speed)), NO_OBSTACLE)
+        self.obstacle_spawn_timer = np.zeros(count, dtype=np.int64)
+        self.obstacle_spawn_delay = np.zeros(count, dtype=np.int64)
+        self.spawn_gap = np.zeros(count, dtype=np.int64)  # Frames from the last spawn to the next one
+        self.frame = np.zeros(count, dtype=np.int64)
+        self.crashed = np.zeros(count, dtype=bool)
+        self.done = np.zeros(count, dtype=bool)
+        self.randoms = [random.Random() for _ in range(count)]
+        self.next_seed = None  # Seed for the next autoreset, when seeded
+        self.reset()
+
+    @property
+    def score(self):
+        return self.frame // SCORE_FRAMES
+
+    def reset(self, seed=None):
+        """
+        Restart every game and return the observations, shape (count, OBSERVATION_SIZE).
+        `seed` is a base (game i gets seed + i), a sequence of per-game seeds, or None.
+        """
+        if seed is None:
+            seeds = [None] * self.count
+        elif isinstance(seed, numbers.Integral):
+            seed = int(seed)
+            seeds = range(seed, seed + self.count)
+        else:
+            seeds = list(seed)
+            if len(seeds) != self.count:
+                raise ValueError(f"expected {self.count} seeds, got {len(seeds)}")
+        self.next_seed = seed + self.count if isinstance(seed, int) else None
+        self.reset_games(np.arange(self.count), seeds)
+        return self.observation()
+
+    def reset_games(self, games, seeds):
+        """Restart the given games with one seed each (None for unseeded)."""
+        self.y[games] = self.ground_y
+        self.vel_y[games] = 0
+        self.is_jumping[games] = False
+        self.obstacle_x[games] = NO_OBSTACLE
+        self.obstacle_spawn_timer[games] = 0
+        self.obstacle_spawn_delay[games] = INITIAL_SPAWN_DELAY
+        self.frame[games] = 0
+        self.crashed[games] = False
+        self.done[games] = False
+        for game, seed in zip(games.tolist(), seeds):
+            self.randoms[game] = random.Random(seed)
+        self.spawn_gap[games] = INITIAL_SPAWN_DELAY + self.draw_jitter(games)
+
+    def draw_jitter(self, games):
+        """Extra spawn frames for each game, from its own RNG so it matches DinosaurEnv."""
+        if not self.spawn_jitter:
+            return 0
+        randoms, jitter = self.randoms, self.spawn_jitter
+        return np.array([randoms[game].randint(0, jitter) for game in games.tolist()], dtype=np.int64)
+
+    def step(self, actions):
+        """
+        Advance every running game one frame. Returns (observations, rewards, dones) arrays.
+        Rewards are 1 per frame survived and 0 for a crash or a game already finished.
+        """
+        live = ~self.done
+        previous_y = self.y.copy()
+
+        # Dinosaur.update: jump from the ground, then gravity and landing
+        jump = live & (np.asarray(actions) == ACTION_JUMP) & ~self.is_jumping
+        self.vel_y[jump] = JUMP_STRENGTH
+        self.is_jumping |= jump
+        airborne = live & self.is_jumping
+        self.vel_y += np.where(airborne, GRAVITY, 0.0)
+        self.y += np.where(airborne, self.vel_y, 0.0)
+        landed = airborne & (self.y >= self.ground_y)
+        self.y[landed] = self.ground_y
+        self.vel_y[landed] = 0
+        self.is_jumping &= ~landed
+
+        # Spawning, a little sooner each time, into each game's first free slot
+        self.obstacle_spawn_timer += live
+        spawning = np.flatnonzero(live & (self.obstacle_spawn_timer >= self.spawn_gap))
+        if spawning.size:
+            free = self.obstacle_x[spawning] == NO_OBSTACLE
+            if not free.any(axis=1).all():
+                raise RuntimeError("no free obstacle slot; max_obstacles() is too small for this speed")
+            slots = np.argmax(free, axis=1)
+            self.obstacle_x[spawning, slots] = SCREEN_WIDTH
+            self.obstacle_spawn_timer[spawning] = 0
+            delay = self.obstacle_spawn_delay[spawning]
+            delay -= delay > MIN_SPAWN_DELAY
+            self.obstacle_spawn_delay[spawning] = delay
+            self.spawn_gap[spawning] = delay + self.draw_jitter(spawning)
+
+        # Obstacle.update; culling waits until after the collision test, as in DinosaurEnv
+        speed = self.obstacle_speed
+        self.obstacle_x -= np.where(live, speed, 0)[:, None]
+
+        # AABB collision, truncated to whole pixels like pygame.Rect
+        obstacle_y = self.ground_y
+        obstacle_x = np.trunc(self.obstacle_x)
+        dinosaur_y = np.trunc(self.y)[:, None]
+        in_column = ((DINOSAUR_X_POSITION < obstacle_x + OBSTACLE_WIDTH) &
+                     (obstacle_x < DINOSAUR_X_POSITION + DINOSAUR_WIDTH))
+        hit = (in_column &
+               (dinosaur_y < obstacle_y + OBSTACLE_HEIGHT) &
+               (obstacle_y < dinosaur_y + DINOSAUR_HEIGHT))
+        # Swept test for obstacles that crossed the whole column within the frame
+        crossed = (live[:, None] & (obstacle_x + OBSTACLE_WIDTH <= DINOSAUR_X_POSITION) &
+                   (np.trunc(self.obstacle_x + speed) >= DINOSAUR_X_POSITION + DINOSAUR_WIDTH))
+        if crossed.any():
+            hit |= crossed & self.swept_hits(self.obstacle_x, np.trunc(previous_y)[:, None], dinosaur_y)
+        self.crashed = live & hit.any(axis=1)
+        self.obstacle_x[self.obstacle_x + OBSTACLE_WIDTH < 0] = NO_OBSTACLE
+
+        self.frame += live
+        finished = self.crashed
+        if self.max_steps is not None:
+            finished = finished | (live & (self.frame >= self.max_steps))
+        self.done |= finished
+        rewards = (live & ~self.crashed).astype(np.float64)
+        dones = self.done.copy()
+
+        if self.autoreset and finished.any():
+            games = np.flatnonzero(finished)
+            if self.next_seed is None:
+                seeds = [None] * games.size
+            else:
+                seeds = range(self.next_seed, self.next_seed + games.size)
+                self.next_seed += games.size
+            self.reset_games(games, seeds)
+        return self.observation(), rewards, dones
+
+    def swept_hits(self, obstacle_x, start_y, end_y):
+        """
+        environment.swept_overlaps for every slot at once: whether each
+        obstacle, moving left by obstacle_speed, met the dinosaur moving from
+        start_y to end_y at some time during the frame. The y values are truncated already.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # x: the obstacle moves, the dinosaur doesn't
+            offset = DINOSAUR_X_POSITION - np.trunc(obstacle_x + self.obstacle_speed)
+            motion = (DINOSAUR_X_POSITION - np.trunc(obstacle_x)) - offset
+            x_enter, x_leave = self.overlap_interval(offset, motion, DINOSAUR_WIDTH, OBSTACLE_WIDTH)
+            # y: the dinosaur moves, the obstacle doesn't
+            offset = start_y - self.ground_y
+            motion = end_y - start_y
+            y_enter, y_leave = self.overlap_interval(offset, motion, DINOSAUR_HEIGHT, OBSTACLE_HEIGHT)
+        enter = np.maximum(np.maximum(x_enter, y_enter), 0)
+        leave = np.minimum(np.minimum(x_leave, y_leave), 1)
+        return enter < leave
+
+    @staticmethod
+    def overlap_interval(offset, motion, a_size, b_size):
+        """environment.overlap_interval on arrays of offsets (a - b at the start) and motions."""
+        offset, motion = np.broadcast_arrays(offset, motion)
+        inside = (-a_size < offset) & (offset < b_size)
+        moving = motion != 0
+        first = (-a_size - offset) / motion
+        second = (b_size - offset) / motion
+        enter = np.where(moving, np.minimum(first, second), np.where(inside, -np.inf, np.inf))
+        leave = np.where(moving, np.maximum(first, second), np.where(inside, np.inf, -np.inf))
+        return enter, leave
+
+    def observation(self):
+        """Per-game observations in DinosaurEnv's layout, shape (count, OBSERVATION_SIZE)."""
+        distances = self.obstacle_x - (DINOSAUR_X_POSITION + DINOSAUR_WIDTH)
+        ahead = self.obstacle_x + OBSTACLE_WIDTH > DINOSAUR_X_POSITION
+        distances = np.sort(np.where(ahead, distances, np.inf), axis=1)[:, :2]
+        distances[np.isinf(distances)] = NO_OBSTACLE_DISTANCE
+        observations = np.empty((self.count, OBSERVATION_SIZE))
+        observations[:, 0] = self.ground_y - self.y
+        observations[:, 1] = self.vel_y
+        observations[:, 2:] = distances
+        return observations
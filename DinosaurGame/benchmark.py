@@ -0,0 +1,82 @@
+"""
+Benchmark module for the headless dinosaur environment.
+Plays episodes with a simple jumping policy and reports steps per second.
+
+Usage: python benchmark.py [--steps N] [--seed N] [--batch N]
+"""
+
+import argparse
+import time
+import numpy as np
+from constants import ACTION_NONE, ACTION_JUMP, SCORE_FRAMES
+from environment import DinosaurEnv
+from batch_environment import BatchDinosaurEnv
+
+JUMP_DISTANCE = 40  # The policy jumps when the next obstacle is this close (pixels)
+EPISODE_STEPS = 10_000  # Episodes are cut off here, since the policy rarely crashes
+
+
+def threshold_policy(observation):
+    """Jump when an obstacle is about to reach the dinosaur."""
+    return ACTION_JUMP if 0 <= observation[2] < JUMP_DISTANCE else ACTION_NONE
+
+
+def run(steps, seed=0, policy=threshold_policy):
+    """Play `steps` frames over as many episodes as it takes. Returns the finished episodes' scores."""
+    env = DinosaurEnv(max_steps=EPISODE_STEPS)
+    observation = env.reset(seed)
+    scores = []
+    for _ in range(steps):
+        observation, _, done = env.step(policy(observation))
+        if done:
+            scores.append(env.score)
+            seed += 1
+            observation = env.reset(seed)
+    return scores
+
+
+def batch_threshold_policy(observations):
+    """threshold_policy for a whole batch of observations."""
+    distances = observations[:, 2]
+    return np.where((distances >= 0) & (distances < JUMP_DISTANCE), ACTION_JUMP, ACTION_NONE)
+
+
+def run_batch(steps, count, seed=0):
+    """Play `steps` game frames spread over `count` games in lockstep. Returns the finished episodes' scores."""
+    env = BatchDinosaurEnv(count, max_steps=EPISODE_STEPS, autoreset=True)
+    observations = env.reset(seed)
+    scores = []
+    for _ in range(max(1, steps // count)):
+        frames = env.frame.copy()  # Autoreset clears the frame count of finished games
+        observations, _, dones = env.step(batch_threshold_policy(observations))
+        if dones.any():
+            scores.extend(((frames[dones] + 1) // SCORE_FRAMES).tolist())
+    return scores
+
+
+def report(name, steps, elapsed, scores):
+    rate = steps / elapsed
+    print(f"{name}: {steps} steps in {elapsed:.2f} s: {rate:,.0f} steps/s ({rate * 60 / 1e6:.1f} M steps/min)")
+    if scores:
+        print(f"  {len(scores)} episodes, mean score {sum(scores) / len(scores):.1f}, best {max(scores)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless dinosaur environment benchmark")
+    parser.add_argument("--steps", type=int, default=1_000_000, help="frames to simulate")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode")
+    parser.add_argument("--batch", type=int, default=4096, help="games stepped together in the batch benchmark")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    scores = run(args.steps, args.seed)
+    report("DinosaurEnv", args.steps, time.perf_counter() - start, scores)
+
+    steps = max(1, args.steps // args.batch) * args.batch
+    start = time.perf_counter()
+    scores = run_batch(steps, args.batch, args.seed)
+    report(f"BatchDinosaurEnv x{args.batch}", steps, time.perf_counter() - start, scores)
+
+
+if __name__ == "__main__":
+    main()
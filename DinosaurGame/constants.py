@@ -33,6 +33,14 @@ OBSTACLE_HEIGHT = 60
 OBSTACLE_SPEED = 5
 INITIAL_SPAWN_DELAY = 120  # frames (2 seconds at 60 FPS)
 MIN_SPAWN_DELAY = 60  # frames (1 second at 60 FPS)
+SPAWN_JITTER = 30  # up to this many extra frames between obstacles, drawn from the seeded RNG
+
+# Scoring
+SCORE_FRAMES = 6  # frames per point (10 points per second at 60 FPS)
+
+# Agent actions for the headless environment
+ACTION_NONE = 0
+ACTION_JUMP = 1
 
 # Game states
 GAME_STATE_START = "START"
@@ -26,6 +26,12 @@ class Dinosaur:
         self.gravity = GRAVITY
         self.is_jumping = False
         self.ground_y = y  # Remember the ground position
+    
+    def reset(self):
+        """Stand the dinosaur back on the ground, at rest."""
+        self.y = self.ground_y
+        self.vel_y = 0
+        self.is_jumping = False
         
     def jump(self):
         """Make the dinosaur jump if it's on the ground."""
@@ -0,0 +1,177 @@
+"""
+Environment module containing the DinosaurEnv class.
+Runs the game rules without a display, one fixed frame per step, so agents
+can be trained and evaluated deterministically at full speed.
+
+Collisions are checked against the obstacles in the dinosaur's column only
+(the broad phase), and an obstacle fast enough to cross the whole column in
+one frame is caught with a swept test instead of tunneling through.
+"""
+
+import math
+import os
+import random
+from collections import deque
+
+# dinosaur.py and obstacle.py import pygame for drawing; keep its banner out of headless runs
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, DINOSAUR_HEIGHT, DINOSAUR_X_POSITION,
+    OBSTACLE_SPEED, INITIAL_SPAWN_DELAY, MIN_SPAWN_DELAY, SPAWN_JITTER, SCORE_FRAMES, ACTION_JUMP
+)
+from dinosaur import Dinosaur
+from obstacle import ObstaclePool, max_obstacles
+
+# Observation: (height above ground, vertical velocity,
+#               distance to the next obstacle, distance to the one after)
+OBSERVATION_SIZE = 4
+NO_OBSTACLE_DISTANCE = SCREEN_WIDTH  # Reported when fewer obstacles are ahead
+
+
+def overlaps(a, b):
+    """Rectangle overlap with the same integer truncation as pygame.Rect.colliderect."""
+    ax, ay, bx, by = int(a.x), int(a.y), int(b.x), int(b.y)
+    return (ax < bx + b.width and bx < ax + a.width and
+            ay < by + b.height and by < ay + a.height)
+
+
+def overlap_interval(a_start, a_end, a_size, b_start, b_end, b_size):
+    """
+    Open interval of frame times (0 = start, 1 = end) during which two spans
+    moving linearly from start to end overlap along one axis.
+    """
+    offset = a_start - b_start
+    motion = (a_end - b_end) - offset
+    if motion == 0:
+        return (-math.inf, math.inf) if -a_size < offset < b_size else (math.inf, -math.inf)
+    enter = (-a_size - offset) / motion
+    leave = (b_size - offset) / motion
+    return (enter, leave) if enter < leave else (leave, enter)
+
+
+def swept_overlaps(a, a_dx, a_dy, b, b_dx, b_dy):
+    """
+    Whether a and b touched at any time during a frame in which they moved by
+    (dx, dy) to where they are now. Both ends of the motion are truncated like overlaps().
+    """
+    ax, ay, bx, by = int(a.x), int(a.y), int(b.x), int(b.y)
+    x_enter, x_leave = overlap_interval(int(a.x - a_dx), ax, a.width, int(b.x - b_dx), bx, b.width)
+    y_enter, y_leave = overlap_interval(int(a.y - a_dy), ay, a.height, int(b.y - b_dy), by, b.height)
+    return max(x_enter, y_enter, 0) < min(x_leave, y_leave, 1)
+
+
+class DinosaurEnv:
+    """
+    Display-free dinosaur game advanced one frame per step.
+    Time is counted in frames and the only randomness (the gaps between
+    obstacles) comes from the seed passed to reset(), so the same seed and
+    actions always replay the same run.
+    
+    Obstacles all move at the same speed from the same spawn point, so the
+    deque of live obstacles stays sorted by x: spawns append on the right,
+    culling pops from the left, and both reuse objects from an ObstaclePool.
+    
+    `obstacle_speed` raises the difficulty (or fast-forwards the run). Below
+    DINOSAUR_WIDTH + OBSTACLE_WIDTH pixels per frame no obstacle can cross the
+    dinosaur's column within one frame, so games play exactly as with plain
+    per-frame overlap tests; faster obstacles are caught by the swept test.
+    """
+
+    def __init__(self, spawn_jitter=SPAWN_JITTER, max_steps=None, obstacle_speed=OBSTACLE_SPEED):
+        self.spawn_jitter = spawn_jitter
+        self.max_steps = max_steps  # Episodes are cut off (done) after this many frames
+        self.obstacle_speed = obstacle_speed
+        self.ground_y = SCREEN_HEIGHT - GROUND_HEIGHT - DINOSAUR_HEIGHT
+        self.dinosaur = Dinosaur(DINOSAUR_X_POSITION, self.ground_y)
+        self.obstacles = deque()
+        self.obstacle_pool = ObstaclePool(max_obstacles(obstacle_speed))
+        self.reset()
+
+    def reset(self, seed=None):
+        """Start a new run and return its first observation."""
+        self.random = random.Random(seed)
+        self.dinosaur.reset()
+        while self.obstacles:
+            self.obstacle_pool.release(self.obstacles.pop())
+        self.obstacle_spawn_timer = 0
+        self.obstacle_spawn_delay = INITIAL_SPAWN_DELAY
+        self.spawn_gap = self.obstacle_spawn_delay + self.random.randint(0, self.spawn_jitter)
+        self.frame = 0
+        self.score = 0
+        self.crashed = False
+        self.done = False
+        return self.observation()
+
+    def step(self, action):
+        """
+        Advance one frame and return (observation, reward, done).
+        The reward is 1 for every frame survived and 0 for the frame that ends in a crash.
+        """
+        if self.done:
+            raise RuntimeError("step() called after the run ended; call reset() first")
+        dinosaur = self.dinosaur
+        if action == ACTION_JUMP:
+            dinosaur.jump()
+        previous_y = dinosaur.y
+        dinosaur.update()
+
+        # Spawn obstacles, a little sooner each time
+        self.obstacle_spawn_timer += 1
+        if self.obstacle_spawn_timer >= self.spawn_gap:
+            self.obstacles.append(self.obstacle_pool.acquire(SCREEN_WIDTH, self.ground_y, self.obstacle_speed))
+            self.obstacle_spawn_timer = 0
+            if self.obstacle_spawn_delay > MIN_SPAWN_DELAY:
+                self.obstacle_spawn_delay -= 1
+            self.spawn_gap = self.obstacle_spawn_delay + self.random.randint(0, self.spawn_jitter)
+
+        obstacles = self.obstacles
+        for obstacle in obstacles:
+            obstacle.update()
+        self.crashed = self.collides(previous_y)
+        # Off-screen obstacles are always at the front, so culling is O(1) per obstacle
+        while obstacles and obstacles[0].is_off_screen():
+            self.obstacle_pool.release(obstacles.popleft())
+
+        self.frame += 1
+        self.score = self.frame // SCORE_FRAMES
+        self.done = self.crashed or (self.max_steps is not None and self.frame >= self.max_steps)
+        return self.observation(), 0.0 if self.crashed else 1.0, self.done
+
+    def collides(self, previous_y):
+        """
+        Whether the dinosaur hit an obstacle during the frame just simulated.
+        Called after obstacles move and before they are culled, so an obstacle
+        that flew off screen this frame is still tested.
+        """
+        dinosaur = self.dinosaur
+        left = int(dinosaur.x)
+        right = left + dinosaur.width
+        for obstacle in self.obstacles:
+            x = int(obstacle.x)
+            if x >= right:
+                return False  # Sorted by x, so the rest are ahead of the dinosaur's column too
+            if x + obstacle.width > left:
+                if overlaps(dinosaur, obstacle):
+                    return True
+            elif int(obstacle.x + obstacle.speed) >= right:
+                # Crossed the whole column within the frame, so no single frame shows the overlap
+                if swept_overlaps(dinosaur, 0, dinosaur.y - previous_y, obstacle, -obstacle.speed, 0):
+                    return True
+        return False
+
+    def observation(self):
+        """The state an agent sees, as a tuple of OBSERVATION_SIZE numbers."""
+        dinosaur = self.dinosaur
+        front = dinosaur.x + dinosaur.width
+        first = second = None
+        for obstacle in self.obstacles:  # Sorted by x, so the first two ahead are the nearest
+            if obstacle.x + obstacle.width > dinosaur.x:
+                if first is None:
+                    first = obstacle.x - front
+                else:
+                    second = obstacle.x - front
+                    break
+        return (self.ground_y - dinosaur.y, dinosaur.vel_y,
+                NO_OBSTACLE_DISTANCE if first is None else first,
+                NO_OBSTACLE_DISTANCE if second is None else second)
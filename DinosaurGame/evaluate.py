@@ -0,0 +1,178 @@
+"""
+Evaluation module for dinosaur agents.
+Plays a policy over many seeded episodes on every CPU core with a process
+pool and reports the score distribution and episodes per second.
+
+Each worker builds its environment once and reuses it for every chunk of
+seeds it is handed; results come back as NumPy arrays, one entry per
+episode. A policy is any module-level function taking an observation and
+returning an action (or, with --vectorized, taking an array of observations
+and returning an array of actions, run on a BatchDinosaurEnv per chunk).
+
+Usage: python evaluate.py [--episodes N] [--workers N] [--policy MODULE:FUNCTION] [--vectorized]
+"""
+
+import argparse
+import importlib
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+from environment import DinosaurEnv
+from batch_environment import BatchDinosaurEnv
+
+DEFAULT_POLICY = "benchmark:threshold_policy"
+DEFAULT_MAX_STEPS = 10_000  # Frames per episode before it is cut off
+CHUNKS_PER_WORKER = 4  # Seed chunks per worker, so uneven episodes still balance out
+SCORE_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Set in each worker process by start_worker
+_policy = None
+_vectorized = False
+_max_steps = DEFAULT_MAX_STEPS
+_environments = {}  # Episode count -> warm BatchDinosaurEnv, or None -> DinosaurEnv
+
+
+def load_policy(spec):
+    """Import a policy given as "module:function"."""
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise ValueError(f"policy must be given as MODULE:FUNCTION, not {spec!r}")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def start_worker(policy, vectorized, max_steps):
+    """Pool initializer: remember the policy; environments are built on first use."""
+    global _policy, _vectorized, _max_steps
+    _policy, _vectorized, _max_steps = policy, vectorized, max_steps
+    _environments.clear()
+
+
+def play_chunk(seeds):
+    """Play one episode per seed. Returns (scores, frames) arrays in seed order."""
+    if _vectorized:
+        return play_batch(seeds)
+    env = _environments.get(None)
+    if env is None:
+        env = _environments[None] = DinosaurEnv(max_steps=_max_steps)
+    policy = _policy
+    scores = np.empty(len(seeds), dtype=np.int32)
+    frames = np.empty(len(seeds), dtype=np.int32)
+    for index, seed in enumerate(seeds):
+        observation = env.reset(seed)
+        done = False
+        while not done:
+            observation, _, done = env.step(policy(observation))
+        scores[index] = env.score
+        frames[index] = env.frame
+    return scores, frames
+
+
+def play_batch(seeds):
+    """play_chunk for a vectorized policy: the whole chunk runs as one batch until every game is done."""
+    env = _environments.get(len(seeds))
+    if env is None:
+        env = _environments[len(seeds)] = BatchDinosaurEnv(len(seeds), max_steps=_max_steps)
+    observations = env.reset(seeds)
+    while not env.done.all():
+        observations, _, _ = env.step(_policy(observations))
+    return env.score.astype(np.int32), env.frame.astype(np.int32)
+
+
+class EvaluationResult:
+    """
+    Per-episode results of an evaluation run.
+    Arrays are aligned with `seeds`.
+    """
+
+    def __init__(self, seeds, scores, frames, elapsed, workers, max_steps=None):
+        self.seeds = seeds
+        self.scores = scores
+        self.frames = frames
+        self.elapsed = elapsed
+        self.workers = workers
+        self.max_steps = max_steps
+
+    @property
+    def episodes_per_second(self):
+        return len(self.scores) / self.elapsed if self.elapsed > 0 else float("inf")
+
+    @property
+    def cut_off(self):
+        """Episodes that reached max_steps (so their score says nothing about crashing)."""
+        if self.max_steps is None:
+            return 0
+        return int((self.frames >= self.max_steps).sum())
+
+    @property
+    def steps_per_second(self):
+        return int(self.frames.sum()) / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def percentiles(self):
+        return dict(zip(SCORE_PERCENTILES, np.percentile(self.scores, SCORE_PERCENTILES)))
+
+    def summary(self):
+        """Multi-line report of the score distribution and throughput."""
+        scores = self.scores
+        plural = "s" if self.workers != 1 else ""
+        if not len(scores):
+            return f"0 episodes on {self.workers} worker{plural}"
+        lines = [
+            f"{len(scores)} episodes on {self.workers} worker{plural} in {self.elapsed:.2f} s: "
+            f"{self.episodes_per_second:,.0f} episodes/s, {self.steps_per_second:,.0f} steps/s",
+            f"score mean {scores.mean():.1f}, std {scores.std():.1f}, min {scores.min()}, max {scores.max()}",
+            "percentiles " + ", ".join(f"p{p} {value:g}" for p, value in self.percentiles().items()),
+        ]
+        worst = self.seeds[np.argsort(scores, kind="stable")[:3]]
+        lines.append("lowest-scoring seeds " + ", ".join(str(seed) for seed in worst))
+        cut_off = self.cut_off
+        if cut_off == len(scores):
+            lines.append(f"every episode reached the {self.max_steps}-frame limit, "
+                         f"so the scores only reflect the limit, not the policy")
+        elif cut_off:
+            lines.append(f"{cut_off} episodes reached the {self.max_steps}-frame limit")
+        return "\n".join(lines)
+
+
+def evaluate(policy, seeds, workers=None, vectorized=False, max_steps=DEFAULT_MAX_STEPS):
+    """Play `policy` once per seed across a process pool and collect the results."""
+    seeds = np.asarray(seeds, dtype=np.int64)
+    workers = workers or os.cpu_count() or 1
+    if not len(seeds):
+        empty = np.empty(0, dtype=np.int32)
+        return EvaluationResult(seeds, empty, empty.copy(), 0.0, workers, max_steps)
+    chunk_size = max(1, math.ceil(len(seeds) / (workers * CHUNKS_PER_WORKER)))
+    chunks = [seeds[start:start + chunk_size].tolist() for start in range(0, len(seeds), chunk_size)]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, start_worker, (policy, vectorized, max_steps)) as pool:
+        results = pool.map(play_chunk, chunks)
+    elapsed = time.perf_counter() - start
+
+    scores = np.concatenate([chunk_scores for chunk_scores, _ in results])
+    frames = np.concatenate([chunk_frames for _, chunk_frames in results])
+    return EvaluationResult(seeds, scores, frames, elapsed, workers, max_steps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a dinosaur policy over many seeded episodes")
+    parser.add_argument("--episodes", type=int, default=10_000, help="episodes to play")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--policy", default=DEFAULT_POLICY, help="policy function as MODULE:FUNCTION")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="the policy maps an array of observations to an array of actions")
+    parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS, help="frames before an episode is cut off")
+    args = parser.parse_args()
+    if args.episodes < 1:
+        parser.error("--episodes must be at least 1")
+
+    policy = load_policy(args.policy)
+    seeds = np.arange(args.seed, args.seed + args.episodes)
+    result = evaluate(policy, seeds, args.workers, args.vectorized, args.max_steps)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -7,17 +7,16 @@ import pygame
 import sys
 from constants import (
     SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, FPS,
-    WHITE, BLACK, GRAY, BLUE, RED, GREEN,
-    INITIAL_SPAWN_DELAY, MIN_SPAWN_DELAY, DINOSAUR_X_POSITION,
+    WHITE, BLACK, GRAY, BLUE, RED, GREEN, ACTION_NONE, ACTION_JUMP,
     GAME_STATE_START, GAME_STATE_PLAYING, GAME_STATE_GAME_OVER
 )
-from dinosaur import Dinosaur
-from obstacle import Obstacle
+from environment import DinosaurEnv
 
 
 class Game:
     """
     Main game class that handles the game loop, events, and game state.
+    The rules live in DinosaurEnv; the game feeds it one frame per tick.
     """
     
     def __init__(self):
@@ -29,14 +28,10 @@ class Game:
         self.running = True
         self.game_state = GAME_STATE_START
         self.score = 0
-        self.start_time = pygame.time.get_ticks()
         
         # Game objects
-        ground_y = SCREEN_HEIGHT - GROUND_HEIGHT - 60
-        self.dinosaur = Dinosaur(DINOSAUR_X_POSITION, ground_y)
-        self.obstacles = []
-        self.obstacle_spawn_timer = 0
-        self.obstacle_spawn_delay = INITIAL_SPAWN_DELAY
+        self.env = DinosaurEnv(spawn_jitter=0)  # Fixed obstacle gaps, as in the original game
+        self.jump_requested = False  # Applied on the next frame
         
         # Fonts
         self.font = pygame.font.Font(None, 36)
@@ -55,43 +50,21 @@ class Game:
                     elif self.game_state == GAME_STATE_GAME_OVER:
                         self.restart_game()
                     elif self.game_state == GAME_STATE_PLAYING:
-                        self.dinosaur.jump()
+                        self.jump_requested = True
                 elif event.key == pygame.K_ESCAPE:
                     self.running = False
     
     def update(self):
         """Update game logic if the game is playing."""
         if self.game_state == GAME_STATE_PLAYING:
-            # Update dinosaur
-            self.dinosaur.update()
+            action = ACTION_JUMP if self.jump_requested else ACTION_NONE
+            self.jump_requested = False
+            _, _, done = self.env.step(action)
             
-            # Spawn obstacles
-            self.obstacle_spawn_timer += 1
-            if self.obstacle_spawn_timer >= self.obstacle_spawn_delay:
-                ground_y = SCREEN_HEIGHT - GROUND_HEIGHT - 60
-                self.obstacles.append(Obstacle(SCREEN_WIDTH, ground_y))
-                self.obstacle_spawn_timer = 0
-                
-                # Gradually increase difficulty by reducing spawn delay
-                if self.obstacle_spawn_delay > MIN_SPAWN_DELAY:
-                    self.obstacle_spawn_delay -= 1
-            
-            # Update obstacles
-            for obstacle in self.obstacles[:]:  # Use slice to avoid modification during iteration
-                obstacle.update()
-                
-                # Remove obstacles that are off screen
-                if obstacle.is_off_screen():
-                    self.obstacles.remove(obstacle)
-            
-            # Check collisions
-            for obstacle in self.obstacles:
-                if self.dinosaur.get_rect().colliderect(obstacle.get_rect()):
-                    self.game_state = GAME_STATE_GAME_OVER
-            
-            # Update score (based on time survived)
-            current_time = pygame.time.get_ticks()
-            self.score = (current_time - self.start_time) // 100  # Score = seconds * 10
+            # Score is counted in frames survived
+            self.score = self.env.score
+            if done:
+                self.game_state = GAME_STATE_GAME_OVER
     
     def draw(self):
         """Draw all game elements on the screen."""
@@ -116,7 +89,7 @@ class Game:
                         (SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_HEIGHT), 3)
         
         # Draw dinosaur at starting position
-        self.dinosaur.draw(self.screen)
+        self.env.dinosaur.draw(self.screen)
         
         # Title
         title_text = self.medium_font.render("Run Dino Run, Jump Over Cactus", True, GREEN)
@@ -155,8 +128,8 @@ class Game:
                         (SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_HEIGHT), 3)
         
         # Draw game objects
-        self.dinosaur.draw(self.screen)
-        for obstacle in self.obstacles:
+        self.env.dinosaur.draw(self.screen)
+        for obstacle in self.env.obstacles:
             obstacle.draw(self.screen)
         
         # Draw score
@@ -200,31 +173,19 @@ class Game:
         """Start the game from the start screen."""
         self.game_state = GAME_STATE_PLAYING
         self.score = 0
-        self.start_time = pygame.time.get_ticks()
+        self.jump_requested = False
         
-        # Reset dinosaur
-        ground_y = SCREEN_HEIGHT - GROUND_HEIGHT - 60
-        self.dinosaur = Dinosaur(DINOSAUR_X_POSITION, ground_y)
-        
-        # Clear obstacles
-        self.obstacles = []
-        self.obstacle_spawn_timer = 0
-        self.obstacle_spawn_delay = INITIAL_SPAWN_DELAY
+        # New dinosaur, no obstacles and a freshly seeded run
+        self.env.reset()
     
     def restart_game(self):
         """Reset the game to its initial state."""
         self.game_state = GAME_STATE_PLAYING
         self.score = 0
-        self.start_time = pygame.time.get_ticks()
-        
-        # Reset dinosaur
-        ground_y = SCREEN_HEIGHT - GROUND_HEIGHT - 60
-        self.dinosaur = Dinosaur(DINOSAUR_X_POSITION, ground_y)
+        self.jump_requested = False
         
-        # Clear obstacles
-        self.obstacles = []
-        self.obstacle_spawn_timer = 0
-        self.obstacle_spawn_delay = INITIAL_SPAWN_DELAY
+        # New dinosaur, no obstacles and a freshly seeded run
+        self.env.reset()
     
     def run(self):
         """Main game loop."""
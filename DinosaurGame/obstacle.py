@@ -3,8 +3,19 @@ Obstacle module containing the Obstacle class.
 Handles the cactus obstacles that the dinosaur must avoid.
 """
 
+import math
 import pygame
-from constants import GREEN, OBSTACLE_SPEED, OBSTACLE_WIDTH, OBSTACLE_HEIGHT
+from constants import (
+    GREEN, SCREEN_WIDTH, OBSTACLE_SPEED, OBSTACLE_WIDTH, OBSTACLE_HEIGHT, MIN_SPAWN_DELAY
+)
+
+
+def max_obstacles(speed=OBSTACLE_SPEED):
+    """Most obstacles alive at once: a screen's travel at the shortest spawn gap, plus one."""
+    return math.ceil((SCREEN_WIDTH + OBSTACLE_WIDTH) / (speed * MIN_SPAWN_DELAY)) + 1
+
+
+MAX_OBSTACLES = max_obstacles()
 
 
 class Obstacle:
@@ -14,11 +25,15 @@ class Obstacle:
     """
     
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
         self.width = OBSTACLE_WIDTH
         self.height = OBSTACLE_HEIGHT
-        self.speed = OBSTACLE_SPEED
+        self.reset(x, y)
+    
+    def reset(self, x, y, speed=OBSTACLE_SPEED):
+        """Place the obstacle at a new spawn point, so pooled obstacles can be reused."""
+        self.x = x
+        self.y = y
+        self.speed = speed
     
     def update(self):
         """Move the obstacle from right to left."""
@@ -49,3 +64,23 @@ class Obstacle:
     def is_off_screen(self):
         """Check if the obstacle has moved off the left side of the screen."""
         return self.x + self.width < 0
+
+
+class ObstaclePool:
+    """
+    Preallocated obstacles handed out at spawn and returned once off screen.
+    Holds MAX_OBSTACLES up front, so a run never allocates obstacles while playing.
+    """
+    
+    def __init__(self, size=MAX_OBSTACLES):
+        self.free = [Obstacle(0, 0) for _ in range(size)]
+    
+    def acquire(self, x, y, speed=OBSTACLE_SPEED):
+        """Take an obstacle placed at (x, y); a new one is made only if the pool is empty."""
+        obstacle = self.free.pop() if self.free else Obstacle(x, y)
+        obstacle.reset(x, y, speed)
+        return obstacle
+    
+    def release(self, obstacle):
+        """Return an obstacle for reuse."""
+        self.free.append(obstacle)